@@ -0,0 +1,287 @@
+"""
+AI summary service
+
+Completions run on a small worker pool instead of the request thread. Each request
+is keyed by a hash of its normalized prompt: finished results are served from an
+LRU cache, and identical requests that arrive while one is running share its job.
+Callers get a job ID back and poll for the result.
+"""
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from common import OPENAI_API_KEY
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AI_SUMMARY_MODEL = os.environ.get('AI_SUMMARY_MODEL', 'gpt-3.5-turbo')
+AI_SUMMARY_CONCURRENCY = int(os.environ.get('AI_SUMMARY_CONCURRENCY', 2))
+CACHE_SIZE = 256
+JOB_TTL = 15 * 60
+# Budget for the data section of a prompt; roughly 4 characters per token
+PROMPT_TOKEN_BUDGET = int(os.environ.get('AI_SUMMARY_TOKEN_BUDGET', 600))
+CHARS_PER_TOKEN = 4
+
+SYSTEM_PROMPT = "You are a financial data analyst specializing in ETF seasonality trends."
+
+SEASONALITY_PROMPT = """
+Analyze the given ETF seasonality data and generate a structured response with 4 bullet points of unique insights based on the following prompt:
+
+- Analyze the given ETF seasonality data and generate a structured table with the following columns:
+  1. Month (Display as full month name instead of a number)
+  2. ETF (The ETF ticker symbol)
+  3. Upside/Downside Change (The average price change for that ETF in that month)
+  4. Insight (A brief explanation of why the ETF should be watched in that month)
+  5. Win Probability (%) (Percentage of months in the last 15 years where the ETF closed positively)
+
+Ensure the response provides actionable insights, helping users understand which ETFs to monitor for potential upside or downside movements based on historical trends.
+
+Data:
+{data}
+
+Question: {question}
+"""
+
+
+def build_seasonality_prompt(question, data):
+    return SEASONALITY_PROMPT.format(data=data, question=question)
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _fit_budget(lines, token_budget):
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def compact_seasonality(rows, token_budget=PROMPT_TOKEN_BUDGET, extremes=5, z_threshold=2.0):
+    """Reduce seasonality table rows to a short statistical digest within token_budget.
+
+    Sections, in priority order: win-rate extremes, avg-change outliers, and each
+    ETF's best and worst month. Lines that do not fit the budget are dropped.
+    """
+    if not rows:
+        return ""
+    df = pd.DataFrame(rows)
+    for col in ('avg_change', 'median_change', 'positive_months_perc'):
+        df[col] = pd.to_numeric(df.get(col), errors='coerce')
+    for col in ('ticker', 'month'):
+        if col not in df:
+            df[col] = None
+    # Rows without a ticker can't be grouped per ETF
+    df = df.dropna(subset=['avg_change', 'ticker'])
+    if df.empty:
+        return ""
+    df['win'] = df['positive_months_perc'].fillna(0) * 100
+
+    def fmt(row):
+        return f"{row.ticker} {row.month}: avg {row.avg_change:+.2f}%, win {row.win:.0f}%"
+
+    lines = [f"{len(df)} rows, {df['ticker'].nunique()} ETFs, mean avg change {df['avg_change'].mean():+.2f}%"]
+
+    lines.append("Highest win rates:")
+    lines += [fmt(r) for r in df.nlargest(extremes, 'win').itertuples()]
+    lines.append("Lowest win rates:")
+    lines += [fmt(r) for r in df.nsmallest(extremes, 'win').itertuples()]
+
+    std = df['avg_change'].std(ddof=0)
+    if std > 0:
+        z = (df['avg_change'] - df['avg_change'].mean()) / std
+        outliers = df.assign(z=z).loc[lambda d: d.z.abs() >= z_threshold].sort_values('z', key=abs, ascending=False)
+        if len(outliers):
+            lines.append("Outliers:")
+            lines += [f"{fmt(r)} (z {r.z:+.1f})" for r in outliers.itertuples()]
+
+    best = df.loc[df.groupby('ticker')['avg_change'].idxmax()]
+    worst = df.loc[df.groupby('ticker')['avg_change'].idxmin()].set_index('ticker')
+    lines.append("Best / worst month per ETF:")
+    lines += [
+        f"{r.ticker}: best {r.month} {r.avg_change:+.2f}% (win {r.win:.0f}%), "
+        f"worst {worst.at[r.ticker, 'month']} {worst.at[r.ticker, 'avg_change']:+.2f}% "
+        f"(win {worst.at[r.ticker, 'win']:.0f}%)"
+        for r in best.sort_values('avg_change', ascending=False).itertuples()
+    ]
+
+    return "\n".join(_fit_budget(lines, token_budget))
+
+
+def truncate_to_budget(text, token_budget=PROMPT_TOKEN_BUDGET):
+    """Fallback for pre-formatted data: keep whole lines up to the budget."""
+    return "\n".join(_fit_budget(text.split("\n"), token_budget))
+
+
+def normalize_prompt(prompt):
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def prompt_key(prompt, model_name):
+    return hashlib.sha256(f"{model_name}\n{normalize_prompt(prompt)}".encode('utf-8')).hexdigest()
+
+
+def parse_summary(text, limit=4):
+    lines = [line.strip('- ').strip() for line in text.strip().split('\n') if line.strip()]
+    return lines[:limit]
+
+
+class OpenAIModel:
+    def __init__(self, model=AI_SUMMARY_MODEL, api_key=OPENAI_API_KEY, max_tokens=300):
+        self.name = model
+        self.api_key = api_key
+        self.max_tokens = max_tokens
+        self._client = None
+
+    def complete(self, prompt):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key)
+        response = self._client.chat.completions.create(
+            model=self.name,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=self.max_tokens
+        )
+        return response.choices[0].message.content
+
+
+class StubModel:
+    """Deterministic local model for tests and offline development."""
+    name = 'stub'
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        digest = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()[:8]
+        return "\n".join(f"- Stub insight {i} ({digest})" for i in range(1, 5))
+
+
+class SummaryService:
+    def __init__(self, model, max_workers=AI_SUMMARY_CONCURRENCY, cache_size=CACHE_SIZE):
+        self.model = model
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-summary')
+        self._cache = OrderedDict()
+        self._jobs = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, prompt):
+        """Queue a completion for prompt and return its job dict.
+
+        Cached prompts come back as an already finished job; a prompt that is
+        already running returns the running job instead of starting another.
+        """
+        key = prompt_key(prompt, self.model.name)
+        with self._lock:
+            self._expire_jobs()
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._new_job(key, status='done', summary=self._cache[key], cached=True)
+            if key in self._inflight:
+                return self._jobs[self._inflight[key]]
+            job = self._new_job(key, status='pending')
+            self._inflight[key] = job['job_id']
+        self._executor.submit(self._run, job['job_id'], key, prompt)
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def summarize(self, prompt, timeout=None):
+        """Blocking helper: submit and wait for the result."""
+        job = self.submit(prompt)
+        deadline = time.time() + timeout if timeout else None
+        while job['status'] == 'pending':
+            if deadline and time.time() > deadline:
+                break
+            time.sleep(0.05)
+            job = self.get_job(job['job_id']) or job
+        return job
+
+    def _new_job(self, key, **fields):
+        job = dict({'job_id': uuid.uuid4().hex, 'key': key, 'created': time.time(),
+                    'cached': False, 'summary': None, 'error': None}, **fields)
+        self._jobs[job['job_id']] = job
+        return job
+
+    def _run(self, job_id, key, prompt):
+        try:
+            summary = parse_summary(self.model.complete(prompt))
+            with self._lock:
+                self._cache[key] = summary
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                self._jobs[job_id].update(status='done', summary=summary)
+        except Exception as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            with self._lock:
+                self._jobs[job_id].update(status='error', error=str(e))
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _expire_jobs(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [j for j, job in self._jobs.items()
+                       if job['created'] < cutoff and job['status'] != 'pending']:
+            del self._jobs[job_id]
+
+
+def _default_model():
+    if os.environ.get('AI_SUMMARY_MODEL') == 'stub':
+        return StubModel()
+    return OpenAIModel()
+
+
+summary_service = SummaryService(_default_model())
+
+
+def job_response(job, prompt=None):
+    """Public view of a job for JSON responses, with the prompt size when given."""
+    response = {k: job[k] for k in ('job_id', 'status', 'summary', 'error', 'cached')}
+    if prompt is not None:
+        response['prompt_chars'] = len(prompt)
+        response['prompt_tokens'] = estimate_tokens(prompt)
+    return response
+
+
+def seasonality_prompt_from_request(payload):
+    """Build the seasonality prompt from a request body.
+
+    Prefers raw table rows ("rows"), which are compacted into a digest; older
+    clients that send pre-formatted text ("data") are truncated to the budget.
+    """
+    question = payload.get('question', '')
+    if payload.get('rows') is not None:
+        data = compact_seasonality(payload['rows'])
+    else:
+        data = truncate_to_budget(payload.get('data', ''))
+    return build_seasonality_prompt(question, data)
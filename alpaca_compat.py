@@ -5,12 +5,29 @@ that was written for alpaca-trade-api.
 """
 
 import os
+import re
+import asyncio
+import threading
+import time
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import msgpack
+import pandas as pd
+import pytz
 from alpaca.trading.client import TradingClient
 from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.data.live import StockDataStream
+from alpaca.data.enums import DataFeed
 from alpaca.data.requests import StockBarsRequest, StockQuotesRequest
-from alpaca.data.timeframe import TimeFrame
-from datetime import datetime, timedelta
-import pytz
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+
+from common import DATA_DIR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # Environment variables for API credentials
 ALPACA_API_KEY = os.environ.get('ALPACA_API_KEY', 'PKQHK5MA2YWFURXQZR91')
@@ -18,77 +35,555 @@ ALPACA_API_SECRET = os.environ.get('ALPACA_API_SECRET', 'a4g6KlQyJXQ9OGGu3H8dz4L
 
 # Create a trading client instance (equivalent to alpaca_trade_api.REST)
 trading_client = TradingClient(ALPACA_API_KEY, ALPACA_API_SECRET, paper=True)
-data_client = StockHistoricalDataClient(ALPACA_API_KEY, ALPACA_API_SECRET)
+
+# Historical bars: chunked, rate limited, parallel downloads over a local segment cache
+BARS_CACHE_DIR = os.path.join(DATA_DIR, 'bars')
+BARS_WORKERS = int(os.environ.get('ALPACA_BARS_WORKERS', 8))
+REQUESTS_PER_MINUTE = int(os.environ.get('ALPACA_REQUESTS_PER_MINUTE', 200))
+SYMBOL_CHUNK = 50
+MARKET_TZ = pytz.timezone('America/New_York')
+TIMEFRAMES = {
+    '1D': TimeFrame.Day,
+    '1H': TimeFrame.Hour,
+    '15Min': TimeFrame(15, TimeFrameUnit.Minute),
+    '1Min': TimeFrame.Minute,
+}
+TIMEFRAME_ALIASES = {'day': '1D', 'hour': '1H', 'minute': '1Min'}
+# Days per request window, so every request covers a similar number of bars per symbol.
+# alpaca-py pages a request internally, so each page is charged to the rate limiter on its own.
+WINDOW_DAYS = {'1D': 365, '1H': 60, '15Min': 30, '1Min': 7}
+
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average, with bursts of up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedDataClient(StockHistoricalDataClient):
+    """Historical data client that takes a rate limiter token for every HTTP page it requests."""
+
+    def __init__(self, *args, limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    def get(self, path, data=None, **kwargs):
+        # get_stock_bars and friends follow next_page_token through here, once per page
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return super().get(path, data, **kwargs)
+
+
+class BarCache:
+    """Downloaded bars per (timeframe, symbol), with the market days they fully cover.
+
+    Each entry is pickled under BARS_CACHE_DIR/<timeframe>/<SYMBOL>.pkl. Downloaded
+    chunks are held as pending pieces until flush(), which merges each symbol's pieces
+    and writes its file once. Only days before today are marked covered, so today's
+    bars are fetched again on every call.
+    """
+
+    def __init__(self, directory=BARS_CACHE_DIR):
+        self.directory = directory
+        self._entries = {}
+        self._pending = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _path(self, timeframe, symbol):
+        return os.path.join(self.directory, timeframe, f"{symbol}.pkl")
+
+    def _entry(self, timeframe, symbol):
+        key = (timeframe, symbol)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {'bars': pd.DataFrame(), 'days': set()}
+            path = self._path(timeframe, symbol)
+            if os.path.exists(path):
+                try:
+                    entry = pd.read_pickle(path)
+                except Exception as e:
+                    logger.error(f"Could not read cached {timeframe} bars for {symbol}: {e}")
+            self._entries[key] = entry
+        return entry
+
+    def missing_days(self, timeframe, symbol, days):
+        with self._lock:
+            covered = self._entry(timeframe, symbol)['days']
+        return [day for day in days if day not in covered]
+
+    def store(self, timeframe, symbols, frame, days, today):
+        """Queue a downloaded (symbol, timestamp) frame and the finished days it covers until flush()."""
+        # An empty result comes back as a plain DataFrame without the symbol level
+        present = frame.index.get_level_values('symbol') if 'symbol' in (frame.index.names or []) else ()
+        finished = [day for day in days if day < today]
+        with self._lock:
+            for symbol in symbols:
+                bars = frame.xs(symbol, level='symbol') if symbol in present else None
+                self._pending[(timeframe, symbol)].append((bars, finished))
+
+    def flush(self, timeframe, symbols):
+        """Merge each symbol's pending pieces into its entry in one pass and persist it once."""
+        for symbol in symbols:
+            with self._lock:
+                pieces = self._pending.pop((timeframe, symbol), None)
+                if not pieces:
+                    continue
+                entry = self._entry(timeframe, symbol)
+                new_bars = [bars for bars, _ in pieces if bars is not None and len(bars)]
+                if new_bars:
+                    parts = ([entry['bars']] if len(entry['bars']) else []) + new_bars
+                    merged = pd.concat(parts) if len(parts) > 1 else parts[0]
+                    entry['bars'] = merged[~merged.index.duplicated(keep='last')].sort_index()
+                for _, days in pieces:
+                    entry['days'].update(days)
+                try:
+                    path = self._path(timeframe, symbol)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    pd.to_pickle(entry, path + '.tmp')
+                    os.replace(path + '.tmp', path)
+                except OSError as e:
+                    logger.error(f"Could not persist {timeframe} bars for {symbol}: {e}")
+
+    def frame(self, timeframe, symbols, start, end):
+        """Cached bars for symbols between start and end as one (symbol, timestamp) frame."""
+        parts = {}
+        with self._lock:
+            for symbol in symbols:
+                bars = self._entry(timeframe, symbol)['bars']
+                if len(bars):
+                    parts[symbol] = bars.loc[(bars.index >= start) & (bars.index <= end)]
+        if not parts:
+            return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['symbol', 'timestamp']))
+        return pd.concat(parts, names=['symbol', 'timestamp'])
+
+
+def _date_windows(days, max_days):
+    """Split sorted days into runs of consecutive days, each at most max_days long."""
+    windows = []
+    for day in days:
+        if windows and (day - windows[-1][-1]).days == 1 and len(windows[-1]) < max_days:
+            windows[-1].append(day)
+        else:
+            windows.append([day])
+    return windows
+
+
+def _market_time(value, default):
+    if value is None:
+        value = default
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d')
+    if value.tzinfo is None:
+        value = MARKET_TZ.localize(value)
+    return value
+
+
+bar_cache = BarCache()
+rate_limiter = TokenBucket(REQUESTS_PER_MINUTE / 60.0, capacity=max(1, REQUESTS_PER_MINUTE // 20))
+data_client = RateLimitedDataClient(ALPACA_API_KEY, ALPACA_API_SECRET, limiter=rate_limiter)
+
 
 # Compatibility class to mimic alpaca_trade_api.REST
 class REST:
     def __init__(self, key_id=None, secret_key=None, base_url=None):
         self.trading_client = trading_client
         self.data_client = data_client
-        
+
+    def _fetch_bars(self, symbols, timeframe, first_day, last_day):
+        start = MARKET_TZ.localize(datetime.combine(first_day, datetime.min.time()))
+        end = MARKET_TZ.localize(datetime.combine(last_day, datetime.max.time()))
+        params = StockBarsRequest(symbol_or_symbols=symbols, timeframe=TIMEFRAMES[timeframe],
+                                  start=start, end=min(end, datetime.now(MARKET_TZ)))
+        return self.data_client.get_stock_bars(params).df
+
     def get_bars(self, symbols, timeframe, start=None, end=None, limit=None):
-        # Handle start/end date parameters
-        if start is None:
-            start = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        if end is None:
-            end = datetime.now().strftime('%Y-%m-%d')
-            
-        # Convert string dates to datetime objects if needed
-        if isinstance(start, str):
-            start = datetime.strptime(start, '%Y-%m-%d')
-        if isinstance(end, str):
-            end = datetime.strptime(end, '%Y-%m-%d')
-            
-        # Add timezone if not present
-        if start.tzinfo is None:
-            start = pytz.timezone('America/New_York').localize(start)
-        if end.tzinfo is None:
-            end = pytz.timezone('America/New_York').localize(end)
-            
-        # Handle timeframe parameter
-        tf_mapping = {
-            '1D': TimeFrame.Day,
-            '1H': TimeFrame.Hour,
-            '15Min': TimeFrame.Minute,
-            'day': TimeFrame.Day,
-            'hour': TimeFrame.Hour,
-            'minute': TimeFrame.Minute
+        """Bars for symbols as one DataFrame indexed by (symbol, timestamp).
+
+        Days already cached are not downloaded again. The rest is fetched in chunks
+        of SYMBOL_CHUNK symbols by WINDOW_DAYS days, BARS_WORKERS at a time, with every
+        page charged to the shared rate limiter. Each symbol's cache file is written
+        once, after all its chunks are in. limit caps the number of bars per symbol.
+        """
+        symbols = sorted({s.upper() for s in ([symbols] if isinstance(symbols, str) else symbols)})
+        timeframe = TIMEFRAME_ALIASES.get(timeframe, timeframe)
+        if timeframe not in TIMEFRAMES:
+            timeframe = '1D'
+        start = _market_time(start, datetime.now() - timedelta(days=30))
+        end = _market_time(end, datetime.now())
+        if isinstance(end, datetime) and end.time() == datetime.min.time():
+            # A bare end date includes that whole day
+            end = end + timedelta(days=1) - timedelta(microseconds=1)
+        today = datetime.now(MARKET_TZ).date()
+        days = [d.date() for d in pd.date_range(start.date(), min(end.date(), today))]
+
+        # Symbols missing the same days share requests
+        groups = defaultdict(list)
+        for symbol in symbols:
+            missing = bar_cache.missing_days(timeframe, symbol, days)
+            if missing:
+                groups[tuple(missing)].append(symbol)
+        jobs = [(group[i:i + SYMBOL_CHUNK], window)
+                for missing, group in groups.items()
+                for window in _date_windows(list(missing), WINDOW_DAYS[timeframe])
+                for i in range(0, len(group), SYMBOL_CHUNK)]
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=BARS_WORKERS) as pool:
+                futures = {pool.submit(self._fetch_bars, chunk, timeframe, window[0], window[-1]): (chunk, window)
+                           for chunk, window in jobs}
+                for future in as_completed(futures):
+                    chunk, window = futures[future]
+                    try:
+                        frame = future.result()
+                    except Exception as e:
+                        logger.error(f"Error getting bars for {len(chunk)} symbols from {window[0]} to {window[-1]}: {e}")
+                        continue
+                    bar_cache.store(timeframe, chunk, frame, window, today)
+            bar_cache.flush(timeframe, symbols)
+
+        bars = bar_cache.frame(timeframe, symbols, start, end)
+        if limit:
+            bars = bars.groupby(level='symbol', group_keys=False).head(limit)
+        return bars
+
+# Streaming: one websocket per StreamConn, fanned out to handlers on its own asyncio loop
+STREAM_KINDS = ('bars', 'quotes', 'trades')
+# alpaca-trade-api channel prefixes ('T.AAPL', 'AM.*', ...) mapped to stream kinds
+CHANNEL_PREFIXES = {'T': 'trades', 'Q': 'quotes', 'AM': 'bars', 'B': 'bars'}
+STREAM_QUEUE_SIZE = int(os.environ.get('ALPACA_STREAM_QUEUE_SIZE', 1000))
+STREAM_BATCH_SIZE = int(os.environ.get('ALPACA_STREAM_BATCH_SIZE', 100))
+STREAM_FEED = os.environ.get('ALPACA_DATA_FEED', 'iex')
+# Websocket URL override, e.g. a local stand-in server for tests
+STREAM_URL = os.environ.get('ALPACA_STREAM_URL')
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 60
+
+
+class Subscription:
+    """A handler's subscription to one kind of message, with its own bounded queue.
+
+    Handlers get one message per call, or a list per call when batch=True. Coroutine
+    handlers run on the stream loop; plain functions run in a worker thread.
+    """
+
+    def __init__(self, kind, symbols, handler, batch=False, queue_size=STREAM_QUEUE_SIZE):
+        self.kind = kind
+        self.symbols = symbols
+        self.handler = handler
+        self.batch = batch
+        self.queue_size = queue_size
+        self.queue = None
+        self.task = None
+        self.delivered = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    def offer(self, message):
+        """Enqueue without waiting; a full queue drops its oldest message."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Stream handler {self.name} is falling behind, {self.dropped} messages dropped")
+        self.queue.put_nowait(message)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def _call_each(self, messages):
+        for message in messages:
+            try:
+                self.handler(message)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Stream handler {self.name} failed: {e}")
+
+    async def drain(self, batch_size):
+        loop = asyncio.get_running_loop()
+        is_async = asyncio.iscoroutinefunction(self.handler)
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                if self.batch and is_async:
+                    await self.handler(batch)
+                elif self.batch:
+                    await loop.run_in_executor(None, self.handler, batch)
+                elif is_async:
+                    for message in batch:
+                        await self.handler(message)
+                else:
+                    await loop.run_in_executor(None, self._call_each, batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Stream handler {self.name} failed: {e}")
+            self.delivered += len(batch)
+            self.batches += 1
+
+    @property
+    def name(self):
+        return getattr(self.handler, '__qualname__', repr(self.handler))
+
+    def metrics(self):
+        return {
+            'handler': self.name, 'kind': self.kind, 'symbols': sorted(self.symbols),
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'queue_size': self.queue_size, 'max_depth': self.max_depth, 'delivered': self.delivered,
+            'dropped': self.dropped, 'batches': self.batches, 'errors': self.errors,
         }
-        tf = tf_mapping.get(timeframe, TimeFrame.Day)
-        
-        # Create request parameters
-        params = StockBarsRequest(
-            symbol_or_symbols=symbols,
-            timeframe=tf,
-            start=start,
-            end=end,
-            limit=limit
-        )
-        
-        # Execute request
-        try:
-            bars = self.data_client.get_stock_bars(params)
-            return bars
-        except Exception as e:
-            print(f"Error getting bars: {e}")
-            return None
 
-# Mock the websockets functionality
+
 class StreamConn:
-    def __init__(self, key_id=None, secret_key=None, base_url=None, data_stream=None):
+    """Market data stream on alpaca-py's StockDataStream, shared by any number of handlers.
+
+    subscribe() registers a handler for bars, quotes or trades of some symbols ('*'
+    for all). The socket only feeds per-handler bounded queues, which are drained in
+    batches, so a slow handler loses its own oldest messages instead of stalling the
+    socket or the other handlers. The connection is driven here rather than by
+    StockDataStream.run so that a dropped connection is retried with exponential
+    backoff and every subscription is replayed on reconnect. on()/register()/run()
+    keep the alpaca-trade-api interface.
+    """
+
+    def __init__(self, key_id=None, secret_key=None, base_url=None, data_stream=None,
+                 feed=STREAM_FEED, url=STREAM_URL, batch_size=STREAM_BATCH_SIZE):
         self.trading_client = trading_client
         self.data_client = data_client
+        self.key_id = key_id or ALPACA_API_KEY
+        self.secret_key = secret_key or ALPACA_API_SECRET
+        self.feed = feed
+        self.url = url
+        self.batch_size = batch_size
         self.handlers = {}
-        
-    def run(self):
-        print("Mock StreamConn running - no actual websocket connection in this compatibility layer")
-        return
-        
+        self.stats = {'connects': 0, 'reconnects': 0, 'messages': 0, 'last_message_at': None, 'last_error': None}
+        self.connected = False
+        self._subscriptions = []
+        self._active = []
+        self._routes = {}
+        self._registered = {kind: set() for kind in STREAM_KINDS}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._main_task = None
+        self._thread = None
+        self._stream = None
+        self._wake = None
+
+    # Subscriptions
+
+    def subscribe(self, kind, symbols, handler, batch=False, queue_size=STREAM_QUEUE_SIZE):
+        """Send kind ('bars', 'quotes' or 'trades') messages for symbols to handler. Returns the subscription."""
+        if kind not in STREAM_KINDS:
+            raise ValueError(f"Unknown stream kind: {kind}")
+        symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        subscription = Subscription(kind, {s.upper() for s in symbols}, handler, batch=batch, queue_size=queue_size)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        self._schedule_apply()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        self._schedule_apply()
+
+    def _schedule_apply(self):
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._apply_subscriptions)
+
+    def _apply_subscriptions(self):
+        """Start or stop handler queues and bring the stream's symbols in line (on the loop)."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in self._active:
+            if subscription not in subscriptions and subscription.task is not None:
+                subscription.task.cancel()
+        self._active = subscriptions
+        routes = {}
+        for subscription in subscriptions:
+            if subscription.task is None:
+                subscription.queue = asyncio.Queue(maxsize=subscription.queue_size)
+                subscription.task = self._loop.create_task(subscription.drain(self.batch_size))
+            for symbol in subscription.symbols:
+                routes.setdefault((subscription.kind, symbol), []).append(subscription)
+        self._routes = routes
+
+        added, removed = {}, {}
+        for kind in STREAM_KINDS:
+            wanted = {symbol for (k, symbol) in routes if k == kind}
+            if '*' in wanted:
+                wanted = {'*'}
+            registered = self._registered[kind]
+            # The stream is never marked running, so these only update its dispatch table
+            if wanted - registered:
+                added[kind] = sorted(wanted - registered)
+                getattr(self._stream, f'subscribe_{kind}')(self._ingress(kind), *added[kind])
+            if registered - wanted:
+                removed[kind] = sorted(registered - wanted)
+                getattr(self._stream, f'unsubscribe_{kind}')(*removed[kind])
+            self._registered[kind] = wanted
+        if self.connected:
+            self._loop.create_task(self._send_action('subscribe', added))
+            self._loop.create_task(self._send_action('unsubscribe', removed))
+        self._wake.set()
+
+    async def _send_action(self, action, symbols_by_kind):
+        """Send a subscribe/unsubscribe message for {kind: symbols} on the open socket."""
+        if not any(symbols_by_kind.values()):
+            return
+        try:
+            await self._stream._ws.send(msgpack.packb({'action': action, **symbols_by_kind}))
+        except Exception as e:
+            logger.error(f"Could not {action} stream symbols: {e}")
+
+    def _ingress(self, kind):
+        async def ingress(message):
+            self.stats['messages'] += 1
+            self.stats['last_message_at'] = time.time()
+            symbol = getattr(message, 'symbol', None)
+            for subscription in self._routes.get((kind, symbol), []) + self._routes.get((kind, '*'), []):
+                subscription.offer(message)
+        return ingress
+
+    # Connection
+
+    def _new_stream(self):
+        return StockDataStream(self.key_id, self.secret_key, feed=DataFeed(self.feed), url_override=self.url)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
+        self._wake = asyncio.Event()
+        self._stream = self._new_stream()
+        self._apply_subscriptions()
+        delay = RECONNECT_MIN_SECONDS
+        try:
+            while True:
+                if not self._routes:
+                    # Nothing subscribed: stay disconnected until something is
+                    self._wake.clear()
+                    await self._wake.wait()
+                    continue
+                started = time.monotonic()
+                try:
+                    await self._stream._start_ws()
+                    self.connected = True
+                    self.stats['connects'] += 1
+                    # Replay every current subscription on the new connection
+                    await self._send_action('subscribe', {kind: sorted(symbols)
+                                                          for kind, symbols in self._registered.items() if symbols})
+                    await self._stream._consume()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats['last_error'] = str(e)
+                    logger.warning(f"Market data stream disconnected: {e}")
+                finally:
+                    self.connected = False
+                    try:
+                        await self._stream.close()
+                    except Exception:
+                        pass
+                if time.monotonic() - started > RECONNECT_MAX_SECONDS:
+                    delay = RECONNECT_MIN_SECONDS
+                self.stats['reconnects'] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+        finally:
+            for subscription in self._active:
+                if subscription.task is not None:
+                    subscription.task.cancel()
+                    subscription.task = None
+            # The next start() builds a new stream, which must get every handler registered again
+            self._active = []
+            self._routes = {}
+            self._registered = {kind: set() for kind in STREAM_KINDS}
+
+    def start(self):
+        """Run the stream on a background thread (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run_loop, daemon=True)
+                self._thread.start()
+        return self
+
+    def _run_loop(self):
+        try:
+            asyncio.run(self._main())
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self):
+        loop, task = self._loop, self._main_task
+        if loop is not None and task is not None and loop.is_running():
+            loop.call_soon_threadsafe(task.cancel)
+
+    def metrics(self):
+        """Connection counters plus queue depth, drops and deliveries per handler."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {'connected': self.connected, **self.stats,
+                'subscriptions': [subscription.metrics() for subscription in subscriptions]}
+
+    # alpaca-trade-api interface
+
     def on(self, event_type):
         def decorator(func):
             self.handlers[event_type] = func
             return func
         return decorator
-        
+
     def register(self, handler, event_type):
-        self.handlers[event_type] = handler 
\ No newline at end of file
+        self.handlers[event_type] = handler
+
+    def _channel_handler(self, prefix):
+        async def dispatch(message):
+            channel = f"{prefix}.{getattr(message, 'symbol', '')}"
+            for pattern, func in list(self.handlers.items()):
+                if re.match(pattern, channel):
+                    result = func(self, channel, message)
+                    if asyncio.iscoroutine(result):
+                        await result
+        return dispatch
+
+    def run(self, channels=()):
+        """Subscribe channels like 'T.AAPL' or 'AM.*' to the on() handlers and run until stopped."""
+        for channel in channels:
+            prefix, _, symbol = channel.partition('.')
+            if prefix not in CHANNEL_PREFIXES or not symbol:
+                logger.warning(f"Unsupported stream channel: {channel}")
+                continue
+            self.subscribe(CHANNEL_PREFIXES[prefix], symbol, self._channel_handler(prefix))
+        self._run_loop()
+
+
+_shared_stream = None
+_shared_stream_lock = threading.Lock()
+
+
+def get_stream():
+    """The process-wide stream, started on first use; pages subscribe to it instead of opening sockets."""
+    global _shared_stream
+    with _shared_stream_lock:
+        if _shared_stream is None:
+            _shared_stream = StreamConn()
+        return _shared_stream.start()
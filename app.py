@@ -9,20 +9,8 @@ from flask import Flask, render_template_string, request, send_from_directory
 import os
 import ssl
 
-from institution_list import institution_bp
-from research import research_bp
-from seasonality import seasonality_bp
-from etf_research import etf_research_bp
-from etf_market import etf_market_bp
-from market_tide import market_tide_bp
-from market_spike import market_spike_bp
-from flow_per_strike import flow_per_strike_bp
 from common import MENU_BAR
-from insider_trades import insider_trades_bp
-from congress_trades import congress_trades_bp
-from premium_options import premium_options_bp
-from most_active_stocks import most_active_bp
-from market_movers import market_movers_bp
+from lazy_blueprints import register_blueprints, start_warmup
 
 app = Flask(__name__)
 app.config['TEMPLATES_AUTO_RELOAD'] = True
@@ -61,19 +49,9 @@ def internal_server_error(e):
         </div>
     """), 500
 
-app.register_blueprint(institution_bp)
-app.register_blueprint(research_bp)
-app.register_blueprint(seasonality_bp)
-app.register_blueprint(etf_research_bp)
-app.register_blueprint(etf_market_bp)
-app.register_blueprint(market_tide_bp)
-app.register_blueprint(market_spike_bp)
-app.register_blueprint(flow_per_strike_bp)
-app.register_blueprint(insider_trades_bp)
-app.register_blueprint(congress_trades_bp)
-app.register_blueprint(premium_options_bp)
-app.register_blueprint(most_active_bp)
-app.register_blueprint(market_movers_bp)
+# Page blueprints are registered as lazy stubs and imported on first use or by the warmup thread
+register_blueprints(app)
+start_warmup()
 
 # Create static folder if it doesn't exist
 os.makedirs('static', exist_ok=True)
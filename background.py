@@ -0,0 +1,108 @@
+"""
+Background services
+
+The pollers and ingest loops otherwise start lazily on the first request that needs
+them. start_services() starts them up front instead, once per process; under
+gunicorn the master's hooks (gunicorn.conf.py) call it in exactly one worker, so one
+set of pollers and upstream connections serves the whole server. Service modules are
+imported inside the starters so this module stays cheap to import.
+"""
+
+import os
+import threading
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _screener_pollers():
+    from screener_poller import start_pollers
+    start_pollers()
+
+
+def _market_spike():
+    from spike_store import get_spike_series
+    get_spike_series()
+
+
+def _sector_tide():
+    from market_tide_engine import start_poll_thread
+    start_poll_thread()
+
+
+def _holdings_index():
+    from holdings_index import get_holdings_index
+    get_holdings_index()
+
+
+def _seasonality_screener():
+    from seasonality_screener import get_screener_matrix
+    get_screener_matrix()
+
+
+def _etf_lookthrough():
+    from etf_lookthrough import lookthrough_engine
+    lookthrough_engine.start_refresh_thread()
+
+
+def _etf_flows():
+    from etf_flows import flow_store
+    flow_store.start_refresh_thread()
+
+
+def _premium_stream():
+    from premium_options import start_websocket_thread
+    start_websocket_thread()
+
+
+def _congress_backtest():
+    from congress_backtest import start_backtest_thread
+    from congress_trades import get_congress_store
+    start_backtest_thread(get_congress_store)
+
+
+SERVICES = {
+    'screener_pollers': _screener_pollers,
+    'market_spike': _market_spike,
+    'sector_tide': _sector_tide,
+    'holdings_index': _holdings_index,
+    'seasonality_screener': _seasonality_screener,
+    'etf_lookthrough': _etf_lookthrough,
+    'etf_flows': _etf_flows,
+    'premium_stream': _premium_stream,
+    'congress_backtest': _congress_backtest,
+}
+# Comma-separated subset of SERVICES to start; all of them by default
+ENABLED_SERVICES = [name.strip() for name in
+                    os.environ.get('FINANCEHUB_BACKGROUND_SERVICES', ','.join(SERVICES)).split(',') if name.strip()]
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def _start_all(names):
+    for name in names:
+        started = time.perf_counter()
+        try:
+            SERVICES[name]()
+            logger.info(f"Started background service {name} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            logger.error(f"Background service {name} failed to start: {e}")
+
+
+def start_services(names=None):
+    """Start the background services once per process, off the calling thread. Returns False if already started."""
+    global _started
+    names = ENABLED_SERVICES if names is None else names
+    unknown = [name for name in names if name not in SERVICES]
+    if unknown:
+        raise ValueError(f"Unknown background services: {', '.join(unknown)}")
+    with _start_lock:
+        if _started:
+            return False
+        _started = True
+    # Some starters do their first fetch synchronously, so they run off the caller's thread
+    threading.Thread(target=_start_all, args=(names,), daemon=True, name='background-services').start()
+    return True
@@ -2,10 +2,10 @@ import os
 from flask import Flask, render_template_string, request, jsonify
 import requests
 import json
-import yfinance as yf
 from datetime import datetime, timedelta
 import random
 import ssl
+from concurrent.futures import ThreadPoolExecutor
 # API configuration
 APIKEY = "bd0cf36c-5072-4b1e-87ee-7e278b8a02e5"  # This is a mock API key
 APIKEY = os.environ.get('UNUSUALWHALES_API_KEY', 'bd0cf36c-5072-4b1e-87ee-7e278b8a02e5')
@@ -18,9 +18,14 @@ ETF_HOLDINGS_API_URL = "https://api.unusualwhales.com/api/etfs/{ticker}/holdings
 ETF_INOUTFLOW_API_URL = "https://api.unusualwhales.com/api/etfs/{ticker}/in-outflow"
 ETF_INFO_API_URL = "https://api.unusualwhales.com/api/etfs/{ticker}/info"
 MARKET_TIDE_API_URL = "https://api.unusualwhales.com/api/market/market-tide"
+SECTOR_TIDE_API_URL = "https://api.unusualwhales.com/api/market/{sector}/sector-tide"
+MARKET_SPIKE_API_URL = "https://api.unusualwhales.com/api/market/spike"
 INSIDER_TRADES_API_URL = "https://api.unusualwhales.com/api/market/insider-buy-sells"
 CONGRESS_TRADES_API_URL = "https://api.unusualwhales.com/api/congress/congress-trader"
 
+# Local directory for persisted caches and indexes
+DATA_DIR = os.environ.get('FINANCEHUB_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
 # Mock data for testing
 MOCK_INSTITUTIONS = [
     "BlackRock", "Vanguard", "State Street", "Fidelity", "JPMorgan",
@@ -133,6 +138,8 @@ def get_live_stock_price(ticker):
             return old_get(*args, **kwargs)
         requests.get = new_get
         
+        # yfinance is heavy to import, so only pages that need live prices pay for it
+        import yfinance as yf
         stock = yf.Ticker(ticker)
         price = stock.info.get('regularMarketPrice')
         
@@ -148,6 +155,38 @@ def get_live_stock_price(ticker):
         print(f"Stock Price Error: {str(e)}")
         return round(random.uniform(10, 1000), 2)
 
+def get_api_data_concurrent(urls, params=None, max_workers=16):
+    """Fetch several API urls in parallel, returning the responses in the same order as urls."""
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(lambda url: get_api_data(url, params=params), urls))
+
+def get_live_stock_prices(tickers):
+    """Batch version of get_live_stock_price: one yfinance download for every ticker.
+
+    Returns a dict of ticker -> price. Tickers yfinance can't price fall back to
+    mock data, same as get_live_stock_price.
+    """
+    tickers = list(dict.fromkeys(t for t in tickers if t))
+    prices = {}
+    if not tickers:
+        return prices
+    try:
+        import yfinance as yf
+        closes = yf.download(tickers, period="5d", progress=False, threads=True)["Close"]
+        if hasattr(closes, "columns"):
+            last = closes.ffill().iloc[-1]
+            prices = {ticker: float(price) for ticker, price in last.items() if price == price}
+        elif len(closes):
+            prices = {tickers[0]: float(closes.dropna().iloc[-1])}
+    except Exception as e:
+        print(f"Stock Price Error: {str(e)}")
+    for ticker in tickers:
+        if ticker not in prices:
+            prices[ticker] = round(random.uniform(10, 1000), 2)
+    return prices
+
 MENU_BAR = """
 
 <div class="menu-bar">
@@ -0,0 +1,118 @@
+"""
+Incremental congress trade analytics
+
+Counters for the dashboard (buys, sells, chamber split, trades per ticker) are
+updated from each batch of newly ingested trades instead of being recomputed from
+the full history on every render. Per-member and per-ticker rollups over rolling
+30/90/365 day windows keep per-day counts, add new trades to every window they fall
+in, and subtract whole days as they age out. Top-K lists are taken with a heap and
+the dashboard snapshot is cached until the counters change.
+"""
+
+import heapq
+import threading
+from collections import Counter, defaultdict
+from datetime import date
+from operator import itemgetter
+
+WINDOWS = (30, 90, 365)
+TOP_K = 5
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def top_k(counter, k=TOP_K):
+    return heapq.nlargest(k, counter.items(), key=itemgetter(1))
+
+
+class CongressAnalytics:
+    def __init__(self, today=None):
+        self._lock = threading.Lock()
+        self.today = (today or date.today()).toordinal()
+        self.totals = Counter()
+        self.tickers = Counter()
+        # Per-day counts of (kind, key), kind being 'member' or 'ticker'
+        self.daily = defaultdict(Counter)
+        self.windows = {days: {'member': Counter(), 'ticker': Counter()} for days in WINDOWS}
+        self._snapshot = None
+
+    def _roll_to(self, today):
+        """Advance the windows to today, subtracting the days that leave each of them."""
+        if today <= self.today:
+            return
+        longest = max(WINDOWS)
+        for days in WINDOWS:
+            rollup = self.windows[days]
+            for day in range(max(self.today - days + 1, today - days - longest), today - days + 1):
+                for (kind, key), count in self.daily.get(day, {}).items():
+                    rollup[kind][key] -= count
+                    if rollup[kind][key] <= 0:
+                        del rollup[kind][key]
+        for day in [d for d in self.daily if d <= today - longest]:
+            del self.daily[day]
+        self.today = today
+        self._snapshot = None
+
+    def ingest(self, frame):
+        """Fold a batch of new store rows into the counters, one vectorized pass per field."""
+        if frame is None or frame.empty:
+            return
+        txn = frame['txn_type'].astype(str).value_counts()
+        chamber = frame['member_type'].astype(str).str.lower().value_counts()
+        tickers = frame.loc[frame['ticker'] != '', 'ticker'].value_counts()
+        days = frame['filed_at_date'].to_numpy().astype('datetime64[D]').astype('int64') + EPOCH_ORDINAL
+        per_day = Counter()
+        for kind, column in (('member', 'reporter'), ('ticker', 'ticker')):
+            grouped = frame.assign(day=days).groupby(['day', column], observed=True).size()
+            for (day, key), count in grouped.items():
+                if key:
+                    per_day[(int(day), kind, key)] += int(count)
+
+        with self._lock:
+            self._roll_to(date.today().toordinal())
+            self.totals['trades'] += len(frame)
+            self.totals['buys'] += int(txn.get('Buy', 0))
+            self.totals['sells'] += int(txn.get('Sell', 0))
+            self.totals['house'] += int(chamber.get('house', 0))
+            self.totals['senate'] += int(chamber.get('senate', 0))
+            self.tickers.update(tickers.to_dict())
+            for (day, kind, key), count in per_day.items():
+                age = self.today - day
+                if age >= max(WINDOWS) or age < 0:
+                    continue
+                self.daily[day][(kind, key)] += count
+                for days in WINDOWS:
+                    if age < days:
+                        self.windows[days][kind][key] += count
+            self._snapshot = None
+
+    def snapshot(self):
+        """Dashboard numbers: totals, most traded tickers and the rolling rollups."""
+        with self._lock:
+            self._roll_to(date.today().toordinal())
+            if self._snapshot is None:
+                self._snapshot = {
+                    'total_trades': self.totals['trades'],
+                    'total_buys': self.totals['buys'],
+                    'total_sells': self.totals['sells'],
+                    'house_trades': self.totals['house'],
+                    'senate_trades': self.totals['senate'],
+                    'most_traded': top_k(self.tickers),
+                    'rollups': {days: {'members': top_k(rollup['member']), 'tickers': top_k(rollup['ticker'])}
+                                for days, rollup in self.windows.items()},
+                }
+            return self._snapshot
+
+
+_attach_lock = threading.Lock()
+
+
+def get_analytics(store):
+    """The analytics attached to a trades store, built from its history on first use."""
+    with _attach_lock:
+        analytics = getattr(store, 'analytics', None)
+        if analytics is None:
+            analytics = CongressAnalytics()
+            analytics.ingest(store.frame)
+            store.listeners.append(analytics.ingest)
+            store.analytics = analytics
+    return analytics
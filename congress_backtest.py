@@ -0,0 +1,199 @@
+"""
+Congress trade backtester
+
+Every disclosed trade is entered at the first close on or after its filing date
+(the day the public could have acted on it) and measured over 5/20/60/250 trading
+days against the cached daily closes from price_history. Returns are signed by
+direction, so a sale followed by a drop counts as a good call, and excess return is
+the signed difference to SPY over the same days.
+
+All trades are priced at once: closes are aligned into one (trading days x tickers)
+matrix and each horizon is a gather at entry row + horizon. Results are kept per
+store row and only new trades, plus recent ones whose horizons were still open, are
+recomputed when filings or prices arrive. Leaderboards are cached per query until
+the results change.
+"""
+
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from price_history import get_daily_closes
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HORIZONS = (5, 20, 60, 250)
+BENCHMARK = 'SPY'
+REFRESH_INTERVAL = int(os.environ.get('CONGRESS_BACKTEST_REFRESH_SECONDS', 3600))
+LEADERBOARD_GROUPS = {'member': 'reporter', 'party': 'party'}
+
+
+def trade_direction(txn_types):
+    """+1 for purchases, -1 for sales, NaN for anything else (exchanges, blanks)."""
+    kind = pd.Series(txn_types, dtype=object).astype(str).str.strip().str.lower()
+    return np.select([kind.str.startswith(('buy', 'purchase')), kind.str.startswith(('sell', 'sale'))],
+                     [1.0, -1.0], default=np.nan)
+
+
+def price_matrix(tickers, refresh=True):
+    """(calendar, tickers, closes) with closes forward-filled onto the benchmark's trading days."""
+    benchmark = get_daily_closes(BENCHMARK, refresh=refresh)
+    calendar = benchmark.index
+    columns = {}
+    for ticker in tickers:
+        try:
+            closes = benchmark if ticker == BENCHMARK else get_daily_closes(ticker, refresh=refresh)
+        except Exception as e:
+            logger.error(f"Skipping {ticker} in congress backtest: {e}")
+            continue
+        if len(closes):
+            columns[ticker] = closes.reindex(calendar.union(closes.index)).ffill().reindex(calendar)
+    frame = pd.DataFrame(columns, index=calendar)
+    return calendar, list(frame.columns), frame.to_numpy(dtype=np.float64)
+
+
+def forward_returns(trades, calendar, tickers, closes):
+    """Signed forward and excess returns for each trade row at every horizon."""
+    out = pd.DataFrame(index=trades.index)
+    n_days = len(calendar)
+    if not n_days:
+        return out.assign(**{f'{kind}_{h}': np.nan for h in HORIZONS for kind in ('ret', 'excess')})
+
+    codes = pd.Index(tickers).get_indexer(trades['ticker'])
+    entry = np.searchsorted(calendar.to_numpy(), trades['filed_at_date'].to_numpy().astype('datetime64[ns]'))
+    valid = (codes >= 0) & (entry < n_days)
+    sign = trade_direction(trades['txn_type'])
+    bench = tickers.index(BENCHMARK) if BENCHMARK in tickers else None
+
+    safe_codes = np.where(valid, codes, 0)
+    safe_entry = np.where(valid, entry, 0)
+    entry_px = np.where(valid, closes[safe_entry, safe_codes], np.nan)
+    for h in HORIZONS:
+        exit_row = safe_entry + h
+        open_ = valid & (exit_row < n_days)
+        exit_row = np.where(open_, exit_row, 0)
+        ret = np.where(open_, closes[exit_row, safe_codes] / entry_px - 1, np.nan)
+        if bench is not None:
+            bench_ret = np.where(open_, closes[exit_row, bench] / closes[safe_entry, bench] - 1, np.nan)
+        else:
+            bench_ret = np.full(len(trades), np.nan)
+        out[f'ret_{h}'] = sign * ret
+        out[f'excess_{h}'] = sign * (ret - bench_ret)
+    return out
+
+
+class CongressBacktest:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store = None
+        self.results = pd.DataFrame()
+        self.updated_at = 0.0
+        self._leaderboards = {}
+
+    def pending_rows(self, frame):
+        """Store rows never backtested, plus rows whose longest horizon has not closed yet."""
+        done = self.results.index if len(self.results) else pd.Index([])
+        new = frame.index.difference(done)
+        if len(self.results):
+            open_ = self.results.index[self.results[f'ret_{max(HORIZONS)}'].isna()]
+            # Trades too old to still be open are unpriceable, not pending
+            recent = frame.loc[open_, 'filed_at_date'] >= pd.Timestamp.now() - pd.Timedelta(days=max(HORIZONS) * 2)
+            new = new.union(open_[recent.to_numpy()])
+        return new
+
+    def update(self, store, refresh=True):
+        """Backtest new and still-open trades from store. Returns the number of rows computed."""
+        if store is not self._store:
+            # Results are keyed by store row, so a different store starts over
+            with self._lock:
+                self._store, self.results, self._leaderboards = store, pd.DataFrame(), {}
+        frame = store.frame
+        rows = self.pending_rows(frame)
+        if not len(rows):
+            return 0
+        trades = frame.loc[rows, ['filed_at_date', 'reporter', 'party', 'ticker', 'txn_type']]
+        trades = trades.astype({'party': str, 'txn_type': str})
+        trades = trades[trades['ticker'] != '']
+        tickers = sorted(set(trades['ticker']) | {BENCHMARK})
+        calendar, priced, closes = price_matrix(tickers, refresh=refresh)
+        computed = pd.concat([trades, forward_returns(trades, calendar, priced, closes)], axis=1)
+        computed['party'] = computed['party'].replace('', 'Unknown')
+
+        with self._lock:
+            kept = self.results.drop(index=computed.index, errors='ignore') if len(self.results) else None
+            self.results = pd.concat([kept, computed]) if kept is not None else computed
+            self.updated_at = time.time()
+            self._leaderboards = {}
+        return len(computed)
+
+    def leaderboard(self, horizon=20, by='member', min_trades=3, top=25):
+        """Groups ranked by mean excess return at horizon, with trade count and hit rate."""
+        if horizon not in HORIZONS:
+            raise ValueError(f"Horizon must be one of {HORIZONS}")
+        if by not in LEADERBOARD_GROUPS:
+            raise ValueError(f"Unknown leaderboard grouping: {by}")
+        key = (horizon, by, min_trades, top)
+        with self._lock:
+            if key in self._leaderboards:
+                return self._leaderboards[key]
+            results = self.results
+        if not len(results):
+            return []
+
+        column = f'excess_{horizon}'
+        scored = results.dropna(subset=[column])
+        grouped = scored.assign(hit=scored[column] > 0).groupby(LEADERBOARD_GROUPS[by], observed=True)
+        board = pd.DataFrame({
+            'trades': grouped[column].size(),
+            'avg_excess': grouped[column].mean(),
+            'avg_return': grouped[f'ret_{horizon}'].mean(),
+            'hit_rate': grouped['hit'].mean(),
+        })
+        board = board[board['trades'] >= min_trades].sort_values('avg_excess', ascending=False).head(top)
+        leaderboard = [
+            {by: str(name), 'trades': int(row.trades), 'avg_excess': float(row.avg_excess),
+             'avg_return': float(row.avg_return), 'hit_rate': float(row.hit_rate)}
+            for name, row in board.iterrows()
+        ]
+        with self._lock:
+            self._leaderboards[key] = leaderboard
+        return leaderboard
+
+
+# Module-level backtest shared by all requests
+congress_backtest = CongressBacktest()
+_backtest_thread = None
+_backtest_lock = threading.Lock()
+# Set when new filings are stored, so the loop runs before its next scheduled refresh
+_new_filings = threading.Event()
+
+
+def notify_new_filings(new_rows=None):
+    _new_filings.set()
+
+
+def _backtest_loop(get_store):
+    while True:
+        _new_filings.clear()
+        try:
+            store = get_store()
+            if notify_new_filings not in store.listeners:
+                store.listeners.append(notify_new_filings)
+            congress_backtest.update(store)
+        except Exception as e:
+            logger.error(f"Congress backtest update failed: {e}")
+        _new_filings.wait(REFRESH_INTERVAL)
+
+
+def start_backtest_thread(get_store):
+    """Keep the backtest current in the background; get_store returns the trades store to use."""
+    global _backtest_thread
+    with _backtest_lock:
+        if _backtest_thread is None or not _backtest_thread.is_alive():
+            _backtest_thread = threading.Thread(target=_backtest_loop, args=(get_store,), daemon=True)
+            _backtest_thread.start()
@@ -0,0 +1,184 @@
+"""
+Local congress trades store
+
+Trades are kept in one persisted column-oriented DataFrame (categorical columns for
+the low-cardinality fields). After each ingest a stable argsort is computed for
+every sortable column, so a query is a vectorized filter mask applied along a
+precomputed order followed by a slice - the frame is never re-sorted per request.
+"""
+
+import os
+import re
+import threading
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from common import get_api_data, DATA_DIR, CONGRESS_TRADES_API_URL
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONGRESS_STORE_PATH = os.path.join(DATA_DIR, 'congress_trades.pkl')
+REFRESH_INTERVAL = int(os.environ.get('CONGRESS_REFRESH_SECONDS', 300))
+
+COLUMNS = ['filed_at_date', 'transaction_date', 'member_type', 'reporter', 'party', 'ticker',
+           'txn_type', 'amounts', 'issuer', 'notes']
+DATE_COLUMNS = ['filed_at_date', 'transaction_date']
+CATEGORY_COLUMNS = ['member_type', 'party', 'txn_type', 'issuer', 'amounts']
+# Sort keys per column; amounts sort by the low end of the disclosed range
+SORT_KEYS = {
+    'filed_at_date': 'filed_at_date',
+    'transaction_date': 'transaction_date',
+    'member_type': 'member_type',
+    'reporter': 'reporter',
+    'ticker': 'ticker',
+    'txn_type': 'txn_type',
+    'amounts': 'amount_low',
+}
+MAX_QUERY_LIMIT = 500
+
+
+def amount_low(amounts):
+    """Low end of a disclosed range like '$15,001 - $50,000', as a number."""
+    match = re.search(r'\$?([\d,]+)', str(amounts or ''))
+    return float(match.group(1).replace(',', '')) if match else np.nan
+
+
+def parse_congress_rows(rows):
+    rows = [r for r in rows or [] if isinstance(r, dict) and r.get('filed_at_date')]
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    for col in DATE_COLUMNS:
+        frame[col] = pd.to_datetime(frame[col], errors='coerce').dt.normalize()
+    for col in ('reporter', 'party', 'notes', 'issuer', 'amounts', 'member_type', 'txn_type'):
+        frame[col] = frame[col].fillna('').astype(str)
+    frame['ticker'] = frame['ticker'].fillna('').astype(str).str.upper()
+    frame['amount_low'] = frame['amounts'].map(amount_low)
+    return frame.dropna(subset=['filed_at_date'])
+
+
+class CongressStore:
+    """Trade store persisted at path; path=None keeps it in memory only."""
+
+    def __init__(self, path=CONGRESS_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.listeners = []
+        self.frame = self._load()
+        self.refreshed_at = 0.0
+        self._index()
+
+    def _load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                frame = pd.read_pickle(self.path)
+                # Stores written before a column was added get it empty
+                for col in COLUMNS:
+                    if col not in frame:
+                        frame[col] = ''
+                return frame
+            except Exception as e:
+                logger.error(f"Could not read congress trades store: {e}")
+        return parse_congress_rows([])
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        self.frame.to_pickle(tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _index(self):
+        frame = self.frame
+        for col in CATEGORY_COLUMNS:
+            frame[col] = frame[col].astype('category')
+        self.sort_orders = {}
+        for name, key in SORT_KEYS.items():
+            values = frame[key].astype(str) if key in CATEGORY_COLUMNS else frame[key]
+            self.sort_orders[name] = np.argsort(values.to_numpy(), kind='stable')
+        self.search_text = (frame['ticker'] + ' ' + frame['reporter']).str.lower()
+
+    @property
+    def last_filed_date(self):
+        return self.frame['filed_at_date'].max() if len(self.frame) else None
+
+    def ingest(self, rows):
+        """Add trades filed on or after the last stored filing date. Returns the new rows."""
+        frame = parse_congress_rows(rows)
+        with self._lock:
+            last = self.last_filed_date
+            if last is not None:
+                frame = frame[frame['filed_at_date'] >= last]
+            if frame.empty:
+                return frame
+            existing = len(self.frame)
+            merged = pd.concat([self.frame.astype({c: str for c in CATEGORY_COLUMNS}), frame], ignore_index=True)
+            merged = merged.drop_duplicates(subset=COLUMNS, keep='first').reset_index(drop=True)
+            new_rows = merged.iloc[existing:]
+            if new_rows.empty:
+                return new_rows
+            self.frame = merged
+            self._index()
+            try:
+                self._save()
+            except OSError as e:
+                logger.error(f"Could not persist congress trades store: {e}")
+        for listener in self.listeners:
+            listener(new_rows)
+        return new_rows
+
+    def refresh(self, force=False):
+        if not force and time.time() - self.refreshed_at < REFRESH_INTERVAL:
+            return 0
+        self.refreshed_at = time.time()
+        response = get_api_data(CONGRESS_TRADES_API_URL)
+        if not response or isinstance(response, dict) and 'error' in response:
+            logger.error(f"Congress trades fetch failed: {response.get('error') if response else 'empty response'}")
+            return 0
+        if not (isinstance(response, dict) and isinstance(response.get('data'), list)):
+            logger.error(f"Invalid response from congress trades API: {response}")
+            return 0
+        return len(self.ingest(response['data']))
+
+    def query(self, sort='filed_at_date', direction='desc', offset=0, limit=100, member_type=None,
+              txn_type=None, search=None, days=None, ticker=None):
+        """Filter, sort and slice the trades. Returns (rows, total matches)."""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort column: {sort}")
+        limit = min(max(int(limit), 1), MAX_QUERY_LIMIT)
+        offset = max(int(offset), 0)
+        with self._lock:
+            frame = self.frame
+            mask = np.ones(len(frame), dtype=bool)
+            if member_type:
+                mask &= (frame['member_type'] == member_type).to_numpy()
+            if txn_type:
+                mask &= (frame['txn_type'] == txn_type).to_numpy()
+            if ticker:
+                mask &= (frame['ticker'] == ticker.upper()).to_numpy()
+            if days:
+                cutoff = pd.Timestamp.now().normalize() - pd.Timedelta(days=int(days))
+                mask &= (frame['filed_at_date'] >= cutoff).to_numpy()
+            if search:
+                mask &= self.search_text.str.contains(search.lower(), regex=False).to_numpy()
+            order = self.sort_orders[sort]
+            if direction == 'desc':
+                order = order[::-1]
+            matches = order[mask[order]]
+            page = frame.iloc[matches[offset:offset + limit]]
+        return records(page), int(len(matches))
+
+
+def records(frame):
+    """JSON-ready dicts for store rows, dates as YYYY-MM-DD."""
+    out = frame[COLUMNS].astype({c: object for c in CATEGORY_COLUMNS})
+    for col in DATE_COLUMNS:
+        out[col] = frame[col].dt.strftime('%Y-%m-%d')
+    return out.where(out.notna(), None).to_dict('records')
+
+
+# Module-level store shared by all requests
+congress_store = CongressStore()
@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template_string, request, jsonify
-from common import get_api_data, MENU_BAR, CONGRESS_TRADES_API_URL, MOCK_TICKERS
+from common import MENU_BAR, MOCK_TICKERS
+from congress_store import congress_store, CongressStore
+from congress_analytics import get_analytics, WINDOWS
+from congress_backtest import congress_backtest, start_backtest_thread, HORIZONS
 import logging
 from datetime import datetime, timedelta
 import random
@@ -34,6 +37,7 @@ def generate_mock_congress_trades():
             'member_type': random.choice(member_types),
             'notes': f'Transaction details for {ticker}',
             'reporter': f'Congress Member {i+1}',
+            'party': random.choice(['Democrat', 'Republican']),
             'ticker': ticker,
             'transaction_date': (date - timedelta(days=random.randint(1, 7))).strftime('%Y-%m-%d'),
             'txn_type': random.choice(txn_types)
@@ -41,55 +45,29 @@ def generate_mock_congress_trades():
     
     return trades
 
-def get_congress_trades():
+# In-memory store of mock trades, used while the real store is empty
+_mock_store = None
+
+def get_congress_store():
+    """The trades store to serve from, refreshed from the API at most every REFRESH_INTERVAL."""
+    global _mock_store
     try:
-        response = get_api_data(CONGRESS_TRADES_API_URL)
-        
-        if not response or isinstance(response, dict) and 'error' in response:
-            logger.info("Using mock data for congress trades")
-            return generate_mock_congress_trades()
-            
-        if isinstance(response, dict) and 'data' in response:
-            return response['data']
-            
-        logger.error(f"Invalid response from congress trades API: {response}")
-        return generate_mock_congress_trades()
-        
+        congress_store.refresh()
     except Exception as e:
         logger.error(f"Error fetching congress trades data: {str(e)}")
-        return generate_mock_congress_trades()
-
-def calculate_analytics(trades_data):
-    total_buys = sum(1 for trade in trades_data if trade['txn_type'] == 'Buy')
-    total_sells = sum(1 for trade in trades_data if trade['txn_type'] == 'Sell')
-    
-    # Calculate trade distribution by member type
-    house_trades = sum(1 for trade in trades_data if trade['member_type'] == 'house')
-    senate_trades = sum(1 for trade in trades_data if trade['member_type'] == 'senate')
-    
-    # Get most traded tickers
-    ticker_counts = {}
-    for trade in trades_data:
-        ticker_counts[trade['ticker']] = ticker_counts.get(trade['ticker'], 0) + 1
-    most_traded = sorted(ticker_counts.items(), key=lambda x: x[1], reverse=True)[:5]
     
-    return {
-        'total_trades': len(trades_data),
-        'total_buys': total_buys,
-        'total_sells': total_sells,
-        'house_trades': house_trades,
-        'senate_trades': senate_trades,
-        'most_traded': most_traded
-    }
+    if len(congress_store.frame):
+        return congress_store
+    logger.info("Using mock data for congress trades")
+    if _mock_store is None:
+        _mock_store = CongressStore(path=None)
+        _mock_store.ingest(generate_mock_congress_trades())
+    return _mock_store
 
 @congress_trades_bp.route('/congress-trades')
 def congress_trades():
-    trades_data = get_congress_trades()
-    
-    if not trades_data:
-        trades_data = generate_mock_congress_trades()
-    
-    analytics = calculate_analytics(trades_data)
+    analytics = get_analytics(get_congress_store()).snapshot()
+    start_backtest_thread(get_congress_store)
     
     # Prepare data for charts in JSON format to avoid Jinja2 syntax issues
     chart_data = {
@@ -153,6 +131,55 @@ def congress_trades():
                 </div>
             </div>
 
+            <!-- Rolling activity -->
+            <div class="rollups-row">
+                {% for days in windows %}
+                <div class="chart-card">
+                    <h3>Last {{ days }} Days</h3>
+                    <table class="rollup-table">
+                        <thead><tr><th>Member</th><th>Trades</th></tr></thead>
+                        <tbody>
+                            {% for member, count in analytics.rollups[days].members %}
+                            <tr><td>{{ member }}</td><td>{{ count }}</td></tr>
+                            {% else %}
+                            <tr><td colspan="2">No trades</td></tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                    <table class="rollup-table">
+                        <thead><tr><th>Ticker</th><th>Trades</th></tr></thead>
+                        <tbody>
+                            {% for ticker, count in analytics.rollups[days].tickers %}
+                            <tr><td class="ticker-cell">{{ ticker }}</td><td>{{ count }}</td></tr>
+                            {% else %}
+                            <tr><td colspan="2">No trades</td></tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+                {% endfor %}
+            </div>
+
+            <!-- Backtest leaderboard -->
+            <div class="chart-card leaderboard-card">
+                <h3>Performance After Disclosure</h3>
+                <div class="filters">
+                    <select id="leaderboardBy" onchange="loadLeaderboard()">
+                        <option value="member">By Member</option>
+                        <option value="party">By Party</option>
+                    </select>
+                    <select id="leaderboardHorizon" onchange="loadLeaderboard()">
+                        {% for h in horizons %}
+                        <option value="{{ h }}" {{ 'selected' if h == 20 else '' }}>{{ h }} Trading Days</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <table class="rollup-table">
+                    <thead><tr><th>Name</th><th>Trades</th><th>Avg Excess vs SPY</th><th>Hit Rate</th></tr></thead>
+                    <tbody id="leaderboardBody"><tr><td colspan="4">Loading...</td></tr></tbody>
+                </table>
+            </div>
+
             <!-- Filters and Search -->
             <div class="controls-section">
                 <div class="search-box">
@@ -179,11 +206,11 @@ def congress_trades():
             </div>
             
             <!-- Data Table -->
-            <div class="table-container">
+            <div class="table-container" id="tableViewport">
                 <table>
                     <thead>
                         <tr>
-                            <th onclick="sortTable('filed_at_date')">Date Filed <i class="fas fa-sort"></i></th>
+                            <th onclick="sortTable('filed_at_date')">Date Filed <i class="fas fa-sort-down"></i></th>
                             <th onclick="sortTable('transaction_date')">Transaction Date <i class="fas fa-sort"></i></th>
                             <th onclick="sortTable('member_type')">Member Type <i class="fas fa-sort"></i></th>
                             <th onclick="sortTable('reporter')">Reporter <i class="fas fa-sort"></i></th>
@@ -193,28 +220,10 @@ def congress_trades():
                             <th>Notes</th>
                         </tr>
                     </thead>
-                    <tbody id="tradesTableBody">
-                        {% for item in trades_data %}
-                        <tr class="trade-row" 
-                            data-member-type="{{ item['member_type'] }}"
-                            data-txn-type="{{ item['txn_type'] }}"
-                            data-date="{{ item['filed_at_date'] }}">
-                            <td>{{ item['filed_at_date'] }}</td>
-                            <td>{{ item['transaction_date'] }}</td>
-                            <td>{{ item['member_type'].title() }}</td>
-                            <td>{{ item['reporter'] }}</td>
-                            <td class="ticker-cell">{{ item['ticker'] }}</td>
-                            <td class="{{ 'positive' if item['txn_type'] == 'Buy' else 'negative' }}">
-                                <i class="fas fa-{{ 'arrow-up' if item['txn_type'] == 'Buy' else 'arrow-down' }}"></i>
-                                {{ item['txn_type'] }}
-                            </td>
-                            <td>{{ item['amounts'] }}</td>
-                            <td class="notes">{{ item['notes'] }}</td>
-                        </tr>
-                        {% endfor %}
-                    </tbody>
+                    <tbody id="tradesTableBody"></tbody>
                 </table>
             </div>
+            <div class="table-status" id="tableStatus"></div>
         </div>
     </div>
     
@@ -394,9 +403,52 @@ def congress_trades():
         }
 
         td {
-            padding: 15px;
+            padding: 0 15px;
+            height: 52px;
             border-bottom: 1px solid var(--border);
             color: var(--text);
+            white-space: nowrap;
+        }
+
+        .rollups-row {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
+            gap: 20px;
+            margin-bottom: 30px;
+        }
+
+        .rollup-table {
+            margin-bottom: 15px;
+        }
+
+        .leaderboard-card {
+            margin-bottom: 30px;
+        }
+
+        .rollup-table th {
+            position: static;
+            cursor: default;
+        }
+
+        .rollup-table td {
+            height: auto;
+            padding: 8px 15px;
+        }
+
+        #tableViewport {
+            height: 600px;
+            overflow-y: auto;
+        }
+
+        .spacer td {
+            padding: 0;
+            border: none;
+        }
+
+        .table-status {
+            margin-top: 10px;
+            font-size: 0.9rem;
+            opacity: 0.8;
         }
 
         .ticker-cell {
@@ -617,92 +669,146 @@ def congress_trades():
             }
         }
 
-        let currentSort = { column: null, direction: 'asc' };
+        // Rows are fetched from /congress-trades/query in blocks and only the
+        // rows inside the scroll viewport (plus a margin) are in the DOM.
+        const ROW_HEIGHT = 52;
+        const BLOCK_SIZE = 100;
+        const OVERSCAN = 10;
+        let currentSort = { column: 'filed_at_date', direction: 'desc' };
+        let totalRows = 0;
+        let blocks = {};
+        let generation = 0;
+
+        function escapeHtml(value) {
+            return String(value === null || value === undefined ? '' : value)
+                .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+        }
 
-        function filterTrades() {
-            const searchText = document.getElementById('searchInput').value.toLowerCase();
+        function queryParams() {
+            const params = new URLSearchParams({ sort: currentSort.column, dir: currentSort.direction });
+            const search = document.getElementById('searchInput').value.trim();
             const memberType = document.getElementById('memberType').value;
             const transactionType = document.getElementById('transactionType').value;
             const dateRange = document.getElementById('dateRange').value;
-            const rows = document.querySelectorAll('.trade-row');
-            
-            const today = new Date();
-            const cutoffDate = new Date();
-            cutoffDate.setDate(today.getDate() - (dateRange === 'all' ? 365 : parseInt(dateRange)));
-            
-            rows.forEach(row => {
-                const rowMemberType = row.getAttribute('data-member-type');
-                const rowTxnType = row.getAttribute('data-txn-type');
-                const rowDate = new Date(row.getAttribute('data-date'));
-                const rowText = row.textContent.toLowerCase();
-                
-                const matchesSearch = searchText === '' || rowText.includes(searchText);
-                const matchesMemberType = memberType === 'all' || memberType === rowMemberType;
-                const matchesTxnType = transactionType === 'all' || transactionType === rowTxnType;
-                const matchesDate = dateRange === 'all' || rowDate >= cutoffDate;
-                
-                row.style.display = (matchesSearch && matchesMemberType && matchesTxnType && matchesDate) ? '' : 'none';
+            if (search) params.set('q', search);
+            if (memberType !== 'all') params.set('member_type', memberType);
+            if (transactionType !== 'all') params.set('txn_type', transactionType);
+            if (dateRange !== 'all') params.set('days', dateRange);
+            return params;
+        }
+
+        function fetchBlock(index) {
+            if (!blocks[index]) {
+                const params = queryParams();
+                params.set('offset', index * BLOCK_SIZE);
+                params.set('limit', BLOCK_SIZE);
+                blocks[index] = fetch('/congress-trades/query?' + params.toString()).then(r => r.json());
+            }
+            return blocks[index];
+        }
+
+        function rowHtml(item) {
+            const buy = item.txn_type === 'Buy';
+            const memberType = item.member_type ? item.member_type.charAt(0).toUpperCase() + item.member_type.slice(1) : '';
+            return `<tr class="trade-row">
+                <td>${escapeHtml(item.filed_at_date)}</td>
+                <td>${escapeHtml(item.transaction_date)}</td>
+                <td>${escapeHtml(memberType)}</td>
+                <td>${escapeHtml(item.reporter)}</td>
+                <td class="ticker-cell">${escapeHtml(item.ticker)}</td>
+                <td class="${buy ? 'positive' : 'negative'}"><i class="fas fa-${buy ? 'arrow-up' : 'arrow-down'}"></i> ${escapeHtml(item.txn_type)}</td>
+                <td>${escapeHtml(item.amounts)}</td>
+                <td class="notes">${escapeHtml(item.notes)}</td>
+            </tr>`;
+        }
+
+        async function renderVisible() {
+            const viewport = document.getElementById('tableViewport');
+            const current = generation;
+            const first = Math.max(Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN, 0);
+            const last = Math.min(first + Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN, totalRows);
+            const needed = [];
+            for (let b = Math.floor(first / BLOCK_SIZE); b * BLOCK_SIZE < last; b++) needed.push(b);
+            const loaded = await Promise.all(needed.map(fetchBlock));
+            if (current !== generation) return;
+
+            const rows = [];
+            loaded.forEach((block, i) => {
+                const start = needed[i] * BLOCK_SIZE;
+                (block.data || []).forEach((item, j) => {
+                    if (start + j >= first && start + j < last) rows.push(rowHtml(item));
+                });
             });
+            document.getElementById('tradesTableBody').innerHTML =
+                `<tr class="spacer" style="height: ${first * ROW_HEIGHT}px"><td colspan="8"></td></tr>` +
+                rows.join('') +
+                `<tr class="spacer" style="height: ${Math.max(totalRows - last, 0) * ROW_HEIGHT}px"><td colspan="8"></td></tr>`;
+        }
+
+        async function filterTrades() {
+            const current = ++generation;
+            blocks = {};
+            const firstBlock = await fetchBlock(0);
+            if (current !== generation) return;
+            if (firstBlock.error) {
+                document.getElementById('tableStatus').textContent = firstBlock.error;
+                return;
+            }
+            totalRows = firstBlock.total;
+            document.getElementById('tableStatus').textContent = `${totalRows.toLocaleString()} trades`;
+            document.getElementById('tableViewport').scrollTop = 0;
+            renderVisible();
         }
 
         function sortTable(column) {
-            const tbody = document.getElementById('tradesTableBody');
-            const rows = Array.from(tbody.getElementsByTagName('tr'));
-            
-            // Update sort direction
             if (currentSort.column === column) {
                 currentSort.direction = currentSort.direction === 'asc' ? 'desc' : 'asc';
             } else {
                 currentSort.column = column;
                 currentSort.direction = 'asc';
             }
-            
-            // Sort rows
-            rows.sort((a, b) => {
-                const aValue = a.children[getColumnIndex(column)].textContent;
-                const bValue = b.children[getColumnIndex(column)].textContent;
-                
-                if (column === 'filed_at_date' || column === 'transaction_date') {
-                    return compareDates(aValue, bValue);
-                }
-                
-                return aValue.localeCompare(bValue);
-            });
-            
-            if (currentSort.direction === 'desc') {
-                rows.reverse();
-            }
-            
-            // Reorder rows in the table
-            rows.forEach(row => tbody.appendChild(row));
-            
-            // Update sort icons
             updateSortIcons(column);
+            filterTrades();
+        }
+
+        async function loadLeaderboard() {
+            const by = document.getElementById('leaderboardBy').value;
+            const horizon = document.getElementById('leaderboardHorizon').value;
+            const response = await fetch(`/congress-trades/leaderboard?by=${by}&horizon=${horizon}`);
+            const result = await response.json();
+            const body = document.getElementById('leaderboardBody');
+            if (result.error || !result.data.length) {
+                body.innerHTML = `<tr><td colspan="4">${escapeHtml(result.error || (result.updated_at ? 'Not enough scored trades yet' : 'Backtest is running...'))}</td></tr>`;
+                return;
+            }
+            body.innerHTML = result.data.map(row => `<tr>
+                <td>${escapeHtml(row[by])}</td>
+                <td>${row.trades}</td>
+                <td class="${row.avg_excess >= 0 ? 'positive' : 'negative'}">${(row.avg_excess * 100).toFixed(2)}%</td>
+                <td>${(row.hit_rate * 100).toFixed(0)}%</td>
+            </tr>`).join('');
         }
 
-        function getColumnIndex(column) {
-            const columns = {
-                'filed_at_date': 0,
-                'transaction_date': 1,
-                'member_type': 2,
-                'reporter': 3,
-                'ticker': 4,
-                'txn_type': 5,
-                'amounts': 6
-            };
-            return columns[column];
-        }
-
-        function compareDates(a, b) {
-            return new Date(a) - new Date(b);
-        }
+        let scrollPending = false;
+        document.addEventListener('DOMContentLoaded', function() {
+            document.getElementById('tableViewport').addEventListener('scroll', function() {
+                if (scrollPending) return;
+                scrollPending = true;
+                requestAnimationFrame(function() {
+                    scrollPending = false;
+                    renderVisible();
+                });
+            });
+            filterTrades();
+            loadLeaderboard();
+        });
 
         function updateSortIcons(activeColumn) {
             const headers = document.querySelectorAll('th');
             headers.forEach(header => {
                 const icon = header.querySelector('i');
                 if (icon) {
-                    if (header.textContent.toLowerCase().includes(activeColumn)) {
+                    if ((header.getAttribute('onclick') || '').includes(`'${activeColumn}'`)) {
                         icon.className = `fas fa-sort-${currentSort.direction === 'asc' ? 'up' : 'down'}`;
                     } else {
                         icon.className = 'fas fa-sort';
@@ -713,4 +819,41 @@ def congress_trades():
     </script>
     """
     
-    return render_template_string(html, trades_data=trades_data, analytics=analytics, chart_data=chart_data) 
\ No newline at end of file
+    return render_template_string(html, analytics=analytics, chart_data=chart_data, windows=WINDOWS, horizons=HORIZONS)
+
+
+@congress_trades_bp.route('/congress-trades/query')
+def congress_trades_query():
+    """Filtered, sorted slice of the trades store for the virtual-scrolling table."""
+    args = request.args
+    try:
+        rows, total = get_congress_store().query(
+            sort=args.get('sort', 'filed_at_date'),
+            direction=args.get('dir', 'desc'),
+            offset=args.get('offset', 0, type=int),
+            limit=args.get('limit', 100, type=int),
+            member_type=args.get('member_type'),
+            txn_type=args.get('txn_type'),
+            search=args.get('q'),
+            days=args.get('days', type=int),
+            ticker=args.get('ticker'),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"data": rows, "total": total, "offset": args.get('offset', 0, type=int)})
+
+
+@congress_trades_bp.route('/congress-trades/leaderboard')
+def congress_trades_leaderboard():
+    """Members or parties ranked by average excess return over SPY after their disclosed trades."""
+    start_backtest_thread(get_congress_store)
+    try:
+        data = congress_backtest.leaderboard(
+            horizon=request.args.get('horizon', 20, type=int),
+            by=request.args.get('by', 'member'),
+            min_trades=request.args.get('min_trades', 3, type=int),
+            top=min(request.args.get('top', 25, type=int), 200),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"data": data, "updated_at": congress_backtest.updated_at or None})
@@ -0,0 +1,90 @@
+"""
+Per-ETF data bundle
+
+Every ETF research route needs some mix of the info, holdings, exposure and
+in/outflow endpoints. A bundle loads all four concurrently the first time an ETF is
+requested and keeps each component for its own TTL, so switching between the ETF
+tabs is served from memory. Background jobs that need a single component load just
+that one. Error responses are never cached.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+from common import (get_api_data_concurrent, ETF_INFO_API_URL, ETF_HOLDINGS_API_URL,
+                    ETF_EXPOSURE_API_URL, ETF_INOUTFLOW_API_URL)
+
+COMPONENT_URLS = OrderedDict([
+    ('info', ETF_INFO_API_URL),
+    ('holdings', ETF_HOLDINGS_API_URL),
+    ('exposure', ETF_EXPOSURE_API_URL),
+    ('in_outflow', ETF_INOUTFLOW_API_URL),
+])
+
+# Seconds each component stays fresh
+COMPONENT_TTLS = {
+    'info': 24 * 60 * 60,
+    'holdings': 6 * 60 * 60,
+    'exposure': 6 * 60 * 60,
+    'in_outflow': 15 * 60,
+}
+
+MAX_BUNDLES = 256
+
+
+class ETFBundle:
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def stale_components(self, now=None, components=None):
+        now = now if now is not None else time.time()
+        return [name for name in components or COMPONENT_URLS
+                if name not in self._components
+                or now - self._components[name][1] > COMPONENT_TTLS[name]]
+
+    def load(self, components=None):
+        """Fetch every missing or expired component (or just those in components) in one concurrent batch."""
+        with self._lock:
+            stale = self.stale_components(components=components)
+            if not stale:
+                return self
+            responses = get_api_data_concurrent(
+                [COMPONENT_URLS[name].format(ticker=self.ticker) for name in stale])
+            now = time.time()
+            for name, response in zip(stale, responses):
+                if "error" in response:
+                    # Keep serving a previous good response if there is one
+                    if name not in self._components:
+                        self._components[name] = (response, 0)
+                else:
+                    self._components[name] = (response, now)
+        return self
+
+    def response(self, name):
+        """Raw API response for a component, in get_api_data's {"data": ...} / {"error": ...} shape."""
+        return self._components.get(name, ({"error": f"{name} not loaded"}, 0))[0]
+
+
+_bundles = OrderedDict()
+_bundles_lock = threading.Lock()
+
+
+def get_etf_bundle(ticker, components=None):
+    """Return the shared bundle for ticker with every component loaded, or only the named components."""
+    ticker = ticker.upper()
+    with _bundles_lock:
+        bundle = _bundles.get(ticker)
+        if bundle is None:
+            bundle = _bundles[ticker] = ETFBundle(ticker)
+        _bundles.move_to_end(ticker)
+        while len(_bundles) > MAX_BUNDLES:
+            _bundles.popitem(last=False)
+    return bundle.load(components)
+
+
+def invalidate_etf_bundle(ticker):
+    with _bundles_lock:
+        _bundles.pop(ticker.upper(), None)
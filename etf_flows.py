@@ -0,0 +1,217 @@
+"""
+ETF in/outflow history
+
+Daily flows from the in-outflow endpoint are appended to a persisted long-format
+history (etf, date, inflow, outflow, net_flow). After each ingest the history is
+pivoted into one date x ETF net-flow matrix and the analytics for the whole
+universe - rolling 1/5/20 day sums, 20 day z-scores and current streaks - are
+recomputed with vectorized pandas/numpy into a FlowAnalytics snapshot, which the
+leaders endpoint reads as a whole. A z-score compares the latest day with the
+ZSCORE_WINDOW days before it, so today's flow is not part of its own baseline.
+
+A background thread refreshes the tracked ETFs from the in-outflow component of
+the shared ETF bundles; the leaders endpoint never fetches on the request thread.
+"""
+
+import os
+import time
+import threading
+import logging
+
+import numpy as np
+import pandas as pd
+
+from common import DATA_DIR
+from etf_bundle import get_etf_bundle, COMPONENT_TTLS
+from etf_lookthrough import DEFAULT_ETFS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ETF_FLOWS_PATH = os.path.join(DATA_DIR, 'etf_flows.pkl')
+WINDOWS = {'1d': 1, '5d': 5, '20d': 20}
+ZSCORE_WINDOW = 20
+REFRESH_INTERVAL = int(os.environ.get('ETF_FLOWS_REFRESH_SECONDS', COMPONENT_TTLS['in_outflow']))
+COLUMNS = ['etf', 'date', 'inflow', 'outflow', 'net_flow']
+DTYPES = {'etf': object, 'date': 'datetime64[ns]', 'inflow': np.float64, 'outflow': np.float64,
+          'net_flow': np.float64}
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def parse_flow_rows(etf, rows):
+    """Turn an in-outflow API response list into history rows for one ETF."""
+    records = []
+    for item in rows or []:
+        if not isinstance(item, dict) or not item.get('date'):
+            continue
+        inflow, outflow = _number(item.get('inflow')), _number(item.get('outflow'))
+        net_flow = _number(item.get('net_flow'))
+        if np.isnan(net_flow) and not (np.isnan(inflow) and np.isnan(outflow)):
+            net_flow = np.nan_to_num(inflow) - np.nan_to_num(outflow)
+        records.append((etf.upper(), item['date'], inflow, outflow, net_flow))
+    frame = pd.DataFrame(records, columns=COLUMNS)
+    frame['date'] = pd.to_datetime(frame['date'], errors='coerce').dt.normalize()
+    return frame.dropna(subset=['date', 'net_flow']).astype(DTYPES)
+
+
+def current_streaks(net):
+    """Signed length of the run of same-sign flows ending on the last row, per column."""
+    if len(net) == 0:
+        return np.zeros(net.shape[1], dtype=np.int64)
+    signs = np.sign(np.nan_to_num(net))
+    last = signs[-1]
+    # Rows (newest first) where the sign differs from today's; the first one ends the streak
+    differs = (signs[::-1] != last)
+    lengths = np.where(differs.any(axis=0), differs.argmax(axis=0), len(signs))
+    return (lengths * last).astype(np.int64)
+
+
+class FlowAnalytics:
+    """Universe-wide flow analytics computed from one version of the history; never modified afterwards."""
+
+    def __init__(self, history):
+        self.updated_at = time.time()
+        if history.empty:
+            self.etfs = np.array([], dtype=str)
+            self.dates = pd.DatetimeIndex([])
+            self.rolling = {name: np.array([]) for name in WINDOWS}
+            self.zscores = np.array([])
+            self.streaks = np.array([], dtype=np.int64)
+            return
+
+        net = history.pivot_table(index='date', columns='etf', values='net_flow', aggfunc='sum').sort_index().astype(np.float64)
+        self.etfs = net.columns.to_numpy(dtype=str)
+        self.dates = net.index
+        filled = net.fillna(0.0)
+
+        self.rolling = {name: filled.tail(days).sum().to_numpy() for name, days in WINDOWS.items()}
+        prior = filled.iloc[:-1].tail(ZSCORE_WINDOW)
+        mean, std = prior.mean(), prior.std()
+        self.zscores = ((filled.iloc[-1] - mean) / std.replace(0, np.nan)).to_numpy()
+        self.streaks = current_streaks(net.to_numpy())
+
+    def leaders(self, window='5d', top=10):
+        """Top inflow and outflow ETFs by net flow summed over window."""
+        totals = self.rolling.get(window)
+        if totals is None:
+            raise ValueError(f"Unknown window: {window}")
+
+        def row(i):
+            z = self.zscores[i]
+            return {
+                'etf': str(self.etfs[i]),
+                'net_flow': float(totals[i]),
+                'zscore': None if np.isnan(z) else float(z),
+                'streak': int(self.streaks[i]),
+            }
+
+        order = np.argsort(-totals, kind='stable')
+        return {
+            'as_of': self.dates[-1].strftime('%Y-%m-%d') if len(self.dates) else None,
+            'inflows': [row(i) for i in order[:top] if totals[i] > 0],
+            'outflows': [row(i) for i in order[::-1][:top] if totals[i] < 0],
+        }
+
+
+class FlowStore:
+    def __init__(self, path=ETF_FLOWS_PATH, etfs=DEFAULT_ETFS):
+        self.path = path
+        self._lock = threading.Lock()
+        self.history = self._load()
+        self.analytics = FlowAnalytics(self.history)
+        self._tracked = list(etfs)
+        self._fetched = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                return pd.read_pickle(self.path).astype(DTYPES)
+            except Exception as e:
+                logger.error(f"Could not read ETF flow history: {e}")
+        return parse_flow_rows('', [])
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        self.history.to_pickle(tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def ingest(self, etf, rows):
+        """Add the rows for etf dated on or after its last stored date. Returns the number added or revised."""
+        frame = parse_flow_rows(etf, rows)
+        with self._lock:
+            existing = self.history[self.history['etf'] == etf.upper()]
+            if len(existing):
+                frame = frame[frame['date'] >= existing['date'].max()]
+                # The last stored day can be revised, so only rows that differ from what is stored count
+                unchanged = frame.merge(existing, on=COLUMNS, how='left', indicator=True)['_merge'] == 'both'
+                frame = frame[~unchanged.to_numpy()]
+            if frame.empty:
+                return 0
+            # keep='last' replaces the stored rows for revised days
+            self.history = (pd.concat([self.history, frame], ignore_index=True)
+                            .drop_duplicates(subset=['etf', 'date'], keep='last'))
+            # Published as one reference, so leaders never mixes arrays from two ingests
+            self.analytics = FlowAnalytics(self.history)
+            try:
+                self._save()
+            except OSError as e:
+                logger.error(f"Could not persist ETF flow history: {e}")
+        return len(frame)
+
+    def leaders(self, window='5d', top=10):
+        """Top inflow and outflow ETFs by net flow summed over window."""
+        return self.analytics.leaders(window, top)
+
+    def refresh(self, tickers):
+        """Ingest the latest flows for tickers from the shared ETF bundles."""
+        added = 0
+        for ticker in tickers:
+            response = get_etf_bundle(ticker, ['in_outflow']).response('in_outflow')
+            data = response.get("data") if "error" not in response else None
+            if isinstance(data, list):
+                added += self.ingest(ticker, data)
+            self._fetched.add(ticker.upper())
+        return added
+
+    def _refresh_loop(self):
+        # The first pass fetches the tracked ETFs right away; requests for new ETFs wake it early
+        while True:
+            self._wake.clear()
+            try:
+                added = self.refresh(list(self._tracked))
+                if added:
+                    logger.info(f"ETF flows: {added} rows added or revised")
+            except Exception as e:
+                logger.error(f"ETF flow refresh failed: {e}")
+            self._wake.wait(REFRESH_INTERVAL)
+
+    def start_refresh_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+                self._thread.start()
+
+    def ensure(self, tickers):
+        """Track tickers in the background refresh; True once every one of them has been fetched."""
+        tickers = [t.upper() for t in tickers]
+        with self._thread_lock:
+            new = [t for t in tickers if t not in self._tracked]
+            self._tracked.extend(new)
+        self.start_refresh_thread()
+        if new:
+            self._wake.set()
+        return all(t in self._fetched for t in tickers)
+
+
+# Module-level store shared by all requests
+flow_store = FlowStore()
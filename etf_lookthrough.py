@@ -0,0 +1,264 @@
+"""
+ETF holdings look-through and overlap engine
+
+Holdings for many ETFs are kept as one sparse ETF x constituent weight matrix in
+coordinate form (etf code, constituent code, weight), with rows ordered by ETF and a
+second permutation ordering them by constituent, so both directions are slices.
+
+    overlap            sum of min(weight_a, weight_b) over shared constituents
+    look-through       portfolio weights x matrix, i.e. a sparse vector-matrix product
+    reverse lookup     one constituent column, sorted by weight
+
+Each ETF's holdings are fingerprinted and kept as their own aggregated rows. A
+refresh re-parses only the ETFs whose fingerprint changed, then re-indexes the
+stored rows into a new HoldingsMatrix (with its own overlap cache) that replaces
+the old one in a single assignment. The constituent codes and sort permutations
+are derived across all ETFs, so that indexing pass still covers every row.
+
+Holdings are refreshed by a background thread (holdings only, through the shared
+ETF bundles); routes ask for the ETFs they need and get a building status until
+the thread has fetched them.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from etf_bundle import get_etf_bundle
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared with sector_index, so holdings without a sector land in the same bucket everywhere
+UNKNOWN_SECTOR = 'Other'
+# ETFs refreshed for reverse lookups and the overlap matrix
+DEFAULT_ETFS = ['SPY', 'QQQ', 'IWM', 'DIA', 'XLE', 'XLC', 'XLK', 'XLV', 'XLP', 'XLY', 'XLRE', 'XLF', 'XLI', 'XLB', 'XLU']
+REFRESH_INTERVAL = int(os.environ.get('LOOKTHROUGH_REFRESH_SECONDS', 30 * 60))
+COLUMNS = ['etf', 'ticker', 'weight', 'sector']
+
+
+def normalize_holdings(holdings):
+    """Turn an ETF holdings response into [(ticker, weight fraction, sector)].
+
+    Uses the weight field (percent) when present, otherwise each holding's share of
+    the listed market value.
+    """
+    rows = [h for h in holdings or [] if isinstance(h, dict) and h.get('ticker')]
+    if not rows:
+        return []
+
+    def number(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+    if any(h.get('weight') not in (None, '') for h in rows):
+        weights = [number(h.get('weight')) / 100 for h in rows]
+    else:
+        values = [number(h.get('market_value', h.get('value'))) for h in rows]
+        total = sum(values)
+        weights = [v / total if total else 0.0 for v in values]
+    return [(h['ticker'].upper(), w, h.get('sector') or UNKNOWN_SECTOR)
+            for h, w in zip(rows, weights) if w > 0]
+
+
+def holdings_rows(etf, holdings):
+    """One ETF's normalized holdings as rows sorted by ticker, duplicate tickers summed."""
+    frame = pd.DataFrame([(etf, ticker, weight, sector) for ticker, weight, sector in holdings], columns=COLUMNS)
+    return frame.groupby(['etf', 'ticker'], as_index=False, sort=True).agg({'weight': 'sum', 'sector': 'first'})
+
+
+class HoldingsMatrix:
+    """One immutable build of the ETF x constituent matrix; queries read a single build throughout."""
+
+    def __init__(self, rows):
+        etfs = sorted(rows)
+        # Each ETF's rows are already sorted by ticker, so the concatenation is ordered by (etf, ticker)
+        frame = (pd.concat([rows[etf] for etf in etfs], ignore_index=True) if etfs
+                 else pd.DataFrame(columns=COLUMNS))
+
+        self.etfs = np.asarray(etfs, dtype=str)
+        self.constituents, self.const_codes = np.unique(frame['ticker'].to_numpy(dtype=str), return_inverse=True)
+        self.etf_codes = np.searchsorted(self.etfs, frame['etf'].to_numpy(dtype=str))
+        self.weights = frame['weight'].to_numpy(dtype=np.float64)
+
+        sectors = frame.groupby('ticker')['sector'].first().reindex(self.constituents).fillna(UNKNOWN_SECTOR)
+        self.sectors, self.sector_codes = np.unique(sectors.to_numpy(dtype=str), return_inverse=True)
+
+        self.etf_offsets = np.searchsorted(self.etf_codes, np.arange(len(self.etfs) + 1))
+        self.by_const = np.lexsort((-self.weights, self.const_codes))
+        self.const_offsets = np.searchsorted(self.const_codes[self.by_const], np.arange(len(self.constituents) + 1))
+        self.etf_lookup = {etf: i for i, etf in enumerate(self.etfs)}
+        self.const_lookup = {t: i for i, t in enumerate(self.constituents)}
+        self._overlap = None
+        self._overlap_lock = threading.Lock()
+
+    def etf_rows(self, etf):
+        code = self.etf_lookup.get(etf.upper())
+        if code is None:
+            return None
+        return slice(self.etf_offsets[code], self.etf_offsets[code + 1])
+
+    def overlap_matrix(self):
+        """All-pairs weight overlap as an (etfs x etfs) array, computed once per build."""
+        with self._overlap_lock:
+            if self._overlap is None:
+                n = len(self.etfs)
+                result = np.zeros((n, n))
+                if len(self.weights):
+                    long_df = pd.DataFrame({'etf': self.etf_codes, 'const': self.const_codes, 'w': self.weights})
+                    pairs = long_df.merge(long_df, on='const', suffixes=('_a', '_b'))
+                    pairs['w'] = np.minimum(pairs['w_a'], pairs['w_b'])
+                    summed = pairs.groupby(['etf_a', 'etf_b'])['w'].sum()
+                    result[summed.index.get_level_values(0), summed.index.get_level_values(1)] = summed.to_numpy()
+                self._overlap = result
+            return self._overlap
+
+
+class LookThroughEngine:
+    def __init__(self, etfs=DEFAULT_ETFS):
+        self._rows = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self._matrix = HoldingsMatrix(self._rows)
+        self._tracked = list(etfs)
+        self._fetched = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def etfs(self):
+        return self._matrix.etfs
+
+    @staticmethod
+    def fingerprint(holdings):
+        return hashlib.sha1(json.dumps(holdings, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def update(self, etf_holdings):
+        """Replace holdings for the given {etf: normalized holdings}; rebuild only if something changed."""
+        with self._lock:
+            changed = False
+            for etf, holdings in etf_holdings.items():
+                etf = etf.upper()
+                fp = self.fingerprint(holdings)
+                if self._fingerprints.get(etf) != fp:
+                    self._rows[etf] = holdings_rows(etf, holdings)
+                    self._fingerprints[etf] = fp
+                    changed = True
+            if changed:
+                # Built aside and published as one reference, so readers never see a half-built matrix
+                self._matrix = HoldingsMatrix(self._rows)
+            return changed
+
+    def refresh(self, tickers):
+        """Pull holdings for tickers through the shared ETF bundles and update the matrix."""
+        updates = {}
+        for ticker in tickers:
+            response = get_etf_bundle(ticker, ['holdings']).response('holdings')
+            if "error" in response:
+                logger.warning(f"Skipping holdings for {ticker}: {response['error']}")
+                continue
+            data = response.get("data", [])
+            updates[ticker] = normalize_holdings(data if isinstance(data, list) else [])
+        changed = self.update(updates)
+        self._fetched.update(t.upper() for t in tickers)
+        return changed
+
+    def _refresh_loop(self):
+        # The first pass fetches the tracked ETFs right away; requests for new ETFs wake it early
+        while True:
+            self._wake.clear()
+            started = time.perf_counter()
+            try:
+                if self.refresh(list(self._tracked)):
+                    logger.info(f"Look-through matrix rebuilt: {len(self._matrix.etfs)} ETFs "
+                                f"in {time.perf_counter() - started:.1f} s")
+            except Exception as e:
+                logger.error(f"Look-through refresh failed: {e}")
+            self._wake.wait(REFRESH_INTERVAL)
+
+    def start_refresh_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+                self._thread.start()
+
+    def ensure(self, tickers):
+        """Track tickers in the background refresh; True once every one of them has been fetched.
+
+        ETFs whose holdings could not be fetched still count as fetched, so callers
+        get an empty answer for them rather than waiting forever.
+        """
+        tickers = [t.upper() for t in tickers]
+        with self._thread_lock:
+            new = [t for t in tickers if t not in self._tracked]
+            self._tracked.extend(new)
+        self.start_refresh_thread()
+        if new:
+            self._wake.set()
+        return all(t in self._fetched for t in tickers)
+
+    def overlap(self, etf_a, etf_b):
+        """Weight overlap of two ETFs (sum of the smaller weight of each shared name) and the shared names."""
+        m = self._matrix
+        rows_a, rows_b = m.etf_rows(etf_a), m.etf_rows(etf_b)
+        if rows_a is None or rows_b is None:
+            return {'overlap': 0.0, 'shared': []}
+        shared, ia, ib = np.intersect1d(m.const_codes[rows_a], m.const_codes[rows_b],
+                                        assume_unique=True, return_indices=True)
+        wa = m.weights[rows_a][ia]
+        wb = m.weights[rows_b][ib]
+        common_w = np.minimum(wa, wb)
+        order = np.argsort(-common_w)
+        return {
+            'overlap': float(common_w.sum()),
+            'shared': [{'ticker': str(m.constituents[shared[i]]), etf_a.upper(): float(wa[i]),
+                        etf_b.upper(): float(wb[i])} for i in order],
+        }
+
+    def overlap_matrix(self):
+        """(etfs, all-pairs overlap array) from the same build, so the labels match the rows."""
+        m = self._matrix
+        return m.etfs, m.overlap_matrix()
+
+    def look_through(self, portfolio, top=25):
+        """Exposure of a {etf: weight} portfolio to single names and sectors."""
+        m = self._matrix
+        x = np.zeros(len(m.etfs))
+        for etf, weight in portfolio.items():
+            code = m.etf_lookup.get(etf.upper())
+            if code is not None:
+                x[code] += weight
+        exposure = np.bincount(m.const_codes, weights=m.weights * x[m.etf_codes],
+                               minlength=len(m.constituents))
+        sector_exposure = np.bincount(m.sector_codes, weights=exposure, minlength=len(m.sectors))
+
+        names = np.nonzero(exposure)[0]
+        names = names[np.argsort(-exposure[names], kind='stable')][:top]
+        sectors = np.argsort(-sector_exposure, kind='stable')
+        return {
+            'names': [{'ticker': str(m.constituents[i]), 'exposure': float(exposure[i])} for i in names],
+            'sectors': [{'sector': str(m.sectors[i]), 'exposure': float(sector_exposure[i])}
+                        for i in sectors if sector_exposure[i] > 0],
+        }
+
+    def holders(self, ticker, top=25):
+        """ETFs holding ticker, largest weight first."""
+        m = self._matrix
+        code = m.const_lookup.get(ticker.upper())
+        if code is None:
+            return []
+        rows = m.by_const[m.const_offsets[code]:m.const_offsets[code + 1]][:top]
+        return [{'etf': str(m.etfs[m.etf_codes[r]]), 'weight': float(m.weights[r])} for r in rows]
+
+
+# Module-level engine shared by all requests
+lookthrough_engine = LookThroughEngine()
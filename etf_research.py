@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template_string, request, jsonify
-from common import get_api_data, get_live_stock_price, MENU_BAR, ETF_EXPOSURE_API_URL, ETF_HOLDINGS_API_URL, ETF_INOUTFLOW_API_URL, ETF_INFO_API_URL
+from common import get_live_stock_price, MENU_BAR
+from etf_bundle import get_etf_bundle
+from etf_lookthrough import lookthrough_engine, DEFAULT_ETFS
+from etf_flows import flow_store, WINDOWS
 import random
 import logging
 import json
@@ -20,15 +23,17 @@ def etf_research():
 
     if ticker:
         try:
+            bundle = get_etf_bundle(ticker)
+
             # Get ETF info
-            info_response = get_api_data(ETF_INFO_API_URL.format(ticker=ticker))
+            info_response = bundle.response('info')
             if "error" not in info_response:
                 etf_info = info_response.get("data", {})
             else:
                 error = info_response.get("error", "Failed to retrieve ETF information")
 
             # Get holdings data
-            holdings_response = get_api_data(ETF_HOLDINGS_API_URL.format(ticker=ticker))
+            holdings_response = bundle.response('holdings')
             if "error" not in holdings_response:
                 holdings_data = holdings_response.get("data", [])
                 # Ensure holdings_data is a list
@@ -45,7 +50,7 @@ def etf_research():
                         })
 
             # Get exposure data
-            exposure_response = get_api_data(ETF_EXPOSURE_API_URL.format(ticker=ticker))
+            exposure_response = bundle.response('exposure')
             if "error" not in exposure_response:
                 exposure_data = exposure_response.get("data", {})
                 # Ensure exposure_data is a dict
@@ -478,7 +483,7 @@ def etf_exposure():
     error = None
 
     if ticker:
-        response = get_api_data(ETF_EXPOSURE_API_URL.format(ticker=ticker))
+        response = get_etf_bundle(ticker).response('exposure')
         print(f"ETF Exposure API Response for {ticker}: {response}")
         if "error" in response:
             error = response["error"]
@@ -492,7 +497,7 @@ def etf_exposure():
     etf_info = None
     etf_info_error = None
     if ticker:
-        etf_info_response = get_api_data(ETF_INFO_API_URL.format(ticker=ticker))
+        etf_info_response = get_etf_bundle(ticker).response('info')
         print(f"ETF Info API Response for {ticker}: {etf_info_response}")
         if "error" in etf_info_response:
             etf_info_error = etf_info_response["error"]
@@ -582,7 +587,7 @@ def etf_holdings():
     error = None
 
     if ticker:
-        response = get_api_data(ETF_HOLDINGS_API_URL.format(ticker=ticker))
+        response = get_etf_bundle(ticker).response('holdings')
         print(f"ETF Holdings API Response for {ticker}: {response}")
         if "error" in response:
             error = response["error"]
@@ -595,7 +600,7 @@ def etf_holdings():
     etf_info = None
     etf_info_error = None
     if ticker:
-        etf_info_response = get_api_data(ETF_INFO_API_URL.format(ticker=ticker))
+        etf_info_response = get_etf_bundle(ticker).response('info')
         print(f"ETF Info API Response for {ticker}: {etf_info_response}")
         if "error" in etf_info_response:
             etf_info_error = etf_info_response["error"]
@@ -692,7 +697,7 @@ def etf_in_outflow():
     error = None
 
     if ticker:
-        response = get_api_data(ETF_INOUTFLOW_API_URL.format(ticker=ticker))
+        response = get_etf_bundle(ticker).response('in_outflow')
         print(f"ETF In-Out Flow API Response for {ticker}: {response}")
         if "error" in response:
             error = response["error"]
@@ -704,11 +709,12 @@ def etf_in_outflow():
             else:
                 if data:
                     print(f"First data item structure for {ticker}: {data[0]}")
+                    flow_store.ingest(ticker, data)
 
     etf_info = None
     etf_info_error = None
     if ticker:
-        etf_info_response = get_api_data(ETF_INFO_API_URL.format(ticker=ticker))
+        etf_info_response = get_etf_bundle(ticker).response('info')
         print(f"ETF Info API Response for {ticker}: {etf_info_response}")
         if "error" in etf_info_response:
             etf_info_error = etf_info_response["error"]
@@ -793,3 +799,61 @@ def etf_in_outflow():
     </div>
     """
     return render_template_string(html, **context)
+
+def _ticker_list(value):
+    return [t.strip().upper() for t in (value or '').split(',') if t.strip()]
+
+@etf_research_bp.route('/overlap', methods=['GET'])
+def etf_overlap():
+    tickers = _ticker_list(request.args.get('tickers'))
+    etfs = tickers or DEFAULT_ETFS
+    if not lookthrough_engine.ensure(etfs):
+        return jsonify({"status": "building", "data": []}), 202
+    if len(tickers) == 2:
+        return jsonify({"data": lookthrough_engine.overlap(*tickers)})
+
+    built_etfs, matrix = lookthrough_engine.overlap_matrix()
+    index = {etf: i for i, etf in enumerate(built_etfs)}
+    etfs = [etf for etf in etfs if etf in index]
+    return jsonify({
+        "etfs": etfs,
+        "data": [[float(matrix[index[a], index[b]]) for b in etfs] for a in etfs],
+    })
+
+@etf_research_bp.route('/look-through', methods=['GET'])
+def etf_look_through():
+    # portfolio=SPY:0.6,QQQ:0.4
+    portfolio = {}
+    for part in _ticker_list(request.args.get('portfolio')):
+        etf, _, weight = part.partition(':')
+        try:
+            portfolio[etf] = float(weight) if weight else 1.0
+        except ValueError:
+            return jsonify({"error": f"Invalid weight for {etf}: {weight}"}), 400
+    if not portfolio:
+        return jsonify({"error": "Missing required parameter (portfolio), e.g. SPY:0.6,QQQ:0.4"}), 400
+
+    if not lookthrough_engine.ensure(list(portfolio)):
+        return jsonify({"status": "building", "data": []}), 202
+    top = request.args.get('top', 25, type=int)
+    return jsonify({"data": lookthrough_engine.look_through(portfolio, top=top)})
+
+@etf_research_bp.route('/holders', methods=['GET'])
+def etf_holders():
+    ticker = request.args.get('ticker', '').upper()
+    if not ticker:
+        return jsonify({"error": "Missing required parameter (ticker)"}), 400
+    if not lookthrough_engine.ensure(_ticker_list(request.args.get('etfs')) or DEFAULT_ETFS):
+        return jsonify({"status": "building", "data": []}), 202
+    top = request.args.get('top', 25, type=int)
+    return jsonify({"data": lookthrough_engine.holders(ticker, top=top)})
+
+@etf_research_bp.route('/flows/leaders', methods=['GET'])
+def etf_flow_leaders():
+    window = request.args.get('window', '5d')
+    if window not in WINDOWS:
+        return jsonify({"error": f"Unknown window '{window}'. Use one of: {', '.join(WINDOWS)}"}), 400
+    top = request.args.get('top', 10, type=int)
+    if not flow_store.ensure(_ticker_list(request.args.get('etfs')) or DEFAULT_ETFS):
+        return jsonify({"status": "building", "data": []}), 202
+    return jsonify({"window": window, "data": flow_store.leaders(window, top=top)})
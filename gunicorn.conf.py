@@ -0,0 +1,84 @@
+"""
+Production gunicorn profile
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is preloaded in the master and every page module is imported there
+(lazy_blueprints.load_all) before any worker is forked, so workers start in
+milliseconds and share those pages copy-on-write. No threads are started in the
+master: the pre_fork/child_exit hooks hand the background services to exactly one
+worker at a time, which starts them after the fork, and pass the role on to its
+replacement if it exits.
+
+Live feeds (premium trades, market tide, spike series, screener snapshots) are kept
+in process memory, so the default is one worker process serving requests from a
+pool of threads; our views mostly wait on upstream APIs, which threads (gthread) or
+greenlets (gevent) overlap well. More workers add request capacity for the
+disk-backed pages but each keeps its own in-memory feeds, filled lazily on request.
+
+Environment:
+    GUNICORN_WORKER_CLASS  gthread (default), gevent or sync
+    WEB_CONCURRENCY        worker processes (default 1)
+    GUNICORN_THREADS       threads per gthread worker (default 16)
+    GUNICORN_CONNECTIONS   concurrent requests per gevent worker (default 200)
+    GUNICORN_TIMEOUT       worker timeout in seconds (default 120)
+    GUNICORN_MAX_REQUESTS  recycle workers after this many requests (default 0, never)
+"""
+
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent':
+    # Patch before the app is preloaded, so requests/ssl/threading are imported patched
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 200))
+# Several views wait on more than one upstream call with 10 second timeouts
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+# Recycling a worker drops its in-memory feeds, so it is off unless asked for
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+
+# The master imports the pages itself, and a warmup thread would not survive the fork
+os.environ['FINANCEHUB_WARMUP'] = '0'
+
+
+def when_ready(server):
+    import lazy_blueprints
+    lazy_blueprints.load_all()
+    server.background_worker = None
+    server.log.info("Page modules preloaded in the master")
+
+
+def pre_fork(server, worker):
+    # Master side: the first worker forked while nobody holds the role gets the background services
+    if getattr(server, 'background_worker', None) is None:
+        server.background_worker = worker
+        worker.runs_background = True
+
+
+def post_fork(server, worker):
+    if getattr(worker, 'runs_background', False):
+        import background
+        background.start_services()
+        server.log.info(f"Worker {worker.pid} runs the background services")
+
+
+def on_reload(server):
+    # Old workers are replaced after a HUP, so the first new one takes over; the old holder
+    # keeps its services only until it finishes shutting down
+    server.background_worker = None
+
+
+def child_exit(server, worker):
+    # Master side: let the next worker forked take over the background services
+    if getattr(server, 'background_worker', None) is worker:
+        server.background_worker = None
@@ -0,0 +1,314 @@
+"""
+Materialized institution x ticker holdings index
+
+Holdings for every institution are fetched in one refresh, stored as flat numpy
+columns (institution code, ticker code, units, value) and persisted to a compressed
+.npz file. Rows are sorted by institution, and a second permutation orders them by
+ticker and units, so both directions are contiguous slices:
+
+    institution -> holdings   rows[inst_offsets[i]:inst_offsets[i + 1]]
+    ticker -> holders         by_ticker[ticker_offsets[t]:ticker_offsets[t + 1]]
+
+Position changes against the previous refresh are computed once at build time.
+"""
+
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+
+from common import (get_api_data, get_api_data_concurrent, INST_LIST_API_URL,
+                    INST_HOLDINGS_API_URL, DATA_DIR)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HOLDINGS_INDEX_PATH = os.path.join(DATA_DIR, 'holdings_index.npz')
+REFRESH_INTERVAL = int(os.environ.get('HOLDINGS_INDEX_REFRESH_SECONDS', 6 * 60 * 60))
+
+
+def _offsets(sorted_codes, size):
+    return np.searchsorted(sorted_codes, np.arange(size + 1)).astype(np.int64)
+
+
+class HoldingsIndex:
+    def __init__(self, institutions, tickers, inst_codes, ticker_codes, units, values,
+                 change_inst=None, change_ticker=None, change_delta=None, built_at=None):
+        self.institutions = np.asarray(institutions, dtype=str)
+        self.tickers = np.asarray(tickers, dtype=str)
+        self.built_at = built_at if built_at is not None else time.time()
+
+        order = np.lexsort((ticker_codes, inst_codes))
+        self.inst_codes = np.asarray(inst_codes, dtype=np.int32)[order]
+        self.ticker_codes = np.asarray(ticker_codes, dtype=np.int32)[order]
+        self.units = np.asarray(units, dtype=np.float64)[order]
+        self.values = np.asarray(values, dtype=np.float64)[order]
+
+        # Second direction: rows grouped by ticker, largest position first
+        self.by_ticker = np.lexsort((-self.units, self.ticker_codes))
+        self.inst_offsets = _offsets(self.inst_codes, len(self.institutions))
+        self.ticker_offsets = _offsets(self.ticker_codes[self.by_ticker], len(self.tickers))
+
+        self.change_inst = np.asarray(change_inst if change_inst is not None else [], dtype=str)
+        self.change_ticker = np.asarray(change_ticker if change_ticker is not None else [], dtype=str)
+        self.change_delta = np.asarray(change_delta if change_delta is not None else [], dtype=np.float64)
+
+        self._inst_lookup = {name: i for i, name in enumerate(self.institutions)}
+        self._ticker_lookup = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def __len__(self):
+        return len(self.units)
+
+    @classmethod
+    def from_records(cls, records, previous=None, unchanged=()):
+        """Build an index from (institution, ticker, units, value) tuples.
+
+        Duplicate (institution, ticker) rows are summed. If previous is given, the
+        position changes between the two are stored with the new index, leaving out
+        the institutions in unchanged (e.g. ones carried over after a failed fetch).
+        """
+        if records:
+            inst_col, ticker_col, units_col, value_col = zip(*records)
+        else:
+            inst_col, ticker_col, units_col, value_col = (), (), (), ()
+        institutions, inst_codes = np.unique(np.asarray(inst_col, dtype=str), return_inverse=True)
+        tickers, ticker_codes = np.unique(np.asarray(ticker_col, dtype=str), return_inverse=True)
+        units = np.asarray(units_col, dtype=np.float64)
+        values = np.asarray(value_col, dtype=np.float64)
+
+        # Collapse duplicate pairs
+        keys = inst_codes.astype(np.int64) * max(len(tickers), 1) + ticker_codes
+        unique_keys, key_codes = np.unique(keys, return_inverse=True)
+        units = np.bincount(key_codes, weights=units, minlength=len(unique_keys))
+        values = np.bincount(key_codes, weights=values, minlength=len(unique_keys))
+        inst_codes = unique_keys // max(len(tickers), 1)
+        ticker_codes = unique_keys % max(len(tickers), 1)
+
+        changes = {}
+        if previous is not None:
+            changes = cls._diff(previous, institutions[inst_codes], tickers[ticker_codes], units, unchanged)
+
+        return cls(institutions, tickers, inst_codes, ticker_codes, units, values,
+                   built_at=time.time(), **changes)
+
+    @staticmethod
+    def _diff(previous, inst_names, ticker_names, units, unchanged=()):
+        """Unit deltas per (institution, ticker) pair, sorted by absolute size."""
+        old_insts = previous.institutions[previous.inst_codes]
+        old_tickers = previous.tickers[previous.ticker_codes]
+        old_units = previous.units
+        if len(unchanged):
+            unchanged = np.asarray(sorted(unchanged), dtype=str)
+            keep_old = ~np.isin(old_insts, unchanged)
+            old_insts, old_tickers, old_units = old_insts[keep_old], old_tickers[keep_old], old_units[keep_old]
+            keep_new = ~np.isin(inst_names, unchanged)
+            inst_names, ticker_names, units = inst_names[keep_new], ticker_names[keep_new], units[keep_new]
+        inst_vocab, inst_codes = np.unique(np.concatenate([old_insts, np.asarray(inst_names, dtype=str)]),
+                                           return_inverse=True)
+        ticker_vocab, ticker_codes = np.unique(np.concatenate([old_tickers, np.asarray(ticker_names, dtype=str)]),
+                                               return_inverse=True)
+        keys = inst_codes.astype(np.int64) * max(len(ticker_vocab), 1) + ticker_codes
+        all_keys, codes = np.unique(keys, return_inverse=True)
+
+        n_old = len(old_insts)
+        delta = np.bincount(codes[n_old:], weights=units, minlength=len(all_keys))
+        delta -= np.bincount(codes[:n_old], weights=old_units, minlength=len(all_keys))
+
+        changed = np.nonzero(delta)[0]
+        changed = changed[np.argsort(-np.abs(delta[changed]), kind='stable')]
+        changed_keys = all_keys[changed]
+
+        # Stored by name since changes can reference positions that left the index
+        return {
+            'change_inst': inst_vocab[changed_keys // max(len(ticker_vocab), 1)],
+            'change_ticker': ticker_vocab[changed_keys % max(len(ticker_vocab), 1)],
+            'change_delta': delta[changed],
+        }
+
+    def _inst_slice(self, name):
+        code = self._inst_lookup.get(name)
+        if code is None:
+            return None
+        return slice(self.inst_offsets[code], self.inst_offsets[code + 1])
+
+    def _holder_rows(self, ticker):
+        code = self._ticker_lookup.get(ticker)
+        if code is None:
+            return np.array([], dtype=np.int64)
+        return self.by_ticker[self.ticker_offsets[code]:self.ticker_offsets[code + 1]]
+
+    def institution_records(self, names):
+        """(institution, ticker, units, value) tuples for the named institutions, as from_records takes them."""
+        records = []
+        for name in names:
+            rows = self._inst_slice(name)
+            if rows is not None:
+                records.extend(zip([name] * (rows.stop - rows.start), self.tickers[self.ticker_codes[rows]].tolist(),
+                                   self.units[rows].tolist(), self.values[rows].tolist()))
+        return records
+
+    def has_institution(self, name):
+        return name in self._inst_lookup
+
+    def institution_holdings(self, name):
+        """Holdings of one institution in the upstream API's {ticker, units, value} shape."""
+        rows = self._inst_slice(name)
+        if rows is None:
+            return []
+        return [
+            {'ticker': str(ticker), 'units': float(units), 'value': float(value)}
+            for ticker, units, value in zip(self.tickers[self.ticker_codes[rows]],
+                                            self.units[rows], self.values[rows])
+        ]
+
+    def top_holders(self, ticker, limit=10):
+        """Institutions holding the most units of ticker, largest first."""
+        rows = self._holder_rows(ticker)[:limit]
+        return [
+            {'institution': str(name), 'units': float(units), 'value': float(value)}
+            for name, units, value in zip(self.institutions[self.inst_codes[rows]],
+                                          self.units[rows], self.values[rows])
+        ]
+
+    def overlap(self, tickers):
+        """Institutions holding every ticker in tickers, with their units in each."""
+        tickers = [t for t in tickers if t]
+        if not tickers:
+            return []
+        holders = [self._holder_rows(t) for t in tickers]
+        common_insts = self.inst_codes[holders[0]]
+        for rows in holders[1:]:
+            common_insts = np.intersect1d(common_insts, self.inst_codes[rows])
+
+        results = []
+        for inst in common_insts:
+            rows = slice(self.inst_offsets[inst], self.inst_offsets[inst + 1])
+            held = dict(zip(self.tickers[self.ticker_codes[rows]], self.units[rows]))
+            results.append({
+                'institution': str(self.institutions[inst]),
+                'units': {str(t): float(held[t]) for t in tickers},
+            })
+        results.sort(key=lambda item: sum(item['units'].values()), reverse=True)
+        return results
+
+    def biggest_changes(self, limit=20):
+        """Largest unit changes since the previous refresh, by absolute size."""
+        return [
+            {'institution': str(inst), 'ticker': str(ticker), 'change': float(delta)}
+            for inst, ticker, delta in zip(self.change_inst[:limit], self.change_ticker[:limit],
+                                           self.change_delta[:limit])
+        ]
+
+    def save(self, path=HOLDINGS_INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            institutions=self.institutions, tickers=self.tickers,
+            inst_codes=self.inst_codes, ticker_codes=self.ticker_codes,
+            units=self.units, values=self.values,
+            change_inst=self.change_inst, change_ticker=self.change_ticker,
+            change_delta=self.change_delta,
+            built_at=np.array(self.built_at),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=HOLDINGS_INDEX_PATH):
+        with np.load(path) as data:
+            return cls(data['institutions'], data['tickers'], data['inst_codes'], data['ticker_codes'],
+                       data['units'], data['values'], change_inst=data['change_inst'],
+                       change_ticker=data['change_ticker'], change_delta=data['change_delta'],
+                       built_at=float(data['built_at']))
+
+
+def fetch_holdings_records(max_workers=16):
+    """Pull every institution's holdings from the API.
+
+    Returns (records, failed): (institution, ticker, units, value) tuples, and the
+    names of institutions whose holdings could not be fetched.
+    """
+    inst_data = get_api_data(INST_LIST_API_URL)
+    if "error" in inst_data:
+        raise RuntimeError(inst_data["error"])
+
+    names = list(dict.fromkeys(inst if isinstance(inst, str) else inst.get('name', 'N/A')
+                               for inst in inst_data.get("data", [])))
+    responses = get_api_data_concurrent([INST_HOLDINGS_API_URL.format(name=name) for name in names],
+                                        max_workers=max_workers)
+    records, failed = [], set()
+    for name, response in zip(names, responses):
+        if "error" in response:
+            logger.warning(f"Skipping holdings for {name}: {response['error']}")
+            failed.add(name)
+            continue
+        for holding in response.get("data", []) or []:
+            ticker = holding.get("ticker")
+            if ticker:
+                records.append((name, ticker, float(holding.get("units", 0) or 0),
+                                float(holding.get("value", 0) or 0)))
+    return records, failed
+
+
+# Module-level index shared by all requests
+holdings_index = None
+_index_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refresh_thread = None
+
+
+def refresh_holdings_index():
+    """Rebuild the index from the API, diff it against the current one and persist it."""
+    global holdings_index
+    with _refresh_lock:
+        records, failed = fetch_holdings_records()
+        if holdings_index is not None and failed:
+            # Keep the last known positions of institutions that failed this time, and keep them out of the diff
+            records += holdings_index.institution_records(failed)
+        new_index = HoldingsIndex.from_records(records, previous=holdings_index, unchanged=failed)
+        try:
+            new_index.save()
+        except OSError as e:
+            logger.error(f"Could not persist holdings index: {e}")
+        with _index_lock:
+            holdings_index = new_index
+    logger.info(f"Holdings index refreshed: {len(new_index)} positions, "
+                f"{len(new_index.institutions)} institutions, {len(new_index.tickers)} tickers")
+    return new_index
+
+
+def _refresh_loop():
+    while True:
+        # Without an index on disk the first pass builds one right away, off the request threads
+        if holdings_index is not None:
+            time.sleep(REFRESH_INTERVAL)
+        try:
+            refresh_holdings_index()
+        except Exception as e:
+            logger.error(f"Holdings index refresh failed: {e}")
+            if holdings_index is None:
+                time.sleep(60)
+
+
+def start_refresh_thread():
+    global _refresh_thread
+    with _index_lock:
+        if _refresh_thread is None or not _refresh_thread.is_alive():
+            _refresh_thread = threading.Thread(target=_refresh_loop, daemon=True)
+            _refresh_thread.start()
+
+
+def get_holdings_index():
+    """Return the shared index, loading it from disk on first use, or None while it is first being built."""
+    global holdings_index
+    if holdings_index is None:
+        with _index_lock:
+            if holdings_index is None and os.path.exists(HOLDINGS_INDEX_PATH):
+                try:
+                    holdings_index = HoldingsIndex.load()
+                except Exception as e:
+                    logger.error(f"Could not load holdings index: {e}")
+    start_refresh_thread()
+    return holdings_index
@@ -0,0 +1,164 @@
+"""
+Local insider filings store
+
+Insider buy/sell records are kept in one DataFrame sorted by filing date and
+persisted under DATA_DIR. The insider-buy-sells endpoint has no date filter, only a
+limit on its newest-first list, so every refresh after the first asks for as many
+rows as the days since the last stored filing date can hold; ingest then keeps the
+records filed on or after that date and replaces the last day's rows. Queries go through two indexes built after each ingest:
+the sorted filing-day array (date ranges are a searchsorted) and per-ticker row
+positions (a ticker filter is a dict lookup).
+"""
+
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from common import get_api_data, DATA_DIR, INSIDER_TRADES_API_URL
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INSIDER_STORE_PATH = os.path.join(DATA_DIR, 'insider_trades.pkl')
+REFRESH_INTERVAL = int(os.environ.get('INSIDER_REFRESH_SECONDS', 300))
+COLUMNS = ['ticker', 'filing_date', 'purchases', 'purchases_notional', 'sells', 'sells_notional']
+NUMERIC_COLUMNS = COLUMNS[2:]
+MARKET_TICKER = 'MARKET'
+# Largest limit the endpoint accepts; a longer gap falls back to its default full response
+MAX_FETCH_LIMIT = 500
+
+
+def _to_day(value):
+    """Day number (days since epoch) for a date string, date or None."""
+    if value is None or value == '':
+        return None
+    return int(pd.Timestamp(value).normalize().value // (86400 * 10 ** 9))
+
+
+def parse_insider_rows(rows):
+    """Rows without a ticker are market-wide totals and are stored under MARKET_TICKER."""
+    rows = [r for r in rows or [] if isinstance(r, dict) and r.get('filing_date')]
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    frame['ticker'] = frame['ticker'].fillna(MARKET_TICKER).astype(str).str.upper()
+    frame['filing_date'] = pd.to_datetime(frame['filing_date'], errors='coerce').dt.normalize()
+    for col in NUMERIC_COLUMNS:
+        frame[col] = pd.to_numeric(frame[col], errors='coerce').fillna(0)
+    frame[['purchases', 'sells']] = frame[['purchases', 'sells']].astype(np.int64)
+    return frame.dropna(subset=['filing_date'])
+
+
+class InsiderStore:
+    """Filing store persisted at path; path=None keeps it in memory only."""
+
+    def __init__(self, path=INSIDER_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.frame = self._load()
+        self.refreshed_at = 0.0
+        self._index()
+
+    def _load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                return pd.read_pickle(self.path)
+            except Exception as e:
+                logger.error(f"Could not read insider trades store: {e}")
+        return parse_insider_rows([])
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        self.frame.to_pickle(tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def _index(self):
+        self.days = (self.frame['filing_date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+                     if len(self.frame) else np.array([], dtype=np.int64))
+        self.by_ticker = {ticker: positions for ticker, positions in
+                          self.frame.groupby('ticker', sort=False).indices.items()}
+
+    @property
+    def last_filing_date(self):
+        return self.frame['filing_date'].iloc[-1] if len(self.frame) else None
+
+    def fetch_params(self, today=None):
+        """Request params covering the days since the last stored filing date, or None for a full fetch."""
+        last = self.last_filing_date
+        if last is None:
+            return None
+        today = pd.Timestamp(today) if today is not None else pd.Timestamp.now()
+        days = max((today.normalize() - last).days, 0) + 1
+        limit = days * int(self.frame['filing_date'].value_counts().max())
+        return {'limit': limit} if limit <= MAX_FETCH_LIMIT else None
+
+    def ingest(self, rows):
+        """Add records filed on or after the last stored filing date. Returns the number added."""
+        frame = parse_insider_rows(rows)
+        with self._lock:
+            last = self.last_filing_date
+            if last is not None:
+                frame = frame[frame['filing_date'] >= last]
+            if frame.empty:
+                return 0
+            # The last day can still be receiving filings, so its rows are replaced
+            merged = pd.concat([self.frame, frame], ignore_index=True)
+            merged = merged.drop_duplicates(subset=['ticker', 'filing_date'], keep='last')
+            self.frame = merged.sort_values(['filing_date', 'ticker'], kind='stable').reset_index(drop=True)
+            self._index()
+            try:
+                self._save()
+            except OSError as e:
+                logger.error(f"Could not persist insider trades store: {e}")
+        return len(frame)
+
+    def refresh(self, force=False):
+        if not force and time.time() - self.refreshed_at < REFRESH_INTERVAL:
+            return 0
+        self.refreshed_at = time.time()
+        response = get_api_data(INSIDER_TRADES_API_URL, params=self.fetch_params())
+        if isinstance(response, dict) and 'error' in response:
+            logger.error(f"Insider trades fetch failed: {response['error']}")
+            return 0
+        rows = response.get('data', []) if isinstance(response, dict) else response
+        if not isinstance(rows, list):
+            logger.error(f"Invalid response from insider trades API: {response}")
+            return 0
+        return self.ingest(rows)
+
+    def query(self, ticker=None, start=None, end=None, page=1, page_size=50):
+        """Newest-first page of records, optionally for one ticker and a filing date range.
+
+        Returns (records, total matches).
+        """
+        with self._lock:
+            frame, days = self.frame, self.days
+            if ticker:
+                positions = self.by_ticker.get(ticker.upper())
+                if positions is None:
+                    return [], 0
+            else:
+                positions = None
+            selected = days[positions] if positions is not None else days
+            start_day, end_day = _to_day(start), _to_day(end)
+            lo = np.searchsorted(selected, start_day, side='left') if start_day is not None else 0
+            hi = np.searchsorted(selected, end_day, side='right') if end_day is not None else len(selected)
+            total = int(max(hi - lo, 0))
+            # Newest first: page 1 ends at hi
+            page_hi = max(hi - (page - 1) * page_size, lo)
+            page_lo = max(page_hi - page_size, lo)
+            rows = np.arange(page_lo, page_hi)[::-1]
+            if positions is not None:
+                rows = positions[rows]
+            page_frame = frame.iloc[rows]
+        records = page_frame.assign(filing_date=page_frame['filing_date'].dt.strftime('%Y-%m-%d')).to_dict('records')
+        return records, total
+
+
+# Module-level store shared by all requests
+insider_store = InsiderStore()
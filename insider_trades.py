@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template_string, request
-from common import get_api_data, MENU_BAR, INSIDER_TRADES_API_URL, MOCK_TICKERS
+from common import MENU_BAR, MOCK_TICKERS
+from insider_store import insider_store, InsiderStore
+from tables import get_page_args, render_pagination
 import logging
 from datetime import datetime, timedelta
 import locale
@@ -47,38 +49,40 @@ def generate_mock_insider_trades():
     
     return trades
 
-def get_insider_trades():
+# In-memory store of mock filings, used while the real store is empty
+_mock_store = None
+
+def get_insider_trades(ticker=None, start=None, end=None, page=1, page_size=50):
+    """Page of insider filings, newest first, and the total number of matches."""
+    global _mock_store
     try:
-        # Get data from the API
-        response = get_api_data(INSIDER_TRADES_API_URL)
-        
-        # If API returns error or invalid response, use mock data
-        if not response or isinstance(response, dict) and 'error' in response:
-            logger.info("Using mock data for insider trades")
-            return generate_mock_insider_trades()
-            
-        # If response is not a list, log error and return mock data
-        if not isinstance(response, list):
-            logger.error(f"Invalid response from insider trades API: {response}")
-            return generate_mock_insider_trades()
-            
-        # Sort data by filing date (most recent first)
-        response.sort(key=lambda x: x.get('filing_date', ''), reverse=True)
-        
-        # Take only the last 10 days of data
-        return response[:10]
-        
+        insider_store.refresh()
     except Exception as e:
         logger.error(f"Error fetching insider trades data: {str(e)}")
-        return generate_mock_insider_trades()
+    
+    store = insider_store
+    if not len(store.frame):
+        logger.info("Using mock data for insider trades")
+        if _mock_store is None:
+            _mock_store = InsiderStore(path=None)
+            _mock_store.ingest(generate_mock_insider_trades())
+        store = _mock_store
+    return store.query(ticker=ticker, start=start, end=end, page=page, page_size=page_size)
 
 @insider_trades_bp.route('/insider-trades')
 def insider_trades():
-    trades_data = get_insider_trades()
+    ticker = request.args.get('ticker', '').strip().upper()
+    start = request.args.get('start', '').strip()
+    end = request.args.get('end', '').strip()
+    page, page_size = get_page_args(request.args)
     
-    # Ensure we have data before rendering
-    if not trades_data:
-        trades_data = generate_mock_insider_trades()
+    try:
+        trades_data, total = get_insider_trades(ticker, start or None, end or None, page, page_size)
+    except ValueError:
+        trades_data, total = [], 0
+    page_info = {'page': page, 'pages': max((total + page_size - 1) // page_size, 1),
+                 'page_size': page_size, 'total': total}
+    pagination_html = render_pagination(page_info, '/insider-trades', request.args.to_dict())
     
     html = """
     {{ style }}
@@ -87,6 +91,12 @@ def insider_trades():
         """ + MENU_BAR + """
         
         <div class="card">
+            <form class="filters" method="get" action="/insider-trades">
+                <input type="text" name="ticker" placeholder="Ticker" value="{{ ticker }}">
+                <input type="date" name="start" value="{{ start }}">
+                <input type="date" name="end" value="{{ end }}">
+                <button type="submit" class="btn">Filter</button>
+            </form>
             {% if trades_data %}
             <div class="summary-stats">
                 <div class="stat-box">
@@ -138,6 +148,7 @@ def insider_trades():
                     </tbody>
                 </table>
             </div>
+            {{ pagination_html | safe }}
             {% else %}
             <div class="error-message">
                 <p>No insider trading data available at the moment. Please try again later.</p>
@@ -147,6 +158,12 @@ def insider_trades():
     </div>
     
     <style>
+        .filters {
+            display: flex;
+            gap: 0.5rem;
+            margin-bottom: 1.5rem;
+        }
+        
         .summary-stats {
             margin-bottom: 2rem;
         }
@@ -242,4 +259,8 @@ def insider_trades():
     
     return render_template_string(html, 
                                 trades_data=trades_data,
-                                format_currency=format_currency) 
\ No newline at end of file
+                                format_currency=format_currency,
+                                ticker=ticker,
+                                start=start,
+                                end=end,
+                                pagination_html=pagination_html) 
\ No newline at end of file
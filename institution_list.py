@@ -1,9 +1,13 @@
 from flask import Blueprint, render_template_string, request
 
 from common import get_api_data, get_live_stock_price, MENU_BAR, INST_LIST_API_URL, INST_HOLDINGS_API_URL
+from holdings_index import get_holdings_index
 
 institution_bp = Blueprint('institution', __name__, url_prefix='/institution')
 
+# Returned by the index routes while the first index is still being built
+HOLDINGS_INDEX_BUILDING = ({"status": "building", "data": []}, 202)
+
 @institution_bp.route('/')
 def home():
     html = """
@@ -413,9 +417,45 @@ def institution_list_alt():
 
 @institution_bp.route('/holdings')
 def get_institution_holdings():
-
     from flask import jsonify
-
     name = request.args.get('name')
+    try:
+        index = get_holdings_index()
+        if index is not None and index.has_institution(name):
+            return jsonify({"data": index.institution_holdings(name)})
+    except Exception as e:
+        print(f"Holdings index unavailable: {str(e)}")
     data = get_api_data(INST_HOLDINGS_API_URL.format(name=name))
     return jsonify(data)
+
+@institution_bp.route('/holdings/top-holders')
+def get_top_holders():
+    from flask import jsonify
+    ticker = request.args.get('ticker', '').upper()
+    limit = request.args.get('limit', 10, type=int)
+    if not ticker:
+        return jsonify({"error": "Missing required parameter (ticker)"}), 400
+    index = get_holdings_index()
+    if index is None:
+        return HOLDINGS_INDEX_BUILDING
+    return jsonify({"data": index.top_holders(ticker, limit)})
+
+@institution_bp.route('/holdings/overlap')
+def get_holdings_overlap():
+    from flask import jsonify
+    tickers = [t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()]
+    if len(tickers) < 2:
+        return jsonify({"error": "Provide at least two comma-separated tickers"}), 400
+    index = get_holdings_index()
+    if index is None:
+        return HOLDINGS_INDEX_BUILDING
+    return jsonify({"data": index.overlap(tickers)})
+
+@institution_bp.route('/holdings/changes')
+def get_holdings_changes():
+    from flask import jsonify
+    limit = request.args.get('limit', 20, type=int)
+    index = get_holdings_index()
+    if index is None:
+        return HOLDINGS_INDEX_BUILDING
+    return jsonify({"data": index.biggest_changes(limit), "built_at": index.built_at})
@@ -0,0 +1,145 @@
+"""
+Lazy blueprint loading
+
+Importing the page modules pulls in pandas, yfinance, the OpenAI SDK and friends,
+which dominates worker boot. Instead of importing them in app.py, every route is
+registered from route_manifest.json as a lightweight stub with the real rule and
+endpoint; the first request to a stub imports its module and hands over to the real
+view. A background warmup thread can import the modules right after boot so the
+first visitor does not pay for it either.
+
+The manifest records a hash of each module's source. A module that changed since
+the manifest was written is registered eagerly, so a stale manifest can only cost
+boot time, never routes. Regenerate it with `python startup_benchmark.py --write-manifest`.
+"""
+
+import os
+import hashlib
+import importlib
+import json
+import threading
+import time
+import logging
+
+from flask import Flask
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (module, blueprint attribute) in registration order
+BLUEPRINTS = [
+    ('institution_list', 'institution_bp'),
+    ('research', 'research_bp'),
+    ('seasonality', 'seasonality_bp'),
+    ('etf_research', 'etf_research_bp'),
+    ('etf_market', 'etf_market_bp'),
+    ('market_tide', 'market_tide_bp'),
+    ('market_spike', 'market_spike_bp'),
+    ('flow_per_strike', 'flow_per_strike_bp'),
+    ('insider_trades', 'insider_trades_bp'),
+    ('congress_trades', 'congress_trades_bp'),
+    ('premium_options', 'premium_options_bp'),
+    ('most_active_stocks', 'most_active_bp'),
+    ('market_movers', 'market_movers_bp'),
+]
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROUTE_MANIFEST_PATH = os.path.join(BASE_DIR, 'route_manifest.json')
+EAGER_BLUEPRINTS = os.environ.get('FINANCEHUB_EAGER_BLUEPRINTS', '0') == '1'
+WARMUP = os.environ.get('FINANCEHUB_WARMUP', '1') == '1'
+
+# module -> Flask app holding that module's blueprint, used to look up its views
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def _source_hash(module):
+    with open(os.path.join(BASE_DIR, f"{module}.py"), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_module(module):
+    """Import module and return a private app with its blueprint registered, for view lookup."""
+    views = _loaded.get(module)
+    if views is None:
+        with _load_lock:
+            views = _loaded.get(module)
+            if views is None:
+                attribute = dict(BLUEPRINTS)[module]
+                started = time.perf_counter()
+                blueprint = getattr(importlib.import_module(module), attribute)
+                views = Flask(module)
+                views.register_blueprint(blueprint)
+                _loaded[module] = views
+                logger.info(f"Loaded {module} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return views
+
+
+def _lazy_view(module, endpoint):
+    def view(**kwargs):
+        return load_module(module).view_functions[endpoint](**kwargs)
+    view.__name__ = endpoint.rsplit('.', 1)[-1]
+    return view
+
+
+def write_manifest(path=ROUTE_MANIFEST_PATH):
+    """Import every blueprint and record its routes and source hash."""
+    modules = {}
+    for module, _ in BLUEPRINTS:
+        rules = []
+        for rule in load_module(module).url_map.iter_rules():
+            if rule.endpoint == 'static':
+                continue
+            rules.append({
+                'rule': rule.rule,
+                'endpoint': rule.endpoint,
+                'methods': sorted(rule.methods - {'HEAD', 'OPTIONS'}),
+                'defaults': rule.defaults,
+                'strict_slashes': rule.strict_slashes,
+            })
+        modules[module] = {'hash': _source_hash(module), 'rules': rules}
+    with open(path, 'w') as f:
+        json.dump(modules, f, indent=1, sort_keys=True)
+    return modules
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"No usable route manifest, loading blueprints eagerly: {e}")
+        return {}
+
+
+def register_blueprints(app, lazy=not EAGER_BLUEPRINTS, path=ROUTE_MANIFEST_PATH):
+    """Register every page blueprint on app, as lazy stubs where the manifest is current."""
+    manifest = _read_manifest(path) if lazy else {}
+    for module, attribute in BLUEPRINTS:
+        entry = manifest.get(module)
+        if entry is None or entry.get('hash') != _source_hash(module):
+            if lazy:
+                logger.warning(f"Route manifest is stale for {module}, loading it eagerly")
+            app.register_blueprint(getattr(importlib.import_module(module), attribute))
+            continue
+        stubs = {}
+        for rule in entry['rules']:
+            # Several rules can share an endpoint, and Flask wants the same view object for them
+            view = stubs.setdefault(rule['endpoint'], _lazy_view(module, rule['endpoint']))
+            app.add_url_rule(rule['rule'], endpoint=rule['endpoint'], view_func=view,
+                             methods=rule['methods'], defaults=rule['defaults'],
+                             strict_slashes=rule['strict_slashes'])
+
+
+def load_all():
+    """Import every page module now, e.g. in a preloading server master before it forks workers."""
+    for module, _ in BLUEPRINTS:
+        try:
+            load_module(module)
+        except Exception as e:
+            logger.error(f"Warmup import of {module} failed: {e}")
+
+
+def start_warmup():
+    """Import the page modules in the background so first requests do not wait for them."""
+    if WARMUP:
+        threading.Thread(target=load_all, daemon=True, name='blueprint-warmup').start()
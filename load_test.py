@@ -0,0 +1,104 @@
+"""
+Load test
+
+Drives a running server with concurrent clients for a fixed time and reports
+throughput, latency percentiles and errors per path. Used to compare server
+configurations (see "Production server" in the README):
+
+    python load_test.py --url http://127.0.0.1:5000 --clients 32 --seconds 30
+
+Each client loops over the paths in order, so every path gets a similar share of
+the load. The default paths are the JSON endpoints the pages poll plus a few pages.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+DEFAULT_PATHS = [
+    '/market-tide/data',
+    '/market-spike/data',
+    '/most-active-stocks/data',
+    '/market-movers/data',
+    '/congress-trades/query?limit=100',
+    '/insider-trades',
+    '/market-tide',
+    '/congress-trades',
+]
+
+
+def _client(base_url, paths, deadline, results, lock):
+    session = requests.Session()
+    local = defaultdict(list)
+    errors = defaultdict(int)
+    while time.perf_counter() < deadline:
+        for path in paths:
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=60)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                local[path].append(elapsed)
+            else:
+                errors[path] += 1
+            if time.perf_counter() >= deadline:
+                break
+    with lock:
+        for path, latencies in local.items():
+            results['latencies'][path].extend(latencies)
+        for path, count in errors.items():
+            results['errors'][path] += count
+
+
+def _percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+def run(base_url, paths, clients, seconds):
+    results = {'latencies': defaultdict(list), 'errors': defaultdict(int)}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + seconds
+    threads = [threading.Thread(target=_client, args=(base_url, paths, deadline, results, lock))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def report(results, elapsed, clients):
+    latencies, errors = results['latencies'], results['errors']
+    all_latencies = [value for values in latencies.values() for value in values]
+    total_errors = sum(errors.values())
+    print(f"{clients} clients, {elapsed:.1f} s: {len(all_latencies)} ok, {total_errors} errors, "
+          f"{len(all_latencies) / elapsed:.1f} req/s")
+    print(f"{'path':<36} {'requests':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for path in sorted(set(latencies) | set(errors)):
+        values = latencies.get(path) or [float('nan')]
+        print(f"{path:<36} {len(latencies.get(path, [])):8d} {errors.get(path, 0):7d} "
+              f"{_percentile(values, 50) * 1000:8.1f} {_percentile(values, 95) * 1000:8.1f} "
+              f"{_percentile(values, 99) * 1000:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--path', action='append', dest='paths', help='path to request (repeatable)')
+    args = parser.parse_args()
+    results, elapsed = run(args.url.rstrip('/'), args.paths or DEFAULT_PATHS, args.clients, args.seconds)
+    report(results, elapsed, args.clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,11 @@
 from flask import Blueprint, render_template_string, request, jsonify
-import requests
-import time
-from datetime import datetime
 from common import MENU_BAR
+from screener_poller import pollers
+from screener_history import screener_history, NEW_MINUTES
 
 # Blueprint configuration
 market_movers_bp = Blueprint('market_movers', __name__)
 
-# Alpaca API credentials for paper trading
-ALPACA_API_KEY = "AK49TL9A4OLPKO9PAUH3"
-ALPACA_API_SECRET = "0744CcGjrhPXvsORtWJpSMNWpEYuDTegOlE0OgLV"
-
-# Function to get market movers data from Alpaca API
-def get_market_movers(top=10):
-    url = f"https://data.alpaca.markets/v1beta1/screener/stocks/movers?top={top}"
-    
-    headers = {
-        "accept": "application/json",
-        "APCA-API-KEY-ID": ALPACA_API_KEY,
-        "APCA-API-SECRET-KEY": ALPACA_API_SECRET
-    }
-    
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error fetching market movers: {e}")
-        return {"error": str(e)}
-
 # Route for Market Movers page
 @market_movers_bp.route('/market-movers')
 def market_movers():
@@ -120,6 +97,15 @@ def market_movers():
                 color: #666;
             }
             
+            .new-badge {
+                background-color: #e67e22;
+                color: white;
+                border-radius: 3px;
+                padding: 1px 5px;
+                margin-left: 6px;
+                font-size: 0.75em;
+            }
+            
             .loading {
                 text-align: center;
                 padding: 20px;
@@ -192,8 +178,17 @@ def market_movers():
                 // Function to fetch and display data
                 async function fetchData() {
                     try {
-                        const response = await fetch('/market-movers/data');
+                        const [response, historyResponse] = await Promise.all([
+                            fetch('/market-movers/data'),
+                            fetch('/market-movers/history')
+                        ]);
                         const data = await response.json();
+                        const history = await historyResponse.json();
+                        const newSymbols = new Set();
+                        Object.values(history.data || {}).forEach(rows => rows.forEach(row => {
+                            if (row.is_new) newSymbols.add(row.symbol);
+                        }));
+                        const badge = symbol => newSymbols.has(symbol) ? '<span class="new-badge">NEW</span>' : '';
                         
                         if (data.error) {
                             gainersTable.innerHTML = `
@@ -222,7 +217,7 @@ def market_movers():
                             gainers.forEach(stock => {
                                 gainersHTML += `
                                     <tr>
-                                        <td>${stock.symbol}</td>
+                                        <td>${stock.symbol}${badge(stock.symbol)}</td>
                                         <td>$${formatNumber(stock.price)}</td>
                                         <td class="up">+$${formatNumber(stock.change)}</td>
                                         <td class="up">+${formatNumber(stock.percent_change)}%</td>
@@ -245,7 +240,7 @@ def market_movers():
                             losers.forEach(stock => {
                                 losersHTML += `
                                     <tr>
-                                        <td>${stock.symbol}</td>
+                                        <td>${stock.symbol}${badge(stock.symbol)}</td>
                                         <td>$${formatNumber(stock.price)}</td>
                                         <td class="down">-$${formatNumber(Math.abs(stock.change))}</td>
                                         <td class="down">-${formatNumber(Math.abs(stock.percent_change))}%</td>
@@ -293,8 +288,22 @@ def market_movers():
         </script>
     """)
 
-# API endpoint to get market movers data
+# API endpoint to get market movers data, served from the shared screener poller
 @market_movers_bp.route('/market-movers/data')
 def get_market_movers_data():
-    data = get_market_movers()
-    return jsonify(data) 
\ No newline at end of file
+    return pollers['movers'].response()
+
+# Ranking history for the gainers and losers lists, or one symbol's rank trajectory on a list
+@market_movers_bp.route('/market-movers/history')
+def get_market_movers_history():
+    pollers['movers'].start()
+    symbol = request.args.get('symbol')
+    if symbol:
+        list_name = request.args.get('list', 'gainers')
+        if list_name not in ('gainers', 'losers'):
+            return jsonify({"error": "list must be 'gainers' or 'losers'"}), 400
+        return jsonify({"data": screener_history.trajectory('movers', list_name, symbol,
+                                                             start=request.args.get('start', type=int))})
+    minutes = request.args.get('minutes', NEW_MINUTES, type=int)
+    return jsonify({"data": {list_name: screener_history.summary('movers', list_name, new_minutes=minutes)
+                             for list_name in ('gainers', 'losers')}})
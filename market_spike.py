@@ -1,53 +1,35 @@
 from flask import Blueprint, render_template_string, request, jsonify
 from common import get_api_data, MENU_BAR
+from spike_store import get_spike_series, format_ms, RANGES
+from spike_events import spike_detector, to_ms
 import logging
 import json
-import random
-from datetime import datetime, timedelta
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# API URL for Market Spike
-MARKET_SPIKE_API_URL = "https://api.unusualwhales.com/api/market/spike"
-
 market_spike_bp = Blueprint('market_spike', __name__, url_prefix='/')
 
 @market_spike_bp.route('/market-spike')
 def market_spike():
-    spike_data = None
     error = None
     
     # Get time range from query parameters (default to 'day')
     time_range = request.args.get('range', 'day')
-    valid_ranges = ['hour', 'day', 'week', 'month']
-    if time_range not in valid_ranges:
+    if time_range not in RANGES:
         time_range = 'day'
     
+    series = get_spike_series()
     try:
-        # For testing, always generate mock data instead of making actual API calls
-        spike_data = generate_mock_spike_data(time_range)
-        
-        # In a production environment, you would uncomment this code to use the real API
-        # response = get_api_data(MARKET_SPIKE_API_URL)
-        # if "error" not in response:
-        #     spike_data = response.get("data", [])
-        #     # If no data is returned, generate mock data for testing
-        #     if not spike_data:
-        #         spike_data = generate_mock_spike_data(time_range)
-        # else:
-        #     error = response.get("error", "Failed to retrieve market spike data")
-        #     # Generate mock data for testing if there's an error
-        #     spike_data = generate_mock_spike_data(time_range)
+        chart_data = series.chart(time_range) if len(series) else None
+        stats = series.stats(time_range)
     except Exception as e:
         error = str(e)
         logger.error(f"Error processing market spike data: {str(e)}")
-        # Generate mock data for testing if there's an exception
-        spike_data = generate_mock_spike_data(time_range)
-    
-    # Prepare data for chart
-    chart_data = prepare_chart_data(spike_data)
+        chart_data, stats = None, None
+    if stats is None and error is None:
+        error = "No market spike data available yet"
     
     html = """
     {{ style }}
@@ -130,43 +112,26 @@ def market_spike():
                         <tbody>
     """
     
-    # Add table rows for recent spike data (last 10 entries)
-    if spike_data:
-        recent_data = spike_data[-10:] if len(spike_data) > 10 else spike_data
-        prev_value = None
+    # Add table rows for recent spike data (last 10 entries, newest first)
+    recent = series.recent(11)
+    for i, (timestamp, value) in enumerate(recent[:10]):
+        formatted_time = format_ms(timestamp)
+        change_cell, change_class = '-', ''
+        if i + 1 < len(recent):
+            change = value - recent[i + 1][1]
+            change_class = 'positive' if change >= 0 else 'negative'
+            change_icon = 'caret-up' if change >= 0 else 'caret-down'
+            change_cell = f'<i class="fas fa-{change_icon}"></i> {abs(change):.2f}'
         
-        for item in reversed(recent_data):
-            time_str = item.get('time', '')
-            value = float(item.get('value', 0))
-            
-            # Format time
-            try:
-                dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-                formatted_time = dt.strftime('%H:%M:%S')
-            except:
-                formatted_time = time_str
-            
-            # Calculate change
-            change = 0
-            change_class = ''
-            change_icon = ''
-            
-            if prev_value is not None:
-                change = value - prev_value
-                change_class = 'positive' if change >= 0 else 'negative'
-                change_icon = 'caret-up' if change >= 0 else 'caret-down'
-            
-            prev_value = value
-            
-            html += f"""
+        html += f"""
                             <tr>
                                 <td>{formatted_time}</td>
                                 <td>{value:.2f}</td>
                                 <td class="{change_class}">
-                                    {f'<i class="fas fa-{change_icon}"></i> {abs(change):.2f}' if prev_value is not None else '-'}
+                                    {change_cell}
                                 </td>
                             </tr>
-            """
+        """
     
     html += """
                         </tbody>
@@ -479,47 +444,14 @@ def market_spike():
         </script>
         """
     
-    # Calculate statistics for display
-    current_value = "N/A"
-    max_value = "N/A"
-    min_value = "N/A"
-    max_time = "N/A"
-    min_time = "N/A"
-    
-    if spike_data:
-        # Current value (most recent)
-        current_value = f"{float(spike_data[-1].get('value', 0)):.2f}"
-        
-        # Find max and min values
-        max_val = float(spike_data[0].get('value', 0))
-        min_val = float(spike_data[0].get('value', 0))
-        max_idx = 0
-        min_idx = 0
-        
-        for i, item in enumerate(spike_data):
-            val = float(item.get('value', 0))
-            if val > max_val:
-                max_val = val
-                max_idx = i
-            if val < min_val:
-                min_val = val
-                min_idx = i
-        
-        max_value = f"{max_val:.2f}"
-        min_value = f"{min_val:.2f}"
-        
-        # Format times
-        try:
-            max_dt = datetime.fromisoformat(spike_data[max_idx].get('time', '').replace('Z', '+00:00'))
-            max_time = max_dt.strftime('%H:%M:%S')
-        except:
-            max_time = spike_data[max_idx].get('time', '')
-            
-        try:
-            min_dt = datetime.fromisoformat(spike_data[min_idx].get('time', '').replace('Z', '+00:00'))
-            min_time = min_dt.strftime('%H:%M:%S')
-        except:
-            min_time = spike_data[min_idx].get('time', '')
+    # Statistics for display come straight from the series' running min/max
+    current_value = max_value = min_value = max_time = min_time = "N/A"
+    if stats:
+        current_value = f"{stats['current']:.2f}"
+        max_value = f"{stats['max']:.2f}"
+        min_value = f"{stats['min']:.2f}"
+        max_time = format_ms(stats['max_time'])
+        min_time = format_ms(stats['min_time'])
     
     return render_template_string(html, 
                                  range=time_range,
@@ -529,78 +461,27 @@ def market_spike():
                                  max_time=max_time,
                                  min_time=min_time)
 
-def generate_mock_spike_data(time_range):
-    """Generate mock spike data for testing"""
-    data = []
-    now = datetime.now()
-    
-    # Determine number of data points and time interval based on range
-    if time_range == 'hour':
-        num_points = 60  # 1 minute intervals
-        interval = timedelta(minutes=1)
-        start_time = now - timedelta(minutes=59)
-    elif time_range == 'day':
-        num_points = 24 * 6  # 10 minute intervals
-        interval = timedelta(minutes=10)
-        start_time = now - timedelta(days=1) + timedelta(minutes=10)
-    elif time_range == 'week':
-        num_points = 7 * 24  # 1 hour intervals
-        interval = timedelta(hours=1)
-        start_time = now - timedelta(days=7) + timedelta(hours=1)
-    else:  # month
-        num_points = 30  # 1 day intervals
-        interval = timedelta(days=1)
-        start_time = now - timedelta(days=29)
-    
-    # Generate base value and trend
-    base_value = 20.0
-    trend = 0.05  # Slight upward trend
-    
-    # Generate data points
-    for i in range(num_points):
-        time_point = start_time + interval * i
-        
-        # Add randomness but keep a general trend
-        noise = random.uniform(-0.5, 0.5)
-        trend_component = trend * (i / num_points)
-        
-        # Add some volatility
-        volatility = 0.2
-        if random.random() < 0.1:  # 10% chance of a spike
-            volatility = random.uniform(0.5, 1.5)
-        
-        # Calculate value
-        value = base_value + trend_component + noise * volatility
-        
-        # Add to data
-        data.append({
-            'time': time_point.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'value': f"{value:.2f}"
-        })
-    
-    return data
 
-def prepare_chart_data(spike_data):
-    """Prepare data for Chart.js"""
-    if not spike_data:
-        return None
-    
-    times = []
-    values = []
-    
-    for item in spike_data:
-        # Format time for display
-        time_str = item.get('time', '')
-        try:
-            dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-            formatted_time = dt.strftime('%H:%M')
-        except:
-            formatted_time = time_str
-        
-        times.append(formatted_time)
-        values.append(float(item.get('value', 0)))
-    
-    return {
-        'times': times,
-        'values': values
-    } 
\ No newline at end of file
+@market_spike_bp.route('/market-spike/data')
+def market_spike_data():
+    time_range = request.args.get('range', 'day')
+    if time_range not in RANGES:
+        return jsonify({"error": f"Unknown range '{time_range}'. Use one of: {', '.join(RANGES)}"}), 400
+    series = get_spike_series()
+    return jsonify({"range": time_range, "stats": series.stats(time_range), "data": series.chart(time_range)})
+
+
+@market_spike_bp.route('/market-spike/events')
+def market_spike_events():
+    """Detected spike events, newest first. start/end take ISO times or epoch milliseconds."""
+    try:
+        start, end = (request.args.get(name) for name in ('start', 'end'))
+        start = to_ms(int(start) if start and start.isdigit() else start) if start else None
+        end = to_ms(int(end) if end and end.isdigit() else end) if end else None
+    except ValueError as e:
+        return jsonify({"error": f"Invalid time range: {e}"}), 400
+    get_spike_series()
+    events = spike_detector.log.query(start=start, end=end, ticker=request.args.get('ticker'),
+                                      source=request.args.get('source'),
+                                      limit=min(request.args.get('limit', 100, type=int), 1000))
+    return jsonify({"data": events})
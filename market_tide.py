@@ -1,7 +1,7 @@
-from flask import Blueprint, render_template_string, request
+from flask import Blueprint, render_template_string, request, jsonify
 from common import get_api_data, MENU_BAR
+from market_tide_engine import tide_engine, start_poll_thread, PERIODS
 import logging
-import random
 from datetime import datetime, timedelta
 
 # Configure logging
@@ -13,18 +13,13 @@ market_tide_bp = Blueprint('market_tide', __name__, url_prefix='/')
 @market_tide_bp.route('/market-tide')
 def market_tide():
     period = request.args.get('period', 'day')
+    if period not in PERIODS:
+        period = 'day'
+    start_poll_thread()
     
-    # Generate mock data
-    sectors = ['Technology', 'Healthcare', 'Financials', 'Consumer', 'Energy', 'Materials']
-    data = []
-    
-    for sector in sectors:
-        value = random.uniform(-5, 5)
-        data.append({
-            'sector': sector,
-            'value': value,
-            'color': 'rgba(40, 167, 69, 0.7)' if value > 0 else 'rgba(220, 53, 69, 0.7)'
-        })
+    data = tide_engine.snapshot(period)
+    for item in data:
+        item['color'] = 'rgba(40, 167, 69, 0.7)' if item['value'] > 0 else 'rgba(220, 53, 69, 0.7)'
     
     html = """
     {{ style }}
@@ -50,6 +45,7 @@ def market_tide():
                         <tr>
                             <th>Sector</th>
                             <th>Flow (%)</th>
+                            <th>Net Premium ($)</th>
                         </tr>
                     </thead>
                     <tbody>
@@ -59,6 +55,11 @@ def market_tide():
                             <td style="color: {{ 'green' if item.value > 0 else 'red' }}">
                                 {{ "%.2f"|format(item.value) }}%
                             </td>
+                            <td>{{ "{:,.0f}".format(item.net_premium) }}</td>
+                        </tr>
+                        {% else %}
+                        <tr>
+                            <td colspan="3">No options flow recorded for this period yet.</td>
                         </tr>
                         {% endfor %}
                     </tbody>
@@ -94,11 +95,11 @@ def market_tide():
         new Chart(ctx, {
             type: 'bar',
             data: {
-                labels: {{ [item.sector for item in data] | tojson }},
+                labels: {{ data | map(attribute='sector') | list | tojson }},
                 datasets: [{
                     label: 'Market Flow (%)',
-                    data: {{ [item.value for item in data] | tojson }},
-                    backgroundColor: {{ [item.color for item in data] | tojson }},
+                    data: {{ data | map(attribute='value') | list | tojson }},
+                    backgroundColor: {{ data | map(attribute='color') | list | tojson }},
                     borderWidth: 1
                 }]
             },
@@ -136,4 +137,13 @@ def market_tide():
     </script>
     """
     
-    return render_template_string(html, period=period, data=data) 
\ No newline at end of file
+    return render_template_string(html, period=period, data=data)
+
+
+@market_tide_bp.route('/market-tide/data')
+def market_tide_data():
+    period = request.args.get('period', 'day')
+    if period not in PERIODS:
+        return jsonify({"error": f"Unknown period '{period}'. Use one of: {', '.join(PERIODS)}"}), 400
+    start_poll_thread()
+    return jsonify({"period": period, "data": tide_engine.snapshot(period)})
@@ -0,0 +1,190 @@
+"""
+Market tide engine
+
+Options premium is booked into a ring of daily buckets per sector: net premium
+(call premium minus put premium) and gross premium (calls plus puts). Running totals
+for every period window (day, week, month, year) are kept next to the ring and
+adjusted by the same delta on every update, and the day that falls out of each
+window is subtracted when the calendar rolls over. Switching period is therefore a
+lookup of a precomputed per-sector array, never a recompute.
+
+Flow comes either from the premium options trade stream (every trade, call or put)
+or, with MARKET_TIDE_SOURCE=api, from polling the sector tide endpoint, whose rows
+are cumulative for their day and so replace rather than add to the day's bucket.
+The API mode polls SECTOR_TIDE_API_URL once per sector rather than
+MARKET_TIDE_API_URL: the market tide endpoint only returns the market-wide total,
+which cannot be split into the per-sector buckets the page shows.
+"""
+
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from common import get_api_data, SECTOR_TIDE_API_URL
+from sector_index import sector_index, SECTORS as INDEX_SECTORS, UNKNOWN_SECTOR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Calendar days covered by each period
+PERIODS = {'day': 1, 'week': 7, 'month': 30, 'year': 365}
+RING_DAYS = max(PERIODS.values()) + 1
+
+SECTORS = INDEX_SECTORS + [UNKNOWN_SECTOR]
+SECTOR_INDEX = {name: i for i, name in enumerate(SECTORS)}
+
+MARKET_TIDE_SOURCE = os.environ.get('MARKET_TIDE_SOURCE', 'stream')
+POLL_INTERVAL = int(os.environ.get('MARKET_TIDE_POLL_SECONDS', 60))
+
+EASTERN = pytz.timezone('US/Eastern')
+
+
+def sector_for(ticker):
+    return sector_index.sector_of(ticker)
+
+
+def trading_day(when=None):
+    """Eastern calendar day ordinal for a datetime, RFC-3339 string or epoch milliseconds."""
+    if when is None or when == '':
+        dt = datetime.now(EASTERN)
+    elif isinstance(when, (int, float)):
+        dt = datetime.fromtimestamp(when / 1000, tz=pytz.UTC).astimezone(EASTERN)
+    else:
+        # pandas parses the nanosecond RFC-3339 stamps the trade stream sends
+        dt = pd.Timestamp(when)
+        dt = dt.tz_convert(EASTERN) if dt.tzinfo else dt.tz_localize(EASTERN)
+    return dt.date().toordinal()
+
+
+class MarketTideEngine:
+    def __init__(self, today=None):
+        self._lock = threading.Lock()
+        self.today = today if today is not None else trading_day()
+        self.net = np.zeros((RING_DAYS, len(SECTORS)))
+        self.gross = np.zeros((RING_DAYS, len(SECTORS)))
+        self.net_totals = {period: np.zeros(len(SECTORS)) for period in PERIODS}
+        self.gross_totals = {period: np.zeros(len(SECTORS)) for period in PERIODS}
+        self.updated_at = None
+
+    def _roll_to(self, day):
+        """Advance the window ends to day, dropping the days that leave each window."""
+        if day <= self.today:
+            return
+        # After a full ring the whole history has expired
+        start = max(self.today + 1, day - RING_DAYS)
+        for d in range(start, day + 1):
+            for period, days in PERIODS.items():
+                slot = (d - days) % RING_DAYS
+                self.net_totals[period] -= self.net[slot]
+                self.gross_totals[period] -= self.gross[slot]
+            self.net[d % RING_DAYS] = 0.0
+            self.gross[d % RING_DAYS] = 0.0
+        if day - self.today > RING_DAYS:
+            for period in PERIODS:
+                self.net_totals[period][:] = 0.0
+                self.gross_totals[period][:] = 0.0
+        self.today = day
+
+    def _apply(self, day, sector, net_delta, gross_delta):
+        slot = day % RING_DAYS
+        self.net[slot, sector] += net_delta
+        self.gross[slot, sector] += gross_delta
+        age = self.today - day
+        for period, days in PERIODS.items():
+            if age < days:
+                self.net_totals[period][sector] += net_delta
+                self.gross_totals[period][sector] += gross_delta
+        self.updated_at = time.time()
+
+    def _accepts(self, day):
+        self._roll_to(day)
+        return self.today - day < max(PERIODS.values())
+
+    def add_trade(self, ticker, option_type, premium, when=None):
+        """Book one option trade: calls add to net premium, puts subtract from it."""
+        if option_type not in ('C', 'P') or not premium:
+            return
+        day = trading_day(when)
+        sign = 1.0 if option_type == 'C' else -1.0
+        with self._lock:
+            if self._accepts(day):
+                self._apply(day, SECTOR_INDEX[sector_for(ticker)], sign * premium, abs(premium))
+
+    def set_day(self, sector, day, net_call_premium, net_put_premium):
+        """Replace a sector's bucket for day with cumulative premium totals."""
+        sector = SECTOR_INDEX.get(sector, SECTOR_INDEX[UNKNOWN_SECTOR])
+        with self._lock:
+            if not self._accepts(day):
+                return
+            slot = day % RING_DAYS
+            net = net_call_premium - net_put_premium
+            gross = abs(net_call_premium) + abs(net_put_premium)
+            self._apply(day, sector, net - self.net[slot, sector], gross - self.gross[slot, sector])
+
+    def snapshot(self, period='day'):
+        """Per-sector net premium and flow % (net over gross premium) for a period."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+        with self._lock:
+            self._roll_to(trading_day())
+            net = self.net_totals[period].copy()
+            gross = self.gross_totals[period].copy()
+        flow = np.divide(net, gross, out=np.zeros_like(net), where=gross > 0) * 100
+        return [{'sector': sector, 'net_premium': float(net[i]), 'gross_premium': float(gross[i]),
+                 'value': float(flow[i])}
+                for i, sector in enumerate(SECTORS) if gross[i] > 0]
+
+
+def ingest_sector_tide(engine, sector, rows):
+    """Book sector tide API rows, keeping the last (cumulative) row of each day."""
+    latest = {}
+    for row in rows or []:
+        if not isinstance(row, dict):
+            continue
+        try:
+            day = trading_day(row.get('timestamp') or row.get('date'))
+            latest[day] = (float(row.get('net_call_premium') or 0), float(row.get('net_put_premium') or 0))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipping sector tide row for {sector}: {e}")
+    for day, (calls, puts) in sorted(latest.items()):
+        engine.set_day(sector, day, calls, puts)
+    return len(latest)
+
+
+def poll_sector_tide(engine):
+    for sector in SECTORS[:-1]:
+        response = get_api_data(SECTOR_TIDE_API_URL.format(sector=sector.lower()))
+        if "error" in response:
+            logger.error(f"Sector tide fetch failed for {sector}: {response['error']}")
+            continue
+        ingest_sector_tide(engine, sector, response.get("data", []))
+
+
+# Module-level engine shared by the trade stream and the market tide page
+tide_engine = MarketTideEngine()
+_poll_thread = None
+
+
+def _poll_loop():
+    while True:
+        try:
+            poll_sector_tide(tide_engine)
+        except Exception as e:
+            logger.error(f"Sector tide poll failed: {e}")
+        time.sleep(POLL_INTERVAL)
+
+
+def start_poll_thread():
+    """Start polling the sector tide endpoint when it is the configured source."""
+    global _poll_thread
+    if MARKET_TIDE_SOURCE != 'api':
+        return
+    if _poll_thread is None or not _poll_thread.is_alive():
+        _poll_thread = threading.Thread(target=_poll_loop, daemon=True)
+        _poll_thread.start()
@@ -1,34 +1,11 @@
 from flask import Blueprint, render_template_string, request, jsonify
-import requests
-import time
-from datetime import datetime
 from common import MENU_BAR
+from screener_poller import pollers
+from screener_history import screener_history, NEW_MINUTES
 
 # Blueprint configuration
 most_active_bp = Blueprint('most_active', __name__)
 
-# Alpaca API credentials for paper trading
-ALPACA_API_KEY = "AK49TL9A4OLPKO9PAUH3"
-ALPACA_API_SECRET = "0744CcGjrhPXvsORtWJpSMNWpEYuDTegOlE0OgLV"
-
-# Function to get the most active stocks data from Alpaca API
-def get_most_active_stocks(top=10, metric="volume"):
-    url = f"https://data.alpaca.markets/v1beta1/screener/stocks/most-actives?by={metric}&top={top}"
-    
-    headers = {
-        "accept": "application/json",
-        "APCA-API-KEY-ID": ALPACA_API_KEY,
-        "APCA-API-SECRET-KEY": ALPACA_API_SECRET
-    }
-    
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error fetching most active stocks: {e}")
-        return {"error": str(e)}
-
 # Route for Most Active Stocks page
 @most_active_bp.route('/most-active-stocks')
 def most_active_stocks():
@@ -40,8 +17,12 @@ def most_active_stocks():
             
             <div class="card">
                 <div class="card-header">
-                    <h2><i class="fas fa-fire"></i> Most Active Stocks by Volume</h2>
+                    <h2><i class="fas fa-fire"></i> Most Active Stocks</h2>
                     <div class="refresh-controls">
+                        <select id="metric-select">
+                            <option value="volume">By Volume</option>
+                            <option value="trades">By Trade Count</option>
+                        </select>
                         <span id="last-updated">Last Updated: <span id="update-time">Just Now</span></span>
                         <button id="refresh-btn" class="btn"><i class="fas fa-sync-alt"></i> Refresh Now</button>
                     </div>
@@ -54,11 +35,12 @@ def most_active_stocks():
                                 <th>Symbol</th>
                                 <th>Trade Count</th>
                                 <th>Volume</th>
+                                <th>On List</th>
                             </tr>
                         </thead>
                         <tbody id="most-active-table">
                             <tr>
-                                <td colspan="3" class="loading">Loading data...</td>
+                                <td colspan="4" class="loading">Loading data...</td>
                             </tr>
                         </tbody>
                     </table>
@@ -87,6 +69,15 @@ def most_active_stocks():
                 color: #666;
             }
             
+            .new-badge {
+                background-color: #e67e22;
+                color: white;
+                border-radius: 3px;
+                padding: 1px 5px;
+                margin-left: 6px;
+                font-size: 0.75em;
+            }
+            
             .loading {
                 text-align: center;
                 padding: 20px;
@@ -133,6 +124,7 @@ def most_active_stocks():
             document.addEventListener('DOMContentLoaded', function() {
                 const mostActiveTable = document.getElementById('most-active-table');
                 const refreshBtn = document.getElementById('refresh-btn');
+                const metricSelect = document.getElementById('metric-select');
                 const updateTimeEl = document.getElementById('update-time');
                 
                 let autoRefreshInterval = null;
@@ -152,13 +144,19 @@ def most_active_stocks():
                 // Function to fetch and display data
                 async function fetchData() {
                     try {
-                        const response = await fetch('/most-active-stocks/data');
+                        const [response, historyResponse] = await Promise.all([
+                            fetch(`/most-active-stocks/data?by=${metricSelect.value}`),
+                            fetch(`/most-active-stocks/history?by=${metricSelect.value}`)
+                        ]);
                         const data = await response.json();
+                        const history = await historyResponse.json();
+                        const onList = {};
+                        (history.data || []).forEach(row => { onList[row.symbol] = row; });
                         
                         if (data.error) {
                             mostActiveTable.innerHTML = `
                                 <tr>
-                                    <td colspan="3" class="error">Error: ${data.error}</td>
+                                    <td colspan="4" class="error">Error: ${data.error}</td>
                                 </tr>
                             `;
                             return;
@@ -169,7 +167,7 @@ def most_active_stocks():
                         if (mostActives.length === 0) {
                             mostActiveTable.innerHTML = `
                                 <tr>
-                                    <td colspan="3" class="empty">No data available</td>
+                                    <td colspan="4" class="empty">No data available</td>
                                 </tr>
                             `;
                             return;
@@ -180,9 +178,10 @@ def most_active_stocks():
                         mostActives.forEach(stock => {
                             tableHTML += `
                                 <tr>
-                                    <td>${stock.symbol}</td>
+                                    <td>${stock.symbol}${onList[stock.symbol] && onList[stock.symbol].is_new ? '<span class="new-badge">NEW</span>' : ''}</td>
                                     <td>${formatNumber(stock.trade_count)}</td>
                                     <td>${formatNumber(stock.volume)}</td>
+                                    <td>${onList[stock.symbol] ? Math.round(onList[stock.symbol].minutes_on_list) + ' min' : '-'}</td>
                                 </tr>
                             `;
                         });
@@ -194,7 +193,7 @@ def most_active_stocks():
                         console.error('Error fetching data:', error);
                         mostActiveTable.innerHTML = `
                             <tr>
-                                <td colspan="3" class="error">Error fetching data. Please try again.</td>
+                                <td colspan="4" class="error">Error fetching data. Please try again.</td>
                             </tr>
                         `;
                     }
@@ -202,6 +201,7 @@ def most_active_stocks():
                 
                 // Refresh button click handler
                 refreshBtn.addEventListener('click', fetchData);
+                metricSelect.addEventListener('change', fetchData);
                 
                 // Set up auto-refresh every 30 seconds
                 function startAutoRefresh() {
@@ -221,8 +221,25 @@ def most_active_stocks():
         </script>
     """)
 
-# API endpoint to get most active stocks data
+# API endpoint to get most active stocks data, served from the shared screener poller
 @most_active_bp.route('/most-active-stocks/data')
 def get_most_active_data():
-    data = get_most_active_stocks()
-    return jsonify(data) 
\ No newline at end of file
+    metric = request.args.get('by', 'volume')
+    if metric not in ('volume', 'trades'):
+        return jsonify({"error": "by must be 'volume' or 'trades'"}), 400
+    return pollers[f'most_actives_{metric}'].response()
+
+# Ranking history for the most active list: time on the list, rank changes and volume rates,
+# or one symbol's rank trajectory when symbol is given
+@most_active_bp.route('/most-active-stocks/history')
+def get_most_active_history():
+    metric = request.args.get('by', 'volume')
+    if metric not in ('volume', 'trades'):
+        return jsonify({"error": "by must be 'volume' or 'trades'"}), 400
+    pollers[f'most_actives_{metric}'].start()
+    symbol = request.args.get('symbol')
+    if symbol:
+        return jsonify({"data": screener_history.trajectory(f'most_actives_{metric}', 'most_actives', symbol,
+                                                             start=request.args.get('start', type=int))})
+    minutes = request.args.get('minutes', NEW_MINUTES, type=int)
+    return jsonify({"data": screener_history.summary(f'most_actives_{metric}', 'most_actives', new_minutes=minutes)})
@@ -10,6 +10,8 @@ import pytz
 import random
 from common import MENU_BAR
 import requests
+from market_tide_engine import tide_engine
+from spike_events import spike_detector
 
 # Import MOCK_TICKERS or create our own if it's not available
 try:
@@ -23,6 +25,8 @@ premium_threshold = 10000  # Default threshold is $10,000
 connected = False
 websocket_task = None
 stop_event = threading.Event()
+stream_thread = None
+stream_lock = threading.Lock()
 use_mock_data = True  # Set to True to use mock data instead of real API
 
 # Alpaca API credentials for paper trading
@@ -133,6 +137,11 @@ def process_trade_message(message):
         # Calculate premium (price × size × 100)
         premium = price * size * 100
         
+        # Every trade counts towards the market tide, not just premium ones
+        underlying = symbol[:len(symbol) - 15] if len(symbol) >= 16 else symbol
+        tide_engine.add_trade(underlying, symbol[-9:-8] if len(symbol) >= 16 else '', premium, timestamp)
+        spike_detector.observe_premium(underlying, premium, timestamp)
+        
         # If premium exceeds our threshold, store the trade
         if premium >= premium_threshold:
             # Parse the option symbol to extract ticker, expiration, type, strike
@@ -252,6 +261,8 @@ def generate_mock_trades():
         size = random.randint(size_min, size_min * 5)
         
         premium = price * size * 100
+        tide_engine.add_trade(ticker, option_type, premium)
+        spike_detector.observe_premium(ticker, premium)
         
         # Create the option symbol (e.g. AAPL240621C00150000)
         option_symbol = f"{ticker}{expiration}{option_type}{strike:08d}"
@@ -312,18 +323,26 @@ def start_websocket_connection():
     finally:
         loop.close()
 
-# Start the WebSocket connection thread
+# Start the WebSocket connection thread, unless one is already running
 def start_websocket_thread():
-    global stop_event
+    global stop_event, stream_thread
     
-    # Reset the stop event
-    stop_event.clear()
-    
-    # Start the thread
-    thread = threading.Thread(target=start_websocket_connection)
-    thread.daemon = True
-    thread.start()
+    with stream_lock:
+        if stream_thread is not None and stream_thread.is_alive():
+            if not stop_event.is_set():
+                return False
+            # A disconnect is still winding down; let it finish before starting over
+            stream_thread.join(timeout=10)
+        
+        # Reset the stop event
+        stop_event.clear()
+        
+        # Start the thread
+        stream_thread = threading.Thread(target=start_websocket_connection)
+        stream_thread.daemon = True
+        stream_thread.start()
     print("WebSocket thread started")
+    return True
 
 # Routes for the premium options Blueprint
 @premium_options_bp.route('/premium-options')
@@ -1194,7 +1213,7 @@ def get_premium_trades_data():
 
 @premium_options_bp.route('/premium-options/connect', methods=['POST'])
 def connect_to_stream():
-    global premium_threshold, stop_event
+    global premium_threshold
     
     # Get threshold from request
     try:
@@ -1203,17 +1222,13 @@ def connect_to_stream():
         if threshold < 1000:
             threshold = 1000  # Minimum threshold
         
+        # The running stream reads the threshold per trade, so it applies without a reconnect
         premium_threshold = threshold
         
-        # If already connected, disconnect first
-        if connected:
-            stop_event.set()
-            time.sleep(1)  # Give time for the thread to stop
-        
-        # Start the WebSocket connection thread
-        start_websocket_thread()
+        # A no-op when the stream is already running (e.g. started by the background services)
+        started = start_websocket_thread()
         
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'started': started})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
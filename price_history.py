@@ -0,0 +1,135 @@
+"""
+Local daily close history
+
+Daily closes are downloaded from yfinance once per ticker, pickled under
+DATA_DIR/prices and topped up incrementally: later calls only download the days
+from the last cached close on, at most once per day. The bar of a session that is
+still open is not stored, since its close is only the latest trade.
+"""
+
+import os
+import threading
+import logging
+from datetime import date, time
+
+import pandas as pd
+import yfinance as yf
+
+from common import DATA_DIR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRICE_HISTORY_DIR = os.path.join(DATA_DIR, 'prices')
+DEFAULT_START = '2000-01-01'
+MARKET_TZ = 'America/New_York'
+MARKET_CLOSE = time(16, 0)
+
+_closes = {}
+_checked_on = {}
+_lock = threading.Lock()
+
+
+def _history_path(ticker):
+    return os.path.join(PRICE_HISTORY_DIR, f"{ticker.upper()}.pkl")
+
+
+def _download_closes(ticker, start):
+    df = yf.download(ticker, start=start, progress=False, auto_adjust=True, threads=False)
+    if df is None or df.empty:
+        return pd.Series(dtype='float64')
+    closes = df['Close']
+    # Newer yfinance returns a (Price, Ticker) column MultiIndex even for one ticker
+    if isinstance(closes, pd.DataFrame):
+        closes = closes.iloc[:, 0]
+    closes = closes.dropna().astype('float64')
+    closes.index = pd.DatetimeIndex(closes.index).tz_localize(None).normalize()
+    closes.name = ticker.upper()
+    return closes
+
+
+def _load(ticker):
+    path = _history_path(ticker)
+    if os.path.exists(path):
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.error(f"Could not read cached prices for {ticker}: {e}")
+    return pd.Series(dtype='float64', name=ticker.upper())
+
+
+def _save(ticker, closes):
+    os.makedirs(PRICE_HISTORY_DIR, exist_ok=True)
+    tmp_path = _history_path(ticker) + '.tmp'
+    closes.to_pickle(tmp_path)
+    os.replace(tmp_path, _history_path(ticker))
+
+
+def store_daily_closes(ticker, closes):
+    """Merge closes (a date-indexed Series) into the cached history for ticker."""
+    ticker = ticker.upper()
+    with _lock:
+        existing = _closes.get(ticker)
+        if existing is None:
+            existing = _load(ticker)
+        merged = pd.concat([existing, closes.astype('float64')])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        merged.name = ticker
+        _closes[ticker] = merged
+        _checked_on[ticker] = date.today()
+    try:
+        _save(ticker, merged)
+    except OSError as e:
+        logger.error(f"Could not persist prices for {ticker}: {e}")
+    return merged
+
+
+def _completed_sessions(closes):
+    """Drop today's bar while the session is still open; yfinance reports its last trade as the close."""
+    now = pd.Timestamp.now(tz=MARKET_TZ)
+    if len(closes) and now.time() < MARKET_CLOSE:
+        closes = closes[closes.index < now.tz_localize(None).normalize()]
+    return closes
+
+
+def get_daily_closes(ticker, refresh=True):
+    """Return the cached daily closes for ticker, downloading any missing recent days first."""
+    ticker = ticker.upper()
+    with _lock:
+        closes = _closes.get(ticker)
+        if closes is None:
+            closes = _closes[ticker] = _load(ticker)
+        up_to_date = not refresh or _checked_on.get(ticker) == date.today()
+
+    if up_to_date:
+        return closes
+
+    # Start from the last cached day again, so a close cached while that session was still open gets replaced
+    start = closes.index[-1].strftime('%Y-%m-%d') if len(closes) else DEFAULT_START
+    try:
+        new_closes = _completed_sessions(_download_closes(ticker, start))
+    except Exception as e:
+        # Not marked as checked, so the next call retries
+        logger.error(f"Price download failed for {ticker}: {e}")
+        return closes
+
+    if new_closes.empty:
+        with _lock:
+            _checked_on[ticker] = date.today()
+        return closes
+    return store_daily_closes(ticker, new_closes)
+
+
+def cached_tickers():
+    """Tickers that have a persisted close history."""
+    if not os.path.isdir(PRICE_HISTORY_DIR):
+        return []
+    return sorted(name[:-len('.pkl')] for name in os.listdir(PRICE_HISTORY_DIR) if name.endswith('.pkl'))
+
+
+def last_updated():
+    """Modification time of the most recently written close history, or 0 if there is none."""
+    if not os.path.isdir(PRICE_HISTORY_DIR):
+        return 0.0
+    return max((entry.stat().st_mtime for entry in os.scandir(PRICE_HISTORY_DIR)
+                if entry.name.endswith('.pkl')), default=0.0)
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template_string, request
-from common import get_api_data, get_live_stock_price, MENU_BAR
+from common import MENU_BAR
+from sector_index import cache_ticker_info
 import logging
 import yfinance as yf
 from datetime import datetime, timedelta
@@ -23,6 +24,7 @@ def research():
             # Verify ticker exists using yfinance
             stock = yf.Ticker(ticker)
             info = stock.info
+            cache_ticker_info(ticker, info)
             if not info.get('regularMarketPrice'):
                 error = f"Invalid ticker symbol: {ticker}"
             else:
@@ -153,74 +155,8 @@ def research():
         {% endif %}
     """
 
-    # This section had badly formatted code - was missing string delimiters
-    # Add proper Python code here for institution data handling
-    INST_LIST_API_URL = "https://example.com/api/institutions"  # Placeholder URL
-    INST_HOLDINGS_API_URL = "https://example.com/api/holdings/{name}"  # Placeholder URL
-
-    inst_data = {"data": []}  # Mock data since API URLs are placeholders
-    if "error" in inst_data:
-        html_part2 = f"""
-        <h1>Research</h1>
-        {MENU_BAR}
-        <p>Error fetching institution list: {inst_data.get('error', 'Unknown error')}</p>
-        """
-        return render_template_string(html_part2)
-
-    institutions = inst_data.get("data", [])
-    holdings_master = {}
-    inst_totals = {}
-
-    for inst in institutions:
-        name = inst if isinstance(inst, str) else inst.get('name', 'N/A')
-        holdings_data = get_api_data(INST_HOLDINGS_API_URL.format(name=name))
-        if "error" not in holdings_data:
-            holdings = holdings_data.get("data", [])
-            total_units = 0
-            for holding in holdings:
-                ticker = holding.get("ticker")
-                units = float(holding.get("units", 0) or 0)
-                total_units += units
-                if ticker:
-                    if ticker not in holdings_master:
-                        holdings_master[ticker] = {}
-                    holdings_master[ticker][name] = units
-            inst_totals[name] = total_units
-
-    inst_names = sorted(inst_totals.keys(), key=lambda x: inst_totals[x], reverse=True)[:10]
-
-    table_html = "<table border='1' id='masterTable'><tr><th>Ticker</th><th>Total Units</th><th>Live Stock Price</th>"
-    for name in inst_names:
-        table_html += f"<th>{name}</th>"
-    table_html += "</tr>"
-
-    ticker_options = ""
-    for ticker, inst_holdings in holdings_master.items():
-        total_units = sum(inst_holdings.values())
-        live_price = get_live_stock_price(ticker)
-        table_html += f"<tr><td>{ticker}</td><td>{total_units}</td><td>{live_price if isinstance(live_price, (int, float)) else live_price}</td>"
-        for name in inst_names:
-            units = inst_holdings.get(name, 0)
-            percentage = (units / total_units * 100) if total_units > 0 else 0
-            table_html += f"<td>{percentage:.1f}%</td>"
-        table_html += "</tr>"
-        ticker_options += f"<option value='{ticker}'>{ticker}</option>"
-
-    pie_chart_html = f"""
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <select id="institutionSelect" onchange="updatePieChart()">
-        <option value="">Select an Institution</option>
-    """
-    for name in inst_names:
-        pie_chart_html += f"<option value='{name}'>{name}</option>"
-    pie_chart_html += """
-    </select>
-    <div id="pieChartContainer" style="display: none;">
-        <button onclick="closePieChart()">Close</button>
-        <canvas id="holdingsPieChart" width="400" height="400"></canvas>
-
-    </div>
-
+    # Styles and chart scripts for the stock view
+    html += """
     <style>
         .search-form {
             display: flex;
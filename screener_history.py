@@ -0,0 +1,142 @@
+"""
+Intraday screener ranking history
+
+Every poll of a screener (see screener_poller) is recorded, unchanged polls
+included, so time on the list is measured at poll resolution. Per list (e.g.
+most_actives, gainers, losers) and symbol the history keeps compact tuples of
+(epoch ms, rank, volume, trade_count, percent_change) plus the start of the
+symbol's current streak on the list, maintained as polls arrive. Answering "how
+long has it been on the list" or "new in the last 15 minutes" is a dict lookup;
+rank trajectories and volume rates are bisections into the symbol's tuples.
+"""
+
+import os
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+HISTORY_HOURS = float(os.environ.get('SCREENER_HISTORY_HOURS', 24))
+NEW_MINUTES = 15
+RATE_MINUTES = 5
+MINUTE_MS = 60 * 1000
+
+TIME, RANK, VOLUME, TRADE_COUNT, PERCENT_CHANGE = range(5)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ScreenerHistory:
+    def __init__(self, max_age_ms=int(HISTORY_HOURS * 3600 * 1000)):
+        self.max_age_ms = max_age_ms
+        self._lock = threading.Lock()
+        # (screener, list) -> sorted poll times, and the symbols on the list at the last poll
+        self._polls = defaultdict(list)
+        self._current = {}
+        # (screener, list, symbol) -> entries and the start of the symbol's current streak
+        self._entries = defaultdict(list)
+        self._since = {}
+
+    def record(self, screener, data, when=None):
+        """Append one poll of screener's payload: every list of {'symbol': ...} rows in it."""
+        ts = int(when * 1000) if when is not None else int(time.time() * 1000)
+        if not isinstance(data, dict):
+            return
+        with self._lock:
+            for list_name, rows in data.items():
+                if not isinstance(rows, list):
+                    continue
+                key = (screener, list_name)
+                polls = self._polls[key]
+                if polls and ts <= polls[-1]:
+                    continue
+                previous = self._current.get(key, set())
+                current = set()
+                for rank, row in enumerate(rows, start=1):
+                    symbol = isinstance(row, dict) and row.get('symbol')
+                    if not symbol:
+                        continue
+                    current.add(symbol)
+                    entry_key = (screener, list_name, symbol)
+                    self._entries[entry_key].append((ts, rank, _number(row.get('volume')),
+                                                     _number(row.get('trade_count')),
+                                                     _number(row.get('percent_change'))))
+                    if symbol not in previous:
+                        self._since[entry_key] = ts
+                polls.append(ts)
+                self._current[key] = current
+                if ts - polls[0] > self.max_age_ms * 1.1:
+                    self._trim(key, ts - self.max_age_ms)
+
+    def _trim(self, key, cutoff):
+        polls = self._polls[key]
+        del polls[:bisect.bisect_left(polls, cutoff)]
+        for entry_key in [k for k in self._entries if k[:2] == key]:
+            entries = self._entries[entry_key]
+            del entries[:bisect.bisect_left(entries, (cutoff,))]
+            if not entries:
+                del self._entries[entry_key]
+                self._since.pop(entry_key, None)
+
+    def _volume_rates(self, entries, since, now):
+        """Volume per minute over the last RATE_MINUTES and the RATE_MINUTES before that,
+        within the symbol's current streak on the list."""
+        def volume_at(ts):
+            i = bisect.bisect_right(entries, (max(ts, since), float('inf'))) - 1
+            return entries[i] if i >= 0 else None
+
+        window = RATE_MINUTES * MINUTE_MS
+        points = [volume_at(now - k * window) for k in (2, 1, 0)]
+        rates = []
+        for a, b in zip(points, points[1:]):
+            if a is None or b is None or a[VOLUME] is None or b[VOLUME] is None or b[TIME] <= a[TIME]:
+                rates.append(None)
+            else:
+                rates.append((b[VOLUME] - a[VOLUME]) / ((b[TIME] - a[TIME]) / MINUTE_MS))
+        return rates[1], rates[0]
+
+    def summary(self, screener, list_name, new_minutes=NEW_MINUTES):
+        """Symbols on the list at the last poll with time on the list, rank change and volume rates."""
+        with self._lock:
+            polls = self._polls.get((screener, list_name))
+            if not polls:
+                return []
+            now = polls[-1]
+            rows = []
+            for symbol in self._current.get((screener, list_name), ()):
+                entry_key = (screener, list_name, symbol)
+                entries = self._entries[entry_key]
+                since = self._since[entry_key]
+                first = entries[bisect.bisect_left(entries, (since,))]
+                rate, prior_rate = self._volume_rates(entries, since, now)
+                rows.append({
+                    'symbol': symbol,
+                    'rank': entries[-1][RANK],
+                    'since': since,
+                    'minutes_on_list': round((now - since) / MINUTE_MS, 1),
+                    'is_new': now - since <= new_minutes * MINUTE_MS and since > polls[0],
+                    'rank_change': first[RANK] - entries[-1][RANK],
+                    'volume_rate': rate,
+                    'volume_acceleration': rate - prior_rate if rate is not None and prior_rate is not None else None,
+                })
+        return sorted(rows, key=lambda row: row['rank'])
+
+    def trajectory(self, screener, list_name, symbol, start=None):
+        """The symbol's rank and metrics at every poll it was on the list since start (epoch ms)."""
+        with self._lock:
+            entries = self._entries.get((screener, list_name, symbol.upper()), [])
+            lo = bisect.bisect_left(entries, (start,)) if start is not None else 0
+            points = [{'time': e[TIME], 'rank': e[RANK], 'volume': e[VOLUME], 'trade_count': e[TRADE_COUNT],
+                       'percent_change': e[PERCENT_CHANGE]} for e in entries[lo:]]
+            since = self._since.get((screener, list_name, symbol.upper()))
+            on_list = symbol.upper() in self._current.get((screener, list_name), ())
+        return {'symbol': symbol.upper(), 'on_list': on_list, 'since': since if on_list else None, 'points': points}
+
+
+# Module-level history fed by the screener pollers
+screener_history = ScreenerHistory()
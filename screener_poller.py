@@ -0,0 +1,131 @@
+"""
+Shared Alpaca screener pollers
+
+One background poller per screener (most actives by volume, most actives by trade
+count, movers) refreshes an in-memory snapshot on a schedule, so upstream calls do
+not grow with the number of open pages. Each snapshot carries an ETag (hash of the
+payload) and the time the payload last changed; the data endpoints serve it as a
+conditional response, so a page polling an unchanged screener gets a 304. Every
+successful poll, changed or not, is also recorded in screener_history.
+"""
+
+import os
+import hashlib
+import json
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+
+import requests
+from flask import jsonify, request
+
+from screener_history import screener_history
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Alpaca API credentials for paper trading
+ALPACA_API_KEY = os.environ.get('ALPACA_API_KEY', 'AK49TL9A4OLPKO9PAUH3')
+ALPACA_API_SECRET = os.environ.get('ALPACA_API_SECRET', '0744CcGjrhPXvsORtWJpSMNWpEYuDTegOlE0OgLV')
+SCREENER_API_URL = "https://data.alpaca.markets/v1beta1/screener/stocks"
+POLL_INTERVAL = int(os.environ.get('SCREENER_POLL_SECONDS', 30))
+SCREENER_TOP = 10
+
+
+class ScreenerPoller:
+    def __init__(self, key, name, url, interval=POLL_INTERVAL):
+        self.key = key
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.data = None
+        self.etag = None
+        self.last_modified = None
+        self.error = None
+        self.polled_at = 0.0
+        self._upstream_etag = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def poll(self):
+        """Fetch the screener once; the snapshot only changes when the payload does."""
+        headers = {
+            "accept": "application/json",
+            "APCA-API-KEY-ID": ALPACA_API_KEY,
+            "APCA-API-SECRET-KEY": ALPACA_API_SECRET,
+        }
+        if self._upstream_etag:
+            headers["If-None-Match"] = self._upstream_etag
+        try:
+            response = requests.get(self.url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                self.polled_at = time.time()
+                screener_history.record(self.key, self.data, self.polled_at)
+                return False
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            print(f"Error fetching {self.name}: {e}")
+            with self._lock:
+                self.error = str(e)
+                self.polled_at = time.time()
+            return False
+
+        etag = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            self.error = None
+            self.polled_at = time.time()
+            self._upstream_etag = response.headers.get('ETag')
+            changed = etag != self.etag
+            if changed:
+                self.data = data
+                self.etag = etag
+                self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        screener_history.record(self.key, data, self.polled_at)
+        return changed
+
+    def _loop(self):
+        while True:
+            self.poll()
+            time.sleep(self.interval)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+
+    def snapshot(self):
+        """(data, etag, last_modified, error), waiting briefly for the first poll."""
+        self.start()
+        deadline = time.time() + 10
+        while self.polled_at == 0.0 and time.time() < deadline:
+            time.sleep(0.1)
+        with self._lock:
+            return self.data, self.etag, self.last_modified, self.error
+
+    def response(self):
+        """Conditional JSON response for the current snapshot (304 when the client's copy is current)."""
+        data, etag, last_modified, error = self.snapshot()
+        if data is None:
+            return jsonify({"error": error or "Screener data not available yet"})
+        # An upstream failure after a good poll keeps serving the last good snapshot
+        response = jsonify(data)
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+SCREENERS = (
+    ('most_actives_volume', 'most active stocks by volume', f"most-actives?by=volume&top={SCREENER_TOP}"),
+    ('most_actives_trades', 'most active stocks by trades', f"most-actives?by=trades&top={SCREENER_TOP}"),
+    ('movers', 'market movers', f"movers?top={SCREENER_TOP}"),
+)
+pollers = {key: ScreenerPoller(key, name, f"{SCREENER_API_URL}/{path}") for key, name, path in SCREENERS}
+
+
+def start_pollers():
+    for poller in pollers.values():
+        poller.start()
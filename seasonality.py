@@ -1,7 +1,12 @@
 from flask import Blueprint, render_template_string, request, jsonify
-from common import get_api_data, get_live_stock_price, MENU_BAR, SEASONALITY_API_URL, SEASONALITY_MARKET_API_URL, ETF_INFO_API_URL
+from common import get_api_data, get_live_stock_prices, MENU_BAR, SEASONALITY_API_URL, SEASONALITY_MARKET_API_URL, ETF_INFO_API_URL
+from ai_summary import summary_service, seasonality_prompt_from_request, job_response
+from seasonality_engine import get_seasonality
+from seasonality_screener import get_screener_matrix, STATS
+from tables import format_with_color, get_page_args, paginate, render_pagination, render_table
 import logging
 import json
+import os
 import yfinance as yf
 from datetime import datetime, timedelta
 
@@ -10,6 +15,10 @@ logger = logging.getLogger(__name__)
 
 seasonality_bp = Blueprint('seasonality', __name__, url_prefix='/')
 
+# "local" computes per-ticker seasonality from cached price history and only falls
+# back to the API when there is none; "api" always uses the Unusual Whales endpoints
+SEASONALITY_SOURCE = os.environ.get('SEASONALITY_SOURCE', 'local')
+
 @seasonality_bp.route('/')
 def seasonality():
     html = """
@@ -69,21 +78,29 @@ def seasonality_per_ticker():
 
     if ticker:
         try:
-            # Get monthly seasonality data
-            monthly_url = SEASONALITY_API_URL.format(ticker=ticker)
-            monthly_response = get_api_data(monthly_url)
-            if "error" in monthly_response:
-                monthly_error = monthly_response["error"]
-            else:
-                monthly_data = monthly_response.get("data", [])
-
-            # Get yearly-monthly data
-            yearly_monthly_url = f"https://api.unusualwhales.com/api/seasonality/{ticker}/year-month"
-            yearly_monthly_response = get_api_data(yearly_monthly_url)
-            if "error" in yearly_monthly_response:
-                yearly_monthly_error = yearly_monthly_response["error"]
-            else:
-                yearly_monthly_data = yearly_monthly_response.get("data", [])
+            if SEASONALITY_SOURCE == 'local':
+                try:
+                    monthly_data, yearly_monthly_data = get_seasonality(ticker)
+                except Exception as e:
+                    logger.error(f"Local seasonality failed for {ticker}: {e}")
+                    monthly_data, yearly_monthly_data = None, None
+
+            if not monthly_data:
+                # Get monthly seasonality data
+                monthly_url = SEASONALITY_API_URL.format(ticker=ticker)
+                monthly_response = get_api_data(monthly_url)
+                if "error" in monthly_response:
+                    monthly_error = monthly_response["error"]
+                else:
+                    monthly_data = monthly_response.get("data", [])
+
+                # Get yearly-monthly data
+                yearly_monthly_url = f"https://api.unusualwhales.com/api/seasonality/{ticker}/year-month"
+                yearly_monthly_response = get_api_data(yearly_monthly_url)
+                if "error" in yearly_monthly_response:
+                    yearly_monthly_error = yearly_monthly_response["error"]
+                else:
+                    yearly_monthly_data = yearly_monthly_response.get("data", [])
 
             # Verify ticker exists using yfinance
             stock = yf.Ticker(ticker)
@@ -484,6 +501,36 @@ def seasonality_per_ticker():
 
     return render_template_string(html, **context)
 
+ETF_MARKET_HEADERS = ["Ticker", "Month", "Avg Change", "Max Change", "Median Change", "Min Change",
+                      "Positive Closes", "Positive Months %", "Years", "Live Price"]
+
+def etf_market_rows(data):
+    """Yield formatted cells for each seasonality row, pricing each ticker once per page."""
+    live_prices = get_live_stock_prices([item.get('ticker') for item in data if item.get('ticker')])
+    for item in data:
+        avg_change = float(item.get('avg_change', 0.0)) if item.get('avg_change') else 0.0
+        max_change = float(item.get('max_change', 0.0)) if item.get('max_change') else 0.0
+        median_change = float(item.get('median_change', 0.0)) if item.get('median_change') else 0.0
+        min_change = float(item.get('min_change', 0.0)) if item.get('min_change') else 0.0
+        positive_months_perc = float(item.get('positive_months_perc', 0.0)) * 100
+        ticker_val = item.get('ticker', 'N/A')
+        yield [
+            ticker_val,
+            item.get('month', 'N/A'),
+            format_with_color(avg_change),
+            format_with_color(max_change),
+            format_with_color(median_change),
+            format_with_color(min_change),
+            item.get('positive_closes', 0),
+            f"{positive_months_perc:.2f}%",
+            item.get('years', 'N/A'),
+            live_prices.get(ticker_val, 'N/A'),
+        ]
+
+def render_etf_market_table(data, hidden=False, headers=ETF_MARKET_HEADERS):
+    attrs = "border='1' style=\"display: none;\"" if hidden else "border='1'"
+    return render_table(headers, etf_market_rows(data), table_id='etfMarketTable', attrs=attrs)
+
 @seasonality_bp.route('/etf-market', methods=['GET'])
 def seasonality_etf_market():
     ticker = request.args.get('ticker', 'ALL').upper()
@@ -500,11 +547,18 @@ def seasonality_etf_market():
 
     etf_tickers = ['SPY', 'QQQ', 'IWM', 'XLE', 'XLC', 'XLK', 'XLV', 'XLP', 'XLY', 'XLRE', 'XLF', 'XLI', 'XLB']
 
+    page, page_size = get_page_args(request.args)
+    page_data, page_info = paginate(data or [], page, page_size)
+    table_html = render_etf_market_table(page_data, hidden=not data)
+    pagination_html = render_pagination(page_info, request.path, request.args.to_dict())
+
     context = {
         'ticker': ticker,
         'data': data,
         'error': error,
         'etf_tickers': etf_tickers,
+        'table_html': table_html,
+        'pagination_html': pagination_html,
         'MENU_BAR': MENU_BAR
     }
 
@@ -516,62 +570,14 @@ def seasonality_etf_market():
             <h3>Select ETF or View All:</h3>
             <div>
                 <button onclick="window.location.href='/seasonality/etf-market?ticker=ALL'">ALL</button>
-    """
-    for t in etf_tickers:
-        html += f"""
-            <button onclick="window.location.href='/seasonality/etf-market?ticker={t}'">{t}</button>
-        """
-    html += """
+                {% for t in etf_tickers %}
+                <button onclick="window.location.href='/seasonality/etf-market?ticker={{ t }}'">{{ t }}</button>
+                {% endfor %}
             </div>
             {% if error %}<p style="color: red;">Error: {{ error }}</p>{% endif %}
             {% if not error and not data %}<p>No data available for ticker {{ ticker }}</p>{% endif %}
-            <table border='1' {% if not data %}style="display: none;"{% endif %} id="etfMarketTable">
-                <tr>
-                    <th>Ticker</th>
-                    <th>Month</th>
-                    <th>Avg Change</th>
-                    <th>Max Change</th>
-                    <th>Median Change</th>
-                    <th>Min Change</th>
-                    <th>Positive Closes</th>
-                    <th>Positive Months %</th>
-                    <th>Years</th>
-                    <th>Live Price</th>
-                </tr>
-    """
-    if data:
-        for item in data:
-            avg_change = float(item.get('avg_change', 0.0)) if item.get('avg_change') else 0.0
-            max_change = float(item.get('max_change', 0.0)) if item.get('max_change') else 0.0
-            median_change = float(item.get('median_change', 0.0)) if item.get('median_change') else 0.0
-            min_change = float(item.get('min_change', 0.0)) if item.get('min_change') else 0.0
-            positive_months_perc = float(item.get('positive_months_perc', 0.0)) * 100
-            positive_closes = item.get('positive_closes', 0)
-            years = item.get('years', 'N/A')
-            month = item.get('month', 'N/A')
-            ticker_val = item.get('ticker', 'N/A')
-            live_price = get_live_stock_price(ticker_val) if ticker_val != 'N/A' else 'N/A'
-
-            def format_with_color(value, decimals=2):
-                color = 'red' if value < 0 else 'black'
-                return f'<span style="color: {color}">{value:.{decimals}f}</span>'
-
-            html += f"""
-            <tr>
-                <td>{ticker_val}</td>
-                <td>{month}</td>
-                <td>{format_with_color(avg_change)}</td>
-                <td>{format_with_color(max_change)}</td>
-                <td>{format_with_color(median_change)}</td>
-                <td>{format_with_color(min_change)}</td>
-                <td>{positive_closes}</td>
-                <td>{positive_months_perc:.2f}%</td>
-                <td>{years}</td>
-                <td>{live_price if isinstance(live_price, (int, float)) else live_price}</td>
-            </tr>
-            """
-    html += """
-            </table>
+            {{ table_html | safe }}
+            {{ pagination_html | safe }}
         </div>
         <div style="flex: 1; min-width: 300px; padding: 20px; border: 1px solid #ccc; border-radius: 5px; background-color: #f9f9f9;">
             <h3>AI Summary</h3>
@@ -596,17 +602,22 @@ def seasonality_etf_market():
                 return;
             }
 
-            const csvData = data.map(item => `
-                Month: ${item.month}, ETF: ${item.ticker}, Avg Change: ${item.avg_change}, 
-                Positive Months %: ${item.positive_months_perc * 100}`).join('\n');
-
             try {
                 const response = await fetch('/seasonality/ai-summary', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ question: question, data: csvData })
+                    body: JSON.stringify({ question: question, rows: data })
                 });
-                const result = await response.json();
+                let result = await response.json();
+                document.getElementById('aiResponse').innerHTML = '<p>Generating summary...</p>';
+                while (result.status === 'pending') {
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                    result = await (await fetch(`/seasonality/ai-summary/${result.job_id}`)).json();
+                }
+                if (result.status !== 'done') {
+                    document.getElementById('aiResponse').innerHTML = '<p>Unable to generate AI summary. OpenAI service may be unavailable.</p>';
+                    return;
+                }
                 document.getElementById('aiResponse').innerHTML = '<ul>' + result.summary.map(point => `<li>${point}</li>`).join('') + '</ul>';
             } catch (error) {
                 document.getElementById('aiResponse').innerHTML = `<p>Error: ${error.message}</p>`;
@@ -616,43 +627,48 @@ def seasonality_etf_market():
     """
     return render_template_string(html, **context)
 
+@seasonality_bp.route('/seasonality/screener', methods=['GET'])
+def seasonality_screener():
+    month = request.args.get('month', datetime.now().month, type=int)
+    metric = request.args.get('metric', 'avg_change')
+    order = request.args.get('order', 'desc')
+    top = request.args.get('top', 25, type=int)
+
+    if metric not in STATS:
+        return jsonify({"error": f"Unknown metric '{metric}'. Use one of: {', '.join(STATS)}"}), 400
+    if not 1 <= month <= 12:
+        return jsonify({"error": "month must be between 1 and 12"}), 400
+
+    matrix = get_screener_matrix()
+    if matrix is None:
+        return jsonify({"status": "building", "data": []}), 202
+    results = matrix.screen(
+        month,
+        metric=metric,
+        min_win_rate=request.args.get('min_win_rate', type=float),
+        min_avg_change=request.args.get('min_avg_change', type=float),
+        min_median_change=request.args.get('min_median_change', type=float),
+        min_years=request.args.get('min_years', type=int),
+        descending=(order != 'asc'),
+        top=top,
+    )
+    return jsonify({
+        "data": results,
+        "universe": len(matrix.tickers),
+        "through": str(matrix.through),
+    })
+
 @seasonality_bp.route('/ai-summary', methods=['POST'])
+@seasonality_bp.route('/seasonality/ai-summary', methods=['POST'])
 def ai_summary():
-    data = request.json
-    question = data.get('question', '')
-    csv_data = data.get('data', '')
-
-    prompt = f"""
-    Analyze the given ETF seasonality data and generate a structured response with 4 bullet points of unique insights based on the following prompt:
-
-    - Analyze the given ETF seasonality data and generate a structured table with the following columns:
-      1. Month (Display as full month name instead of a number)
-      2. ETF (The ETF ticker symbol)
-      3. Upside/Downside Change (The average price change for that ETF in that month)
-      4. Insight (A brief explanation of why the ETF should be watched in that month)
-      5. Win Probability (%) (Percentage of months in the last 15 years where the ETF closed positively)
-
-    Ensure the response provides actionable insights, helping users understand which ETFs to monitor for potential upside or downside movements based on historical trends.
-
-    Data:
-    {csv_data}
-
-    Question: {question}
-    """
-
-    try:
-        import openai
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a financial data analyst specializing in ETF seasonality trends."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300
-        )
-        summary = response.choices[0].message['content'].strip().split('\n')
-        summary = [line.strip('- ').strip() for line in summary if line.strip()]
-        return jsonify({"summary": summary[:4]})
-    except Exception as e:
-        logger.error(f"OpenAI API error: {str(e)}")
-        return jsonify({"summary": ["Unable to generate AI summary. OpenAI service may be unavailable."]})
\ No newline at end of file
+    prompt = seasonality_prompt_from_request(request.json or {})
+    job = summary_service.submit(prompt)
+    return jsonify(job_response(job, prompt)), (200 if job['status'] == 'done' else 202)
+
+@seasonality_bp.route('/ai-summary/<job_id>', methods=['GET'])
+@seasonality_bp.route('/seasonality/ai-summary/<job_id>', methods=['GET'])
+def ai_summary_status(job_id):
+    job = summary_service.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job_response(job))
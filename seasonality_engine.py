@@ -0,0 +1,144 @@
+"""
+Local seasonality statistics
+
+Computes the same monthly seasonality stats as the Unusual Whales endpoints
+(avg/median/min/max change, positive closes, win rate) from cached daily closes,
+so any ticker with price history can be served without an API round-trip.
+
+Results are cached per ticker and keyed by the last completed month; when a new
+month closes only the months after the cached one are computed and appended.
+"""
+
+import threading
+import logging
+
+import pandas as pd
+
+from price_history import get_daily_closes
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEASONALITY_YEARS = 15
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def last_completed_month(today=None):
+    today = pd.Timestamp(today) if today is not None else pd.Timestamp.today()
+    return today.to_period('M') - 1
+
+
+def monthly_returns(closes, after=None, through=None):
+    """Close-to-close monthly changes in percent, one row per completed month.
+
+    Returns a DataFrame with year, month, open (prior month close), close and change
+    columns indexed by monthly Period. after/through bound the months returned.
+    """
+    if closes is None or len(closes) == 0:
+        return pd.DataFrame(columns=['year', 'month', 'open', 'close', 'change'])
+
+    month_end = closes.groupby(closes.index.to_period('M')).last()
+    frame = pd.DataFrame({'open': month_end.shift(1), 'close': month_end})
+    frame['change'] = (frame['close'] / frame['open'] - 1) * 100
+    frame = frame.dropna(subset=['change'])
+    if through is not None:
+        frame = frame[frame.index <= through]
+    if after is not None:
+        frame = frame[frame.index > after]
+    frame['year'] = frame.index.year
+    frame['month'] = frame.index.month
+    return frame[['year', 'month', 'open', 'close', 'change']]
+
+
+def monthly_stats(returns, years=SEASONALITY_YEARS):
+    """Aggregate monthly changes by calendar month, in the API's monthly seasonality shape."""
+    if returns.empty:
+        return []
+    recent = returns[returns['year'] > returns['year'].max() - years]
+    grouped = recent.groupby('month')['change']
+    positive = (recent['change'] > 0).groupby(recent['month']).sum()
+    stats = pd.DataFrame({
+        'avg_change': grouped.mean(),
+        'median_change': grouped.median(),
+        'max_change': grouped.max(),
+        'min_change': grouped.min(),
+        'positive_closes': positive,
+        'years': grouped.count(),
+    })
+    stats['positive_months_perc'] = stats['positive_closes'] / stats['years']
+    return [
+        {
+            'month': int(month),
+            'avg_change': float(row.avg_change),
+            'median_change': float(row.median_change),
+            'max_change': float(row.max_change),
+            'min_change': float(row.min_change),
+            'positive_closes': int(row.positive_closes),
+            'positive_months_perc': float(row.positive_months_perc),
+            'years': int(row.years),
+        }
+        for month, row in stats.iterrows()
+    ]
+
+
+def year_month_changes(returns, years=SEASONALITY_YEARS):
+    """Per year-month rows in the API's year-month shape, most recent first."""
+    if returns.empty:
+        return []
+    recent = returns[returns['year'] > returns['year'].max() - years].iloc[::-1]
+    return [
+        {
+            'year': int(row.year),
+            'month': int(row.month),
+            'open': float(row.open),
+            'close': float(row.close),
+            'change': float(row.change),
+        }
+        for row in recent.itertuples()
+    ]
+
+
+def _get_entry(ticker, today=None):
+    ticker = ticker.upper()
+    through = last_completed_month(today)
+
+    with _lock:
+        cached = _cache.get(ticker)
+    if cached and cached['through'] == through:
+        return cached
+
+    closes = get_daily_closes(ticker)
+    if cached and len(cached['returns']):
+        # Only the months after the cached ones, plus the month before them for its close
+        last = cached['returns'].index[-1]
+        recent_closes = closes[closes.index >= last.start_time]
+        new_rows = monthly_returns(recent_closes, after=last, through=through)
+        returns = pd.concat([cached['returns'], new_rows])
+    else:
+        returns = monthly_returns(closes, through=through)
+
+    entry = {
+        'through': through,
+        'returns': returns,
+        'monthly': monthly_stats(returns),
+        'year_month': year_month_changes(returns),
+    }
+    with _lock:
+        _cache[ticker] = entry
+    return entry
+
+
+def get_monthly_returns(ticker, today=None):
+    """Cached monthly change rows for ticker (see monthly_returns)."""
+    return _get_entry(ticker, today)['returns']
+
+
+def get_seasonality(ticker, today=None):
+    """Return (monthly_stats, year_month_changes) for ticker from local price history.
+
+    Both lists are empty when there is no cached or downloadable history.
+    """
+    entry = _get_entry(ticker, today)
+    return entry['monthly'], entry['year_month']
@@ -1,18 +1,38 @@
-from flask import Blueprint, render_template_string, request, jsonify
-from common import get_api_data, get_live_stock_price, MENU_BAR, SEASONALITY_MARKET_API_URL, OPENAI_API_KEY
+from flask import Flask, Blueprint, render_template_string, request, jsonify
+from common import get_api_data, MENU_BAR, SEASONALITY_MARKET_API_URL
+from ai_summary import summary_service, seasonality_prompt_from_request, job_response
+from seasonality import render_etf_market_table
+from tables import get_page_args, paginate, render_pagination
 import logging
 import json
-import openai
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure OpenAI API
-openai.api_key = OPENAI_API_KEY
-
 seasonality_etf_bp = Blueprint('seasonality_etf', __name__, url_prefix='/seasonality/etf-market')
 
+SORTABLE_COLUMNS = [
+    ('ticker', 'Ticker'), ('month', 'Month'), ('avg_change', 'Avg Change'), ('max_change', 'Max Change'),
+    ('median_change', 'Median Change'), ('min_change', 'Min Change'), ('positive_closes', 'Positive Closes'),
+    ('positive_months_perc', 'Positive Months %'), ('years', 'Years'),
+]
+TABLE_HEADERS = [f'<a href="#" onclick="sortTable(\'{col}\')">{label}</a>' for col, label in SORTABLE_COLUMNS] + ['Live Price']
+
+def sort_rows(data, sort_col, sort_dir):
+    """Sort the full result set server-side so every page shares one ordering."""
+    if sort_col not in dict(SORTABLE_COLUMNS):
+        return data
+
+    def key(item):
+        value = item.get(sort_col)
+        try:
+            return (0, float(value), '')
+        except (TypeError, ValueError):
+            return (1, 0.0, str(value))
+
+    return sorted(data, key=key, reverse=(sort_dir == 'desc'))
+
 @seasonality_etf_bp.route('/', methods=['GET'])
 def seasonality_etf_market():
     ticker = request.args.get('ticker', 'ALL').upper()
@@ -29,12 +49,18 @@ def seasonality_etf_market():
 
     etf_tickers = ['SPY', 'QQQ', 'IWM', 'XLE', 'XLC', 'XLK', 'XLV', 'XLP', 'XLY', 'XLRE', 'XLF', 'XLI', 'XLB']
 
+    page, page_size = get_page_args(request.args)
+    sorted_data = sort_rows(data or [], request.args.get('sort_col'), request.args.get('sort_dir', 'asc'))
+    page_data, page_info = paginate(sorted_data, page, page_size)
+
     # Prepare context for Jinja2 templating
     context = {
         'ticker': ticker,
         'data': data,
         'error': error,
         'etf_tickers': etf_tickers,
+        'table_html': render_etf_market_table(page_data, hidden=not data, headers=TABLE_HEADERS),
+        'pagination_html': render_pagination(page_info, request.path, request.args.to_dict()),
         'MENU_BAR': MENU_BAR
     }
 
@@ -46,63 +72,14 @@ def seasonality_etf_market():
             <h3>Select ETF or View All:</h3>
             <div>
                 <button onclick="window.location.href='/seasonality/etf-market?ticker=ALL'">ALL</button>
-    """
-    for t in etf_tickers:
-        html += f"""
-            <button onclick="window.location.href='/seasonality/etf-market?ticker={t}'">{t}</button>
-        """
-    html += """
+                {% for t in etf_tickers %}
+                <button onclick="window.location.href='/seasonality/etf-market?ticker={{ t }}'">{{ t }}</button>
+                {% endfor %}
             </div>
             {% if error %}<p style="color: red;">Error: {{ error }}</p>{% endif %}
             {% if not error and not data %}<p>No data available for ticker {{ ticker }}</p>{% endif %}
-            <table border='1' {% if not data %}style="display: none;"{% endif %} id="etfMarketTable">
-                <tr>
-                    <th><a href="#" onclick="sortTable('ticker')">Ticker</a></th>
-                    <th><a href="#" onclick="sortTable('month')">Month</a></th>
-                    <th><a href="#" onclick="sortTable('avg_change')">Avg Change</a></th>
-                    <th><a href="#" onclick="sortTable('max_change')">Max Change</a></th>
-                    <th><a href="#" onclick="sortTable('median_change')">Median Change</a></th>
-                    <th><a href="#" onclick="sortTable('min_change')">Min Change</a></th>
-                    <th><a href="#" onclick="sortTable('positive_closes')">Positive Closes</a></th>
-                    <th><a href="#" onclick="sortTable('positive_months_perc')">Positive Months %</a></th>
-                    <th><a href="#" onclick="sortTable('years')">Years</a></th>
-                    <th>Live Price</th>
-                </tr>
-    """
-    if data:
-        for item in data:
-            avg_change = float(item.get('avg_change', 0.0)) if item.get('avg_change') else 0.0
-            max_change = float(item.get('max_change', 0.0)) if item.get('max_change') else 0.0
-            median_change = float(item.get('median_change', 0.0)) if item.get('median_change') else 0.0
-            min_change = float(item.get('min_change', 0.0)) if item.get('min_change') else 0.0
-            positive_months_perc = float(item.get('positive_months_perc', 0.0)) * 100
-            positive_closes = item.get('positive_closes', 0)
-            years = item.get('years', 'N/A')
-            month = item.get('month', 'N/A')
-            ticker_val = item.get('ticker', 'N/A')
-            live_price = get_live_stock_price(ticker_val) if ticker_val != 'N/A' else 'N/A'
-
-            def format_with_color(value, decimals=2):
-                color = 'red' if value < 0 else 'black'
-                return f'<span style="color: {color}">{value:.{decimals}f}</span>'
-
-            html += f"""
-            <tr>
-                <td>{ticker_val}</td>
-                <td>{month}</td>
-                <td>{format_with_color(avg_change)}</td>
-                <td>{format_with_color(max_change)}</td>
-                <td>{format_with_color(median_change)}</td>
-                <td>{format_with_color(min_change)}</td>
-                <td>{positive_closes}</td>
-                <td>{positive_months_perc:.2f}%</td>
-                <td>{years}</td>
-                <td>{live_price if isinstance(live_price, (int, float)) else live_price}</td>
-            </tr>
-            """
-
-    html += """
-            </table>
+            {{ table_html | safe }}
+            {{ pagination_html | safe }}
         </div>
         <div style="flex: 1; min-width: 300px; padding: 20px; border: 1px solid #ccc; border-radius: 5px; background-color: #f9f9f9;">
             <h3>AI Summary</h3>
@@ -143,18 +120,22 @@ def seasonality_etf_market():
                 return;
             }
 
-            // Convert data to CSV-like format for OpenAI
-            const csvData = data.map(item => `
-                Month: ${item.month}, ETF: ${item.ticker}, Avg Change: ${item.avg_change}, 
-                Positive Months %: ${item.positive_months_perc * 100}`).join('\n');
-
             try {
                 const response = await fetch('/api/ai-summary', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ question: question, data: csvData })
+                    body: JSON.stringify({ question: question, rows: data })
                 });
-                const result = await response.json();
+                let result = await response.json();
+                document.getElementById('aiResponse').innerHTML = '<p>Generating summary...</p>';
+                while (result.status === 'pending') {
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                    result = await (await fetch(`/api/ai-summary/${result.job_id}`)).json();
+                }
+                if (result.status !== 'done') {
+                    document.getElementById('aiResponse').innerHTML = '<p>Unable to generate AI summary. OpenAI service may be unavailable.</p>';
+                    return;
+                }
                 document.getElementById('aiResponse').innerHTML = '<ul>' + result.summary.map(point => `<li>${point}</li>`).join('') + '</ul>';
             } catch (error) {
                 document.getElementById('aiResponse').innerHTML = `<p>Error: ${error.message}</p>`;
@@ -171,43 +152,16 @@ app.register_blueprint(seasonality_etf_bp)
 
 @app.route('/api/ai-summary', methods=['POST'])
 def ai_summary():
-    data = request.json
-    question = data.get('question', '')
-    csv_data = data.get('data', '')
-
-    prompt = f"""
-    Analyze the given ETF seasonality data and generate a structured response with 4 bullet points of unique insights based on the following prompt:
-
-    - Analyze the given ETF seasonality data and generate a structured table with the following columns:
-      1. Month (Display as full month name instead of a number)
-      2. ETF (The ETF ticker symbol)
-      3. Upside/Downside Change (The average price change for that ETF in that month)
-      4. Insight (A brief explanation of why the ETF should be watched in that month)
-      5. Win Probability (%) (Percentage of months in the last 15 years where the ETF closed positively)
-
-    Ensure the response provides actionable insights, helping users understand which ETFs to monitor for potential upside or downside movements based on historical trends.
-
-    Data:
-    {csv_data}
-
-    Question: {question}
-    """
-
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # You can use "gpt-4" if you have access
-            messages=[
-                {"role": "system", "content": "You are a financial data analyst specializing in ETF seasonality trends."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300
-        )
-        summary = response.choices[0].message['content'].strip().split('\n')
-        summary = [line.strip('- ').strip() for line in summary if line.strip()]
-        return jsonify({"summary": summary[:4]})  # Limit to 4 bullet points
-    except Exception as e:
-        logger.error(f"OpenAI API error: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    prompt = seasonality_prompt_from_request(request.json or {})
+    job = summary_service.submit(prompt)
+    return jsonify(job_response(job, prompt)), (200 if job['status'] == 'done' else 202)
+
+@app.route('/api/ai-summary/<job_id>', methods=['GET'])
+def ai_summary_status(job_id):
+    job = summary_service.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job_response(job))
 
 if __name__ == '__main__':
     app.run(debug=True)
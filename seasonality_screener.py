@@ -0,0 +1,181 @@
+"""
+Cross-sectional seasonality screener
+
+Monthly seasonality stats for the whole universe are precomputed into one float
+array of shape (tickers, 12 months, stats), so a screen is a slice, a boolean
+mask and an argpartition rather than a per-ticker computation. A background
+thread rebuilds the array when a month closes or the price history changes.
+
+Without a symbol list the universe is only the ETFs, the mock tickers,
+SCREENER_UNIVERSE and tickers that already have cached history, a few dozen
+names. For a market-wide screen put a listing of thousands of symbols in
+SCREENER_UNIVERSE_FILE; the first build then downloads each one's history.
+"""
+
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from common import DATA_DIR, MOCK_TICKERS
+from price_history import cached_tickers, last_updated
+from seasonality_engine import get_monthly_returns, last_completed_month, SEASONALITY_YEARS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATS = ['avg_change', 'median_change', 'min_change', 'max_change', 'win_rate', 'years']
+STAT_INDEX = {name: i for i, name in enumerate(STATS)}
+
+ETF_TICKERS = ['SPY', 'QQQ', 'IWM', 'XLE', 'XLC', 'XLK', 'XLV', 'XLP', 'XLY', 'XLRE', 'XLF', 'XLI', 'XLB']
+# Comma-separated extra tickers to screen, on top of everything with cached history
+SCREENER_UNIVERSE = [t.strip().upper() for t in os.environ.get('SCREENER_UNIVERSE', '').split(',') if t.strip()]
+# Symbol list (one ticker per line, e.g. an exchange listing export) for a market-wide universe
+SCREENER_UNIVERSE_FILE = os.environ.get('SCREENER_UNIVERSE_FILE', os.path.join(DATA_DIR, 'screener_universe.txt'))
+CHECK_INTERVAL = int(os.environ.get('SCREENER_CHECK_SECONDS', 300))
+
+
+def load_universe_file(path=SCREENER_UNIVERSE_FILE):
+    """Tickers listed in path, skipping blank lines and # comments; empty if the file does not exist."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip().upper() for line in f)
+        return [line for line in lines if line]
+
+
+def default_universe():
+    return sorted(set(ETF_TICKERS) | set(MOCK_TICKERS) | set(SCREENER_UNIVERSE) | set(load_universe_file())
+                  | set(cached_tickers()))
+
+
+class SeasonalityMatrix:
+    def __init__(self, tickers, values, through, built_at=None):
+        self.tickers = np.asarray(tickers, dtype=str)
+        self.values = values
+        self.through = through
+        self.built_at = built_at if built_at is not None else time.time()
+
+    @classmethod
+    def build(cls, tickers, years=SEASONALITY_YEARS, today=None):
+        """Build the (tickers x 12 x stats) array from each ticker's monthly returns."""
+        through = last_completed_month(today)
+        frames = []
+        for ticker in tickers:
+            try:
+                returns = get_monthly_returns(ticker, today)
+            except Exception as e:
+                logger.error(f"Skipping {ticker} in screener build: {e}")
+                continue
+            if len(returns):
+                frames.append(returns[['year', 'month', 'change']].assign(ticker=ticker))
+
+        if not frames:
+            return cls([], np.full((0, 12, len(STATS)), np.nan), through)
+
+        returns = pd.concat(frames, ignore_index=True)
+        returns = returns[returns['year'] > through.year - years]
+        returns['positive'] = returns['change'] > 0
+        grouped = returns.groupby(['ticker', 'month'])
+        stats = pd.DataFrame({
+            'avg_change': grouped['change'].mean(),
+            'median_change': grouped['change'].median(),
+            'min_change': grouped['change'].min(),
+            'max_change': grouped['change'].max(),
+            # Percent of years the month closed up, on the same 0-100 scale as the changes
+            'win_rate': grouped['positive'].mean() * 100,
+            'years': grouped['change'].count(),
+        })[STATS]
+
+        universe = sorted(returns['ticker'].unique())
+        full_index = pd.MultiIndex.from_product([universe, range(1, 13)], names=['ticker', 'month'])
+        values = stats.reindex(full_index).to_numpy(dtype=np.float64).reshape(len(universe), 12, len(STATS))
+        return cls(universe, values, through)
+
+    def screen(self, month, metric='avg_change', min_win_rate=None, min_avg_change=None,
+               min_median_change=None, min_years=None, descending=True, top=25):
+        """Rank tickers by one stat for a calendar month, after optional threshold filters.
+
+        Changes and win_rate are percentages, so min_win_rate=60 keeps months that
+        closed up in at least 60% of years.
+        """
+        if metric not in STAT_INDEX:
+            raise ValueError(f"Unknown metric: {metric}")
+        if not 1 <= month <= 12:
+            raise ValueError(f"Month must be between 1 and 12: {month}")
+
+        month_stats = self.values[:, month - 1, :]
+        scores = month_stats[:, STAT_INDEX[metric]]
+        mask = ~np.isnan(scores)
+        for stat, minimum in (('win_rate', min_win_rate), ('avg_change', min_avg_change),
+                              ('median_change', min_median_change), ('years', min_years)):
+            if minimum is not None:
+                mask &= month_stats[:, STAT_INDEX[stat]] >= minimum
+
+        candidates = np.nonzero(mask)[0]
+        keys = -scores[candidates] if descending else scores[candidates]
+        if 0 < top < len(candidates):
+            part = np.argpartition(keys, top - 1)[:top]
+            candidates, keys = candidates[part], keys[part]
+        ranked = candidates[np.argsort(keys, kind='stable')]
+
+        return [
+            dict({'ticker': str(self.tickers[i]), 'month': month},
+                 **{stat: float(month_stats[i, j]) for j, stat in enumerate(STATS)})
+            for i in ranked
+        ]
+
+
+# Module-level matrix shared by all requests
+screener_matrix = None
+_matrix_lock = threading.Lock()
+_build_lock = threading.Lock()
+_source_mtime = 0.0
+_rebuild_thread = None
+
+
+def rebuild_screener(tickers=None):
+    global screener_matrix, _source_mtime
+    with _build_lock:
+        matrix = SeasonalityMatrix.build(tickers or default_universe())
+        # Taken after the build, which may itself top up price files
+        mtime = last_updated()
+        with _matrix_lock:
+            screener_matrix = matrix
+            _source_mtime = mtime
+    logger.info(f"Seasonality screener rebuilt: {len(matrix.tickers)} tickers through {matrix.through}")
+    return matrix
+
+
+def needs_rebuild():
+    return (screener_matrix is None
+            or screener_matrix.through != last_completed_month()
+            or last_updated() > _source_mtime)
+
+
+def _rebuild_loop():
+    # The first pass builds the matrix, off the request threads
+    while True:
+        try:
+            if needs_rebuild():
+                rebuild_screener()
+        except Exception as e:
+            logger.error(f"Seasonality screener rebuild failed: {e}")
+        time.sleep(CHECK_INTERVAL)
+
+
+def start_rebuild_thread():
+    global _rebuild_thread
+    with _matrix_lock:
+        if _rebuild_thread is None or not _rebuild_thread.is_alive():
+            _rebuild_thread = threading.Thread(target=_rebuild_loop, daemon=True)
+            _rebuild_thread.start()
+
+
+def get_screener_matrix():
+    """Return the shared matrix, or None while the background thread is still building it."""
+    start_rebuild_thread()
+    return screener_matrix
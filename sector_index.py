@@ -0,0 +1,187 @@
+"""
+Ticker classification index
+
+Maps ticker -> sector, industry and the ETFs that hold it, so sector aggregations
+never need a yf.Ticker(...).info call on the request path. The index is built
+offline (python sector_index.py) from, in order of precedence:
+
+    cached yfinance info     DATA_DIR/info/<TICKER>.json, written whenever info is fetched
+    SEED_SECTORS             a few hand-classified names
+    sector ETF membership    constituents of the SPDR sector funds
+    ETF holdings             the sector field of holdings rows
+
+and pickled to DATA_DIR/sector_index.pkl, which is loaded once at startup.
+"""
+
+import os
+import sys
+import json
+import glob
+import pickle
+import logging
+
+import numpy as np
+
+from common import DATA_DIR, MOCK_TICKERS
+from etf_bundle import get_etf_bundle
+from etf_lookthrough import normalize_holdings, DEFAULT_ETFS, UNKNOWN_SECTOR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SECTOR_INDEX_PATH = os.path.join(DATA_DIR, 'sector_index.pkl')
+INFO_CACHE_DIR = os.path.join(DATA_DIR, 'info')
+
+SECTORS = ['Technology', 'Healthcare', 'Financials', 'Consumer Discretionary', 'Consumer Staples',
+           'Communication Services', 'Industrials', 'Energy', 'Materials', 'Utilities', 'Real Estate']
+
+SECTOR_ETFS = {
+    'XLK': 'Technology', 'XLV': 'Healthcare', 'XLF': 'Financials', 'XLY': 'Consumer Discretionary',
+    'XLP': 'Consumer Staples', 'XLC': 'Communication Services', 'XLI': 'Industrials', 'XLE': 'Energy',
+    'XLB': 'Materials', 'XLU': 'Utilities', 'XLRE': 'Real Estate',
+}
+
+# yfinance and holdings feeds use their own names for some sectors
+SECTOR_ALIASES = {
+    'information technology': 'Technology',
+    'health care': 'Healthcare',
+    'financial services': 'Financials',
+    'financial': 'Financials',
+    'consumer cyclical': 'Consumer Discretionary',
+    'consumer defensive': 'Consumer Staples',
+    'communication': 'Communication Services',
+    'telecommunication services': 'Communication Services',
+    'basic materials': 'Materials',
+}
+
+SEED_SECTORS = {
+    'AAPL': 'Technology', 'MSFT': 'Technology', 'NVDA': 'Technology',
+    'GOOGL': 'Communication Services', 'META': 'Communication Services',
+    'AMZN': 'Consumer Discretionary', 'TSLA': 'Consumer Discretionary',
+    'WMT': 'Consumer Staples', 'JPM': 'Financials', 'V': 'Financials',
+}
+SEED_SECTORS.update(SECTOR_ETFS)
+
+_CANONICAL = {name.lower(): name for name in SECTORS}
+
+
+def normalize_sector(name):
+    """Canonical sector name for a feed's sector label, or None if it is not recognized."""
+    if not name:
+        return None
+    key = str(name).strip().lower()
+    return _CANONICAL.get(key) or SECTOR_ALIASES.get(key)
+
+
+def _info_path(ticker):
+    return os.path.join(INFO_CACHE_DIR, f"{ticker.upper()}.json")
+
+
+def cache_ticker_info(ticker, info):
+    """Keep the classification fields of a yfinance info dict for the next index build."""
+    if not info or not (info.get('sector') or info.get('industry')):
+        return
+    try:
+        os.makedirs(INFO_CACHE_DIR, exist_ok=True)
+        with open(_info_path(ticker), 'w') as f:
+            json.dump({'sector': info.get('sector'), 'industry': info.get('industry')}, f)
+    except OSError as e:
+        logger.error(f"Could not cache info for {ticker}: {e}")
+
+
+def _cached_info():
+    info = {}
+    for path in glob.glob(os.path.join(INFO_CACHE_DIR, '*.json')):
+        try:
+            with open(path) as f:
+                info[os.path.basename(path)[:-5].upper()] = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping cached info {path}: {e}")
+    return info
+
+
+def build_sector_index(etfs=None):
+    """Build {ticker: {'sector', 'industry', 'etfs'}} from cached info and ETF holdings."""
+    etfs = sorted(set(etfs or DEFAULT_ETFS) | set(SECTOR_ETFS))
+    membership = {}
+    etf_sectors = {}
+    holdings_sectors = {}
+    for etf in etfs:
+        response = get_etf_bundle(etf, ['holdings']).response('holdings')
+        data = response.get("data") if "error" not in response else None
+        for ticker, _, sector in normalize_holdings(data if isinstance(data, list) else []):
+            membership.setdefault(ticker, set()).add(etf)
+            if etf in SECTOR_ETFS:
+                etf_sectors.setdefault(ticker, SECTOR_ETFS[etf])
+            if sector != UNKNOWN_SECTOR and normalize_sector(sector):
+                holdings_sectors.setdefault(ticker, normalize_sector(sector))
+
+    info = _cached_info()
+    tickers = set(membership) | set(info) | set(SEED_SECTORS) | set(MOCK_TICKERS)
+    index = {}
+    for ticker in tickers:
+        cached = info.get(ticker, {})
+        sector = (normalize_sector(cached.get('sector')) or SEED_SECTORS.get(ticker)
+                  or etf_sectors.get(ticker) or holdings_sectors.get(ticker) or UNKNOWN_SECTOR)
+        index[ticker] = {
+            'sector': sector,
+            'industry': cached.get('industry') or None,
+            'etfs': tuple(sorted(membership.get(ticker, ()))),
+        }
+    return index
+
+
+class SectorIndex:
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path=SECTOR_INDEX_PATH):
+        """Load the pickled index; falls back to the seed sectors when none has been built."""
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    return cls(pickle.load(f))
+            except Exception as e:
+                logger.error(f"Could not read sector index: {e}")
+        return cls({t: {'sector': s, 'industry': None, 'etfs': ()} for t, s in SEED_SECTORS.items()})
+
+    def save(self, path=SECTOR_INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def lookup(self, ticker):
+        return self.entries.get((ticker or '').upper())
+
+    def sector_of(self, ticker):
+        entry = self.lookup(ticker)
+        return entry['sector'] if entry else UNKNOWN_SECTOR
+
+    def classify(self, tickers, field='sector'):
+        """Array of field values aligned with tickers, e.g. to group a frame by sector."""
+        default = UNKNOWN_SECTOR if field == 'sector' else None
+        return np.array([(self.entries.get(str(t).upper()) or {}).get(field, default) or default
+                         for t in tickers], dtype=object)
+
+    def members(self, sector):
+        return sorted(t for t, entry in self.entries.items() if entry['sector'] == sector)
+
+
+# Module-level index loaded once at startup
+sector_index = SectorIndex.load()
+
+
+def rebuild_sector_index(etfs=None, path=SECTOR_INDEX_PATH):
+    """Rebuild and persist the index, updating the shared instance in place."""
+    index = SectorIndex(build_sector_index(etfs))
+    index.save(path)
+    sector_index.entries = index.entries
+    logger.info(f"Sector index built: {len(index.entries)} tickers")
+    return sector_index
+
+
+if __name__ == '__main__':
+    rebuild_sector_index(sys.argv[1:] or None)
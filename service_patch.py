@@ -2,11 +2,24 @@
 Service patch for problematic dependencies
 
 This module monkey patches problematic imports to provide alternative implementations
-or mock functionality where needed.
+or mock functionality where needed. Both patches are plain sys.modules entries made
+once at startup, so no finder is added to the import path and other imports are
+unaffected:
+
+- alpaca_trade_api is an alias of alpaca_compat, imported on first attribute access
+  so the alias costs nothing until something uses it.
+- aiohttp is replaced by a small mock (FINANCEHUB_MOCK_AIOHTTP=0 keeps the real one).
+
+FINANCEHUB_SERVICE_PATCH=0 turns the whole patch off.
 """
 
+import os
 import sys
-import importlib.util
+import types
+import importlib
+
+SERVICE_PATCH = os.environ.get('FINANCEHUB_SERVICE_PATCH', '1') == '1'
+MOCK_AIOHTTP = os.environ.get('FINANCEHUB_MOCK_AIOHTTP', '1') == '1'
 
 # Create mock module for aiohttp
 class MockResponse:
@@ -53,20 +66,31 @@ class MockAiohttp:
     class ClientConnectorError(ClientError):
         pass
 
-# Patch imports by adding our mock modules to sys.modules before they're imported
-sys.modules['aiohttp'] = MockAiohttp()
 
-# Replace alpaca-trade-api imports with our compatibility layer
-class ImportFinder:
-    def find_spec(self, fullname, path, target=None):
-        if fullname == 'alpaca_trade_api':
-            # Redirect to our compatibility layer
-            import alpaca_compat
-            sys.modules['alpaca_trade_api'] = alpaca_compat
-            return importlib.util.find_spec('alpaca_compat')
-        return None
+class ModuleAlias(types.ModuleType):
+    """Stands in for an aliased module; the first attribute lookup imports the target
+    and puts it in sys.modules under the alias, so later imports get the real module."""
+
+    def __init__(self, alias, target):
+        super().__init__(alias)
+        self._target = target
+
+    def __getattr__(self, name):
+        module = importlib.import_module(self._target)
+        sys.modules[self.__name__] = module
+        return getattr(module, name)
+
+
+def alias_module(alias, target):
+    """Make `import alias` resolve to target without importing it yet."""
+    if alias not in sys.modules:
+        sys.modules[alias] = sys.modules.get(target) or ModuleAlias(alias, target)
+    return sys.modules[alias]
 
-# Register our custom import finder
-sys.meta_path.insert(0, ImportFinder())
 
-print("Service patch applied - problematic dependencies have been patched") 
\ No newline at end of file
+if SERVICE_PATCH:
+    if MOCK_AIOHTTP:
+        sys.modules['aiohttp'] = MockAiohttp()
+    # Replace alpaca-trade-api imports with our compatibility layer
+    alias_module('alpaca_trade_api', 'alpaca_compat')
+    print("Service patch applied - problematic dependencies have been patched")
@@ -0,0 +1,235 @@
+"""
+Streaming spike detection
+
+Each series (the market spike reading, and per-ticker options premium per minute)
+keeps an exponentially weighted mean and variance that is updated in O(1) per
+point. A point more than EVENT_ZSCORE standard deviations from the mean it is
+compared against - the state before the point is folded in - is recorded as an
+event. Per-ticker premium minutes are closed by the next trade of any ticker or by
+a flush timer, and minutes without flow are fed in as zeros. Events go into a log
+kept sorted by time with a per-ticker index, so time range and ticker queries are
+bisections.
+"""
+
+import os
+import bisect
+import threading
+import time
+import logging
+from collections import defaultdict
+
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EWMA_ALPHA = float(os.environ.get('SPIKE_EWMA_ALPHA', 0.05))
+EVENT_ZSCORE = float(os.environ.get('SPIKE_EVENT_ZSCORE', 3.0))
+WARMUP_POINTS = 30
+MAX_EVENTS = 10000
+MARKET_KEY = 'MARKET'
+FLOW_BUCKET_MS = 60 * 1000
+# Minutes of zero flow fed after a ticker's last trade before it is considered idle
+FLOW_IDLE_MINUTES = int(os.environ.get('SPIKE_FLOW_IDLE_MINUTES', 30))
+# How long after a minute ends trades for it are still waited for
+FLOW_FLUSH_GRACE_MS = 5 * 1000
+
+
+def to_ms(when=None):
+    """Epoch milliseconds for a datetime, ISO string or epoch milliseconds (now when None)."""
+    if when is None or when == '':
+        return int(time.time() * 1000)
+    if isinstance(when, (int, float)):
+        return int(when)
+    stamp = pd.Timestamp(when)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize('UTC')
+    return int(stamp.value // 1_000_000)
+
+
+class EWMAState:
+    __slots__ = ('mean', 'var', 'count')
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def update(self, value, alpha):
+        """Fold value in and return its z-score against the previous state (None while warming up)."""
+        if self.count == 0:
+            self.mean, self.count = value, 1
+            return None
+        std = self.var ** 0.5
+        zscore = (value - self.mean) / std if std > 0 and self.count >= WARMUP_POINTS else None
+        diff = value - self.mean
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff * diff)
+        self.count += 1
+        return zscore
+
+
+class EventLog:
+    def __init__(self, max_events=MAX_EVENTS):
+        self.max_events = max_events
+        self._times = []
+        self._events = []
+        self._by_ticker = defaultdict(lambda: ([], []))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, event):
+        with self._lock:
+            i = bisect.bisect_right(self._times, event['time'])
+            self._times.insert(i, event['time'])
+            self._events.insert(i, event)
+            times, events = self._by_ticker[event['ticker']]
+            j = bisect.bisect_right(times, event['time'])
+            times.insert(j, event['time'])
+            events.insert(j, event)
+            if len(self._events) > self.max_events * 1.1:
+                self._trim()
+
+    def _trim(self):
+        # Everything older than the oldest kept time goes, from the global log and each ticker alike
+        cutoff = self._times[len(self._events) - self.max_events]
+        cut = bisect.bisect_left(self._times, cutoff)
+        del self._times[:cut], self._events[:cut]
+        for ticker in list(self._by_ticker):
+            times, events = self._by_ticker[ticker]
+            k = bisect.bisect_left(times, cutoff)
+            del times[:k], events[:k]
+            if not times:
+                del self._by_ticker[ticker]
+
+    def query(self, start=None, end=None, ticker=None, source=None, limit=100):
+        """Events with start <= time <= end (epoch ms), newest first."""
+        with self._lock:
+            if ticker is not None:
+                if ticker.upper() not in self._by_ticker:
+                    return []
+                times, events = self._by_ticker[ticker.upper()]
+            else:
+                times, events = self._times, self._events
+            lo = bisect.bisect_left(times, start) if start is not None else 0
+            hi = bisect.bisect_right(times, end) if end is not None else len(times)
+            selected = events[lo:hi]
+        selected = [e for e in reversed(selected) if source is None or e['source'] == source]
+        return selected[:limit]
+
+
+class SpikeDetector:
+    def __init__(self, alpha=EWMA_ALPHA, threshold=EVENT_ZSCORE, log=None):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.log = log if log is not None else EventLog()
+        self._states = {}
+        # ticker -> (current minute, premium so far, minute of the last trade)
+        self._buckets = {}
+        self._closed_through = 0
+        self._lock = threading.Lock()
+        self._flush_thread = None
+
+    def _score(self, key, source, ts, value):
+        """Fold one point into its series under the lock; returns the event if it is a spike."""
+        state = self._states.get((source, key))
+        if state is None:
+            state = self._states[(source, key)] = EWMAState()
+        mean = state.mean
+        std = state.var ** 0.5
+        zscore = state.update(float(value), self.alpha)
+        if zscore is None or abs(zscore) < self.threshold:
+            return None
+        return {
+            'time': ts, 'ticker': key, 'source': source, 'value': float(value),
+            'mean': mean, 'std': std, 'zscore': zscore, 'direction': 'up' if zscore > 0 else 'down',
+        }
+
+    def observe(self, key, source, when, value):
+        """Feed one point of a series; returns the event if the point is a spike."""
+        with self._lock:
+            event = self._score(key, source, to_ms(when), value)
+        if event is not None:
+            self.log.add(event)
+        return event
+
+    def observe_spike(self, when, value):
+        return self.observe(MARKET_KEY, 'spike', when, value)
+
+    def _close_minutes(self, ticker, until):
+        """Score ticker's open minute and the empty minutes after it, up to the minute until. Lock held."""
+        bucket, total, last_trade = self._buckets[ticker]
+        events = [self._score(ticker, 'premium_flow', bucket, total)]
+        if until - last_trade > FLOW_IDLE_MINUTES * FLOW_BUCKET_MS:
+            # Quiet for too long (e.g. the market closed): stop feeding zeros until it trades again
+            del self._buckets[ticker]
+        else:
+            events += [self._score(ticker, 'premium_flow', minute, 0.0)
+                       for minute in range(bucket + FLOW_BUCKET_MS, until, FLOW_BUCKET_MS)]
+            self._buckets[ticker] = (until, 0.0, last_trade)
+        return [event for event in events if event is not None]
+
+    def _close_all(self, until):
+        events = []
+        if until > self._closed_through:
+            self._closed_through = until
+            for ticker in [t for t, entry in self._buckets.items() if entry[0] < until]:
+                events += self._close_minutes(ticker, until)
+        return events
+
+    def observe_premium(self, ticker, premium, when=None):
+        """Add a trade's premium to its ticker's current minute; each finished minute is one point.
+
+        The first trade of a new minute closes the finished minutes of every ticker, and
+        minutes without flow count as zero. Returns the events this produced.
+        """
+        ticker = (ticker or '').upper()
+        if not ticker:
+            return []
+        self._start_flush_thread()
+        ts = to_ms(when)
+        bucket = ts - ts % FLOW_BUCKET_MS
+        with self._lock:
+            events = self._close_all(bucket)
+            current = self._buckets.get(ticker)
+            if current is None:
+                self._buckets[ticker] = (bucket, premium, bucket)
+            elif bucket >= current[0]:
+                if bucket > current[0]:
+                    events += self._close_minutes(ticker, bucket)
+                    current = self._buckets.get(ticker, (bucket, 0.0, bucket))
+                self._buckets[ticker] = (bucket, current[1] + premium, bucket)
+            # else: a late trade for a minute already scored
+        for event in events:
+            self.log.add(event)
+        return events
+
+    def flush_premium(self, now=None):
+        """Close every ticker's minutes that ended before now, so quiet tickers are scored on time."""
+        ts = to_ms(now) - FLOW_FLUSH_GRACE_MS
+        with self._lock:
+            events = self._close_all(ts - ts % FLOW_BUCKET_MS)
+        for event in events:
+            self.log.add(event)
+        return events
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLOW_BUCKET_MS / 1000 / 4)
+            try:
+                self.flush_premium()
+            except Exception as e:
+                logger.error(f"Premium flow flush failed: {e}")
+
+    def _start_flush_thread(self):
+        if self._flush_thread is None:
+            with self._lock:
+                if self._flush_thread is None:
+                    self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+                    self._flush_thread.start()
+
+
+# Module-level detector fed by the spike series and the premium options stream
+spike_detector = SpikeDetector()
@@ -0,0 +1,249 @@
+"""
+Market spike time series
+
+Spike readings are kept as two growable arrays, int64 epoch milliseconds and
+float64 values, parsed once on ingest. For every display range a pair of monotonic
+deques tracks the window's min and max as points arrive, so the stats cards are
+O(1). Chart payloads are downsampled with largest-triangle-three-buckets (LTTB) to
+a fixed point count, which keeps the shape of spikes while month views ship a few
+hundred points instead of thousands.
+"""
+
+import os
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from common import get_api_data, MARKET_SPIKE_API_URL
+from spike_events import spike_detector
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Window of each display range, in milliseconds
+RANGES = {
+    'hour': 60 * 60 * 1000,
+    'day': 24 * 60 * 60 * 1000,
+    'week': 7 * 24 * 60 * 60 * 1000,
+    'month': 30 * 24 * 60 * 60 * 1000,
+}
+RANGE_TIME_FORMATS = {'hour': '%H:%M', 'day': '%H:%M', 'week': '%m-%d %H:%M', 'month': '%m-%d'}
+RETENTION_MS = max(RANGES.values())
+CHART_POINTS = int(os.environ.get('MARKET_SPIKE_CHART_POINTS', 300))
+
+# 'api' polls MARKET_SPIKE_API_URL; set 'mock' explicitly to run the page on a random walk without API access
+MARKET_SPIKE_SOURCE = os.environ.get('MARKET_SPIKE_SOURCE', 'api')
+POLL_INTERVAL = int(os.environ.get('MARKET_SPIKE_POLL_SECONDS', 60))
+
+
+def parse_spike_rows(rows):
+    """Turn API rows ({'time': ISO string, 'value': number}) into sorted time/value arrays."""
+    rows = [r for r in rows or [] if isinstance(r, dict) and r.get('time') is not None]
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    times = pd.to_datetime([r['time'] for r in rows], utc=True, errors='coerce')
+    values = pd.to_numeric(pd.Series([r.get('value') for r in rows]), errors='coerce').to_numpy(dtype=np.float64)
+    valid = ~(times.isna() | np.isnan(values))
+    ms = times[valid].tz_convert(None).to_numpy().astype('datetime64[ms]').astype(np.int64)
+    values = values[valid]
+    order = np.argsort(ms, kind='stable')
+    return ms[order].astype(np.int64), values[order]
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by largest-triangle-three-buckets downsampling."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    # Buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = next_start + 1
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+class SpikeSeries:
+    def __init__(self, capacity=4096, on_point=None):
+        self._lock = threading.Lock()
+        # Called with (epoch ms, value) for every appended point, outside the lock
+        self.on_point = on_point
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        # Absolute index of times[0]; deques hold absolute indices so trimming does not invalidate them
+        self.base = 0
+        self._max = {name: deque() for name in RANGES}
+        self._min = {name: deque() for name in RANGES}
+        self.updated_at = None
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        """Drop points older than the longest range; double the arrays if that frees too little."""
+        cut = int(np.searchsorted(self.times[:self.size], self.times[self.size - 1] - RETENTION_MS))
+        if cut:
+            self.times[:self.size - cut] = self.times[cut:self.size]
+            self.values[:self.size - cut] = self.values[cut:self.size]
+            self.size -= cut
+            self.base += cut
+        if self.size > len(self.times) // 2:
+            capacity = len(self.times) * 2
+            self.times = np.resize(self.times, capacity)
+            self.values = np.resize(self.values, capacity)
+
+    def _append(self, ts, value):
+        if self.size and ts <= self.times[self.size - 1]:
+            return False
+        if self.size == len(self.times):
+            self._grow()
+        i = self.size
+        self.times[i], self.values[i] = ts, value
+        self.size += 1
+        idx = self.base + i
+        for name, window in RANGES.items():
+            maxq, minq = self._max[name], self._min[name]
+            while maxq and self.values[maxq[-1] - self.base] <= value:
+                maxq.pop()
+            maxq.append(idx)
+            while minq and self.values[minq[-1] - self.base] >= value:
+                minq.pop()
+            minq.append(idx)
+            cutoff = ts - window
+            while self.times[maxq[0] - self.base] <= cutoff:
+                maxq.popleft()
+            while self.times[minq[0] - self.base] <= cutoff:
+                minq.popleft()
+        return True
+
+    def extend(self, times, values):
+        """Append points newer than the last stored one. Returns the number added."""
+        added = []
+        with self._lock:
+            for ts, value in zip(times.tolist(), values.tolist()):
+                if self._append(ts, value):
+                    added.append((ts, value))
+            if added:
+                self.updated_at = time.time()
+        if self.on_point:
+            for ts, value in added:
+                self.on_point(ts, value)
+        return len(added)
+
+    def ingest(self, rows):
+        return self.extend(*parse_spike_rows(rows))
+
+    def _window(self, name):
+        start = int(np.searchsorted(self.times[:self.size], self.times[self.size - 1] - RANGES[name], side='right'))
+        return slice(start, self.size)
+
+    def stats(self, name):
+        """Latest value and the window's max/min with their times, from the deques."""
+        with self._lock:
+            if not self.size:
+                return None
+            hi, lo = self._max[name][0] - self.base, self._min[name][0] - self.base
+            return {
+                'current': float(self.values[self.size - 1]),
+                'current_time': int(self.times[self.size - 1]),
+                'max': float(self.values[hi]), 'max_time': int(self.times[hi]),
+                'min': float(self.values[lo]), 'min_time': int(self.times[lo]),
+            }
+
+    def window(self, name):
+        """Copies of the time/value arrays covering a range, ending at the latest point."""
+        with self._lock:
+            if not self.size:
+                return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+            window = self._window(name)
+            return self.times[window].copy(), self.values[window].copy()
+
+    def chart(self, name, points=CHART_POINTS):
+        """Chart.js payload for a range, downsampled to at most points."""
+        times, values = self.window(name)
+        keep = lttb(times, values, points)
+        labels = pd.to_datetime(times[keep], unit='ms', utc=True).strftime(RANGE_TIME_FORMATS[name])
+        return {'times': list(labels), 'values': np.round(values[keep], 4).tolist()}
+
+    def recent(self, count=10):
+        """Last count points, newest first, as (epoch ms, value) pairs."""
+        with self._lock:
+            start = max(0, self.size - count)
+            return list(zip(self.times[start:self.size][::-1].tolist(), self.values[start:self.size][::-1].tolist()))
+
+
+def format_ms(ms, fmt='%H:%M:%S'):
+    return pd.Timestamp(ms, unit='ms', tz='UTC').strftime(fmt)
+
+
+def generate_mock_spike_rows(start, end, interval, value=20.0):
+    """Random-walk readings between start and end, with occasional spikes, continuing from value."""
+    rows = []
+    point = start
+    while point <= end:
+        volatility = np.random.uniform(0.5, 1.5) if np.random.random() < 0.1 else 0.2
+        value = max(0.0, value + np.random.uniform(-0.5, 0.5) * volatility)
+        rows.append({'time': point.strftime('%Y-%m-%dT%H:%M:%SZ'), 'value': f"{value:.2f}"})
+        point += interval
+    return rows
+
+
+# Module-level series shared by all requests
+spike_series = SpikeSeries(on_point=spike_detector.observe_spike)
+_poll_thread = None
+_poll_lock = threading.Lock()
+
+
+def poll_spike_data():
+    if MARKET_SPIKE_SOURCE == 'mock':
+        now = datetime.utcnow().replace(microsecond=0)
+        if not len(spike_series):
+            return spike_series.ingest(generate_mock_spike_rows(now - timedelta(days=30), now, timedelta(minutes=5)))
+        last_ms, last_value = spike_series.recent(1)[0]
+        last = datetime.utcfromtimestamp(last_ms / 1000)
+        # Continue the walk from the last stored reading, or every poll would jump back to the start value
+        return spike_series.ingest(generate_mock_spike_rows(last + timedelta(minutes=1), now, timedelta(minutes=1),
+                                                            value=last_value))
+
+    response = get_api_data(MARKET_SPIKE_API_URL)
+    if "error" in response:
+        logger.error(f"Market spike fetch failed: {response['error']}")
+        return 0
+    return spike_series.ingest(response.get("data", []))
+
+
+def _poll_loop():
+    # The first poll runs right away, off the request threads
+    while True:
+        try:
+            poll_spike_data()
+        except Exception as e:
+            logger.error(f"Market spike poll failed: {e}")
+        time.sleep(POLL_INTERVAL)
+
+
+def get_spike_series():
+    """Return the shared series, polling it in the background; it is empty until the first poll lands."""
+    global _poll_thread
+    with _poll_lock:
+        if _poll_thread is None or not _poll_thread.is_alive():
+            _poll_thread = threading.Thread(target=_poll_loop, daemon=True)
+            _poll_thread.start()
+    return spike_series
@@ -0,0 +1,154 @@
+"""
+Startup benchmark
+
+Measures how long `import app` takes with lazy blueprints and with every blueprint
+imported eagerly, the time to the first page once booted lazily, and prints the
+modules with the largest cumulative import time from `python -X importtime`.
+--service-patch instead compares a full (eager) app import under the old
+meta-path finder service_patch used to install, the current sys.modules shim, and
+no patch at all. Every measurement runs in a fresh interpreter so nothing is
+already imported.
+
+    python startup_benchmark.py [--runs 5] [--top 25]
+    python startup_benchmark.py --service-patch [--runs 10]
+    python startup_benchmark.py --write-manifest
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIRST_REQUEST_SNIPPET = """
+import time
+started = time.perf_counter()
+import app
+booted = time.perf_counter()
+app.app.test_client().get({path!r})
+print(booted - started, time.perf_counter() - booted)
+"""
+# Imports app behind the finder service_patch used to put first on sys.meta_path,
+# timing every call it gets
+LEGACY_PATCH_SNIPPET = """
+import sys, time, importlib.util
+calls = [0, 0.0]
+
+class ImportFinder:
+    def find_spec(self, fullname, path, target=None):
+        started = time.perf_counter()
+        calls[0] += 1
+        spec = None
+        if fullname == 'alpaca_trade_api':
+            import alpaca_compat
+            sys.modules['alpaca_trade_api'] = alpaca_compat
+            spec = importlib.util.find_spec('alpaca_compat')
+        calls[1] += time.perf_counter() - started
+        return spec
+
+started = time.perf_counter()
+sys.meta_path.insert(0, ImportFinder())
+import app
+print(time.perf_counter() - started, calls[0], calls[1])
+"""
+PATCH_SNIPPET = """
+import time
+started = time.perf_counter()
+import app
+print(time.perf_counter() - started, 0, 0.0)
+"""
+
+
+def _env(eager, **extra):
+    env = dict(os.environ, FINANCEHUB_WARMUP='0', FINANCEHUB_EAGER_BLUEPRINTS='1' if eager else '0', **extra)
+    env.setdefault('FINANCEHUB_DATA_DIR', os.path.join(BASE_DIR, 'data'))
+    return env
+
+
+def _run(code, eager, importtime=False, **extra_env):
+    args = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    result = subprocess.run(args, cwd=BASE_DIR, env=_env(eager, **extra_env), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return result
+
+
+def boot_times(eager, path, runs):
+    """(boot seconds, first request seconds) per run."""
+    times = []
+    for _ in range(runs):
+        out = _run(FIRST_REQUEST_SNIPPET.format(path=path), eager).stdout.strip().splitlines()[-1]
+        boot, first = map(float, out.split())
+        times.append((boot, first))
+    return times
+
+
+def import_profile(eager, top):
+    """Modules with the largest cumulative import time (microseconds) for `import app`."""
+    stderr = _run('import app', eager, importtime=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def report(runs, top, path):
+    for label, eager in (('lazy', False), ('eager', True)):
+        times = boot_times(eager, path, runs)
+        boots = [boot for boot, _ in times]
+        firsts = [first for _, first in times]
+        print(f"{label:>5}: import app median {statistics.median(boots) * 1000:7.1f} ms "
+              f"(min {min(boots) * 1000:.1f}), first GET {path} median {statistics.median(firsts) * 1000:7.1f} ms")
+    for label, eager in (('lazy', False), ('eager', True)):
+        print(f"\nTop {top} cumulative imports ({label}):")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for cumulative, self_time, name in import_profile(eager, top):
+            print(f"{cumulative / 1000:14.1f} {self_time / 1000:9.1f}  {name}")
+
+
+def service_patch_report(runs):
+    """Full app import time and import-hook calls: old finder, current shim, no patch."""
+    configurations = (
+        ('meta-path finder (old)', LEGACY_PATCH_SNIPPET, '0'),
+        ('sys.modules shim', PATCH_SNIPPET, '1'),
+        ('no service patch', PATCH_SNIPPET, '0'),
+    )
+    print(f"{'':>24} {'import app ms':>14} {'hook calls':>11} {'ms in hook':>11}")
+    for label, snippet, enabled in configurations:
+        samples = []
+        for _ in range(runs):
+            out = _run(snippet, True, FINANCEHUB_SERVICE_PATCH=enabled).stdout.strip().splitlines()[-1]
+            seconds, calls, hook_seconds = out.split()
+            samples.append((float(seconds), int(calls), float(hook_seconds)))
+        print(f"{label:>24} {statistics.median(s[0] for s in samples) * 1000:14.1f} "
+              f"{samples[-1][1]:11d} {statistics.median(s[2] for s in samples) * 1000:11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--path', default='/', help='page requested after boot')
+    parser.add_argument('--write-manifest', action='store_true', help='regenerate route_manifest.json and exit')
+    parser.add_argument('--service-patch', action='store_true', help='measure the service_patch import overhead')
+    args = parser.parse_args()
+    if args.write_manifest:
+        sys.path.insert(0, BASE_DIR)
+        import lazy_blueprints
+        modules = lazy_blueprints.write_manifest()
+        print(f"Wrote {sum(len(m['rules']) for m in modules.values())} routes for {len(modules)} modules "
+              f"to {lazy_blueprints.ROUTE_MANIFEST_PATH}")
+        return
+    if args.service_patch:
+        service_patch_report(args.runs)
+        return
+    report(args.runs, args.top, args.path)
+
+
+if __name__ == '__main__':
+    main()
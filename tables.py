@@ -0,0 +1,86 @@
+"""
+Server-side HTML table rendering
+
+Tables are written into a list of string parts and joined once, instead of growing a
+string with += per cell, and rows are paginated before rendering so large tables only
+format the rows on the current page.
+"""
+
+from urllib.parse import urlencode
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def format_with_color(value, decimals=2):
+    color = 'red' if value < 0 else 'black'
+    return f'<span style="color: {color}">{value:.{decimals}f}</span>'
+
+
+def get_page_args(args, default_page_size=DEFAULT_PAGE_SIZE):
+    """Read page and page_size from request args, clamped to sane bounds."""
+    try:
+        page = max(int(args.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        page_size = min(max(int(args.get('page_size', default_page_size)), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        page_size = default_page_size
+    return page, page_size
+
+
+def paginate(items, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Slice items to one page.
+
+    Returns (page_items, page_info) where page_info has page, pages, page_size and total.
+    Out-of-range pages are clamped to the last page.
+    """
+    items = items if items is not None else []
+    total = len(items)
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], {
+        'page': page,
+        'pages': pages,
+        'page_size': page_size,
+        'total': total,
+    }
+
+
+def render_table(headers, rows, table_id=None, attrs="border='1'"):
+    """Render a table from header cells and an iterable of row cell lists.
+
+    Cells are inserted as-is, so they may contain markup (e.g. format_with_color).
+    rows can be a generator; it is consumed exactly once.
+    """
+    id_attr = f" id='{table_id}'" if table_id else ""
+    parts = [f"<table {attrs}{id_attr}>", "<tr>"]
+    parts.extend(f"<th>{header}</th>" for header in headers)
+    parts.append("</tr>")
+    for row in rows:
+        parts.append("<tr>")
+        parts.extend(f"<td>{cell}</td>" for cell in row)
+        parts.append("</tr>")
+    parts.append("</table>")
+    return "".join(parts)
+
+
+def render_pagination(page_info, base_url, params=None):
+    """Render previous/next links for page_info, keeping the other query params."""
+    if page_info['pages'] <= 1:
+        return ""
+    params = {k: v for k, v in (params or {}).items() if k != 'page'}
+
+    def page_url(page):
+        return f"{base_url}?{urlencode({**params, 'page': page})}"
+
+    parts = ["<div class='pagination'>"]
+    if page_info['page'] > 1:
+        parts.append(f"<a href='{page_url(page_info['page'] - 1)}'>&laquo; Prev</a> ")
+    parts.append(f"<span>Page {page_info['page']} of {page_info['pages']} ({page_info['total']} rows)</span>")
+    if page_info['page'] < page_info['pages']:
+        parts.append(f" <a href='{page_url(page_info['page'] + 1)}'>Next &raquo;</a>")
+    parts.append("</div>")
+    return "".join(parts)
@@ -0,0 +1,100 @@
+"""
+SummaryService and the /ai-summary routes against StubModel.
+
+StubModel counts its completions, so these tests check that repeated prompts are
+served from the prompt-hash cache and that identical concurrent requests share
+one completion, without calling a real model. Run with pytest or directly:
+python test_ai_summary.py
+"""
+
+import threading
+import time
+
+from flask import Flask
+
+import seasonality
+from ai_summary import StubModel, SummaryService, job_response
+
+PROMPT = "Question: when is SPY strongest?\nData: Jan +1.2%, Feb -0.4%"
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_cache_hit_skips_model():
+    model = StubModel()
+    service = SummaryService(model)
+    first = service.summarize(PROMPT, timeout=5)
+    assert first['status'] == 'done' and not first['cached']
+
+    # Whitespace differences normalise to the same prompt hash
+    second = service.submit("  " + PROMPT.replace(' ', '  ') + "\n")
+    assert second['status'] == 'done' and second['cached']
+    assert second['summary'] == first['summary']
+    assert second['job_id'] != first['job_id']
+    assert model.calls == 1
+
+
+def test_concurrent_identical_requests_coalesce():
+    model = StubModel(delay=0.3)
+    service = SummaryService(model)
+    jobs = []
+    start = threading.Barrier(8)
+
+    def submit():
+        start.wait()
+        jobs.append(service.submit(PROMPT))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({job['job_id'] for job in jobs}) == 1
+    done = service.summarize(PROMPT, timeout=5)
+    assert done['status'] == 'done' and len(done['summary']) == 4
+    assert model.calls == 1
+
+
+def test_job_polling_response():
+    service, seasonality.summary_service = seasonality.summary_service, SummaryService(StubModel(delay=0.3))
+    app = Flask(__name__)
+    app.register_blueprint(seasonality.seasonality_bp)
+    client = app.test_client()
+    try:
+        response = client.post('/ai-summary', json={'question': 'Best month?', 'data': 'Jan +1.2%'})
+        assert response.status_code == 202
+        body = response.get_json()
+        assert body['status'] == 'pending' and body['summary'] is None
+        assert body['prompt_tokens'] > 0
+
+        pending = client.get(f"/ai-summary/{body['job_id']}")
+        assert pending.status_code == 200 and pending.get_json()['status'] == 'pending'
+
+        # Polling the finished job returns its summary without the prompt size fields
+        job = seasonality.summary_service.summarize(PROMPT, timeout=5)
+        assert job_response(job).keys() == {'job_id', 'status', 'summary', 'error', 'cached'}
+        assert wait_for(lambda: client.get(f"/ai-summary/{body['job_id']}").get_json()['status'] != 'pending')
+        polled = client.get(f"/ai-summary/{body['job_id']}")
+        assert polled.get_json()['status'] == 'done' and len(polled.get_json()['summary']) == 4
+
+        # Asking again is a cache hit and finishes immediately
+        again = client.post('/ai-summary', json={'question': 'Best month?', 'data': 'Jan +1.2%'})
+        assert again.status_code == 200 and again.get_json()['cached']
+
+        assert client.get('/ai-summary/unknown').status_code == 404
+    finally:
+        seasonality.summary_service = service
+
+
+if __name__ == '__main__':
+    for test in (test_cache_hit_skips_model, test_concurrent_identical_requests_coalesce, test_job_polling_response):
+        test()
+        print(f"{test.__name__}: ok")
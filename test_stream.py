@@ -0,0 +1,111 @@
+"""
+StreamConn against a local stand-in for the Alpaca market data websocket.
+
+The stand-in speaks the same msgpack protocol (connected, auth, subscribe) and
+answers every trades subscription with one trade per symbol, so these tests need
+no network or API keys. Run with pytest or directly: python test_stream.py
+"""
+
+import asyncio
+import threading
+import time
+
+import msgpack
+import websockets
+
+import alpaca_compat
+from alpaca_compat import StreamConn
+
+
+class StandInServer:
+    """Websocket server on a background loop that records what clients subscribe to."""
+
+    def __init__(self, close_after_trade=False):
+        self.close_after_trade = close_after_trade
+        self.connections = 0
+        self.subscriptions = []
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait(5)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(websockets.serve(self._handle, '127.0.0.1', 0))
+        self.url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, ws, path=None):
+        self.connections += 1
+        connection = self.connections
+        await ws.send(msgpack.packb([{'T': 'success', 'msg': 'connected'}]))
+        await ws.recv()
+        await ws.send(msgpack.packb([{'T': 'success', 'msg': 'authenticated'}]))
+        try:
+            async for raw in ws:
+                message = msgpack.unpackb(raw)
+                if message.get('action') != 'subscribe':
+                    continue
+                self.subscriptions.append((connection, sorted(message.get('trades', []))))
+                await ws.send(msgpack.packb([trade(symbol, price=connection) for symbol in message.get('trades', [])]))
+                if self.close_after_trade:
+                    await ws.close()
+        except websockets.ConnectionClosed:
+            pass
+
+
+def trade(symbol, price):
+    return {'T': 't', 'S': symbol, 'i': 1, 'x': 'V', 'p': float(price), 's': 100,
+            't': msgpack.Timestamp.from_unix_nano(time.time_ns()), 'c': ['@'], 'z': 'C'}
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_reconnect_replays_subscriptions():
+    reconnect_delay, alpaca_compat.RECONNECT_MIN_SECONDS = alpaca_compat.RECONNECT_MIN_SECONDS, 0.1
+    server = StandInServer(close_after_trade=True)
+    conn = StreamConn(key_id='key', secret_key='secret', url=server.url)
+    prices = []
+    conn.subscribe('trades', 'aapl', lambda message: prices.append(message.price))
+    conn.start()
+    try:
+        # Every connection is dropped after its trade, so a second price means the subscription was replayed
+        assert wait_for(lambda: len(prices) >= 2), prices
+        assert server.subscriptions[:2] == [(1, ['AAPL']), (2, ['AAPL'])]
+        assert conn.metrics()['reconnects'] >= 1
+    finally:
+        conn.stop()
+        alpaca_compat.RECONNECT_MIN_SECONDS = reconnect_delay
+
+
+def test_restart_delivers_to_handlers():
+    server = StandInServer()
+    conn = StreamConn(key_id='key', secret_key='secret', url=server.url)
+    prices = []
+    conn.subscribe('trades', ['AAPL'], lambda message: prices.append(message.price))
+    conn.start()
+    assert wait_for(lambda: prices == [1.0]), prices
+
+    conn.stop()
+    assert wait_for(lambda: not conn._thread.is_alive())
+    conn.start()
+    try:
+        # The new connection's trade must still reach the handler subscribed before the restart
+        assert wait_for(lambda: prices == [1.0, 2.0]), prices
+    finally:
+        conn.stop()
+
+
+if __name__ == '__main__':
+    for test in (test_reconnect_replays_subscriptions, test_restart_delivers_to_handlers):
+        test()
+        print(f"{test.__name__}: ok")